@@ -1,7 +1,6 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, Response, request, jsonify, send_file, current_app, stream_with_context
 import pandas as pd
 import io
-import base64
 from datetime import datetime
 import hashlib
 import zipfile
@@ -11,6 +10,10 @@ import smtplib
 from email.message import EmailMessage
 
 from admin_auth import require_admin
+import application_export
+import import_artifacts
+import import_engine
+import sheet_reader
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -63,6 +66,11 @@ def admin_upload_stamp(cert_kind: str, slot_index: int):
             except Exception:
                 pass
         f.save(fp)
+        try:
+            from certificate_assets import purge_asset_cache
+            purge_asset_cache(fp)
+        except Exception:
+            pass
         return jsonify({'success': True, 'message': '上传成功', 'path': f'assets/cert/stamps/{str(cert_kind).strip().lower()}/{slot_index}.png'})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -356,9 +364,8 @@ def admin_login():
 def import_excellent_coaches():
     """优秀辅导员导入接口（姓名 + 电话）"""
     try:
-        from models import ExcellentCoach, ImportLog
+        from models import ImportLog
         from app import db
-        import hashlib
 
         if 'file' not in request.files:
             return jsonify({
@@ -373,107 +380,27 @@ def import_excellent_coaches():
                 'message': '请选择文件'
             }), 400
 
-        if not file.filename.endswith(('.xlsx', '.xls')):
+        if sheet_reader.extension_of(file.filename) not in sheet_reader.SUPPORTED_EXTENSIONS:
             return jsonify({
                 'success': False,
-                'message': '仅支持Excel文件格式'
+                'message': '仅支持Excel（.xlsx/.xls）或CSV文件格式'
             }), 400
 
-        try:
-            df = pd.read_excel(file)
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'message': f'Excel文件读取失败: {str(e)}'
-            }), 400
+        if _query_flag('async'):
+            return _start_import_job_response('excellent_coach', file, {'force': _query_flag('force')})
 
-        def _pick_col(candidates):
-            for c in candidates:
-                if c in df.columns:
-                    return c
-            return None
-
-        name_col = _pick_col(['指导老师姓名', '指导老师', '老师姓名', '姓名', 'teacher_name'])
-        phone_col = _pick_col(['指导老师电话', '指导老师手机号', '老师电话', '电话', '手机号', 'teacher_phone'])
-
-        if not name_col or not phone_col:
+        try:
+            import_log, report = import_upload('excellent_coach', file, force=_query_flag('force'))
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': 'Excel文件缺少必要的列: 指导老师姓名 / 指导老师电话'
+                'message': str(e)
             }), 400
-
-        total_count = len(df)
-        success_count = 0
-        failed_count = 0
-        error_data = []
-
-        # Excel 内部：电话唯一（同一老师电话不应重复）
-        seen_phone_hash = set()
-
-        for index, row in df.iterrows():
-            try:
-                teacher_name = str(row.get(name_col, '') or '').strip()
-                teacher_phone = str(row.get(phone_col, '') or '').strip()
-
-                if _is_blank_text(teacher_name) or _is_blank_text(teacher_phone):
-                    error_data.append({
-                        '行号': index + 2,
-                        '指导老师姓名': teacher_name,
-                        '指导老师电话': teacher_phone,
-                        '错误原因': '姓名或电话为空'
-                    })
-                    failed_count += 1
-                    continue
-
-                phone_hash = hashlib.sha256(teacher_phone.encode()).hexdigest()
-                if phone_hash in seen_phone_hash:
-                    error_data.append({
-                        '行号': index + 2,
-                        '指导老师姓名': teacher_name,
-                        '指导老师电话': teacher_phone,
-                        '错误原因': '该电话在本次导入文件中重复'
-                    })
-                    failed_count += 1
-                    continue
-                seen_phone_hash.add(phone_hash)
-
-                existing = ExcellentCoach.query.filter(ExcellentCoach.teacher_phone_hash == phone_hash).first()
-                if existing:
-                    existing.teacher_name = teacher_name
-                    existing.teacher_phone = teacher_phone
-                else:
-                    coach = ExcellentCoach(
-                        teacher_name=teacher_name
-                    )
-                    coach.teacher_phone = teacher_phone
-                    db.session.add(coach)
-
-                success_count += 1
-
-            except Exception as e:
-                error_data.append({
-                    '行号': index + 2,
-                    '指导老师姓名': row.get(name_col, ''),
-                    '指导老师电话': row.get(phone_col, ''),
-                    '错误原因': f'处理异常: {str(e)}'
-                })
-                failed_count += 1
-
-        db.session.commit()
-
-        error_log_content = None
-        if error_data:
-            error_log_content = create_error_excel(error_data)
-
-        import_log = ImportLog(
-            import_type='excellent_coach',
-            total_count=total_count,
-            success_count=success_count,
-            failed_count=failed_count,
-            error_log_content=error_log_content
-        )
-        db.session.add(import_log)
-        db.session.commit()
+        if report is None:
+            return _skipped_import_response(import_log)
+        total_count = report.total_count
+        success_count = report.success_count
+        failed_count = report.failed_count
 
         return jsonify({
             'success': True,
@@ -482,7 +409,7 @@ def import_excellent_coaches():
                 'total_count': total_count,
                 'success_count': success_count,
                 'failed_count': failed_count,
-                'error_log_available': error_log_content is not None,
+                'error_log_available': import_log.error_log_available,
                 'import_log_id': import_log.id
             }
         })
@@ -498,45 +425,123 @@ def import_excellent_coaches():
 @admin_bp.route('/api/admin/stats/applications', methods=['GET'])
 @require_admin()
 def admin_stats_applications():
+    """报名统计（查汇总表 application_stats）：dimension 可传多个维度（逗号分隔），其余维度可作筛选条件"""
     try:
-        from models import Application
         from app import db
-        from sqlalchemy import func
+        import stats_rollup
+
+        raw_dims = str(request.args.get('dimension', '') or '').strip().lower() or 'school'
+        dimensions = [d.strip() for d in raw_dims.split(',') if d.strip()]
+        dimensions = list(dict.fromkeys(dimensions))
+        unknown = [d for d in dimensions if d not in stats_rollup.DIMENSION_COLUMNS]
+        if not dimensions or unknown:
+            return jsonify({
+                'success': False,
+                'message': f"dimension 仅支持 {'、'.join(stats_rollup.DIMENSION_COLUMNS)}"
+            }), 400
+
+        filters = {}
+        for name in stats_rollup.DIMENSION_COLUMNS:
+            val = str(request.args.get(name, '') or '').strip()
+            if val:
+                filters[name] = val
 
-        dimension = str(request.args.get('dimension', '') or '').strip().lower() or 'school'
-        status = str(request.args.get('status', '') or '').strip()
-        category = str(request.args.get('category', '') or '').strip()
         top_n_raw = request.args.get('top_n', None)
         try:
             top_n = int(top_n_raw) if top_n_raw is not None and str(top_n_raw).strip() != '' else None
         except Exception:
             top_n = None
+        if top_n is not None and top_n <= 0:
+            top_n = None
 
-        if dimension not in ['school', 'education_level']:
-            return jsonify({'success': False, 'message': 'dimension 仅支持 school 或 education_level'}), 400
+        rows, total = stats_rollup.aggregate(db.session, dimensions, filters, top_n)
+        items = []
+        for values, count in rows:
+            labels = [v if str(v).strip() != '' else '未填写' for v in values]
+            item = {'label': ' / '.join(labels), 'count': count}
+            if len(dimensions) > 1:
+                item['values'] = dict(zip(dimensions, labels))
+            items.append(item)
 
-        if dimension == 'school':
-            dim_col = Application.school_name
-        else:
-            dim_col = Application.education_level
+        return jsonify({'success': True, 'data': {'dimension': ','.join(dimensions), 'items': items, 'total': total}})
 
-        q = db.session.query(dim_col.label('label'), func.count(Application.id).label('count'))
-        if status:
-            q = q.filter(Application.status == status)
-        if category:
-            q = q.filter(Application.category == category)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'统计失败: {str(e)}'}), 500
 
-        q = q.group_by(dim_col).order_by(func.count(Application.id).desc())
-        if top_n is not None and top_n > 0:
-            q = q.limit(top_n)
 
-        rows = q.all()
-        items = []
-        for r in rows:
-            label = r.label if r.label is not None and str(r.label).strip() != '' else '未填写'
-            items.append({'label': str(label), 'count': int(r.count)})
+def _parse_local_time(raw):
+    """解析 start/end（ISO 日期或日期时间）；带时区的换算到统计时区"""
+    from datetime import datetime, timezone
+    import stats_rollup
+
+    raw = str(raw or '').strip()
+    if not raw:
+        return None
+    dt = datetime.fromisoformat(raw.replace('Z', '+00:00'))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone(stats_rollup.TZ_OFFSET)).replace(tzinfo=None)
+    return dt
 
-        return jsonify({'success': True, 'data': {'dimension': dimension, 'items': items}})
+
+@admin_bp.route('/api/admin/stats/timeseries', methods=['GET'])
+@require_admin()
+def admin_stats_timeseries():
+    """报名时间序列（查 application_time_buckets）：按小时/天的报名、通过、退回数，可按项目大类筛选或拆分"""
+    try:
+        from app import db
+        import stats_rollup
+
+        granularity = str(request.args.get('granularity', '') or '').strip().lower() or 'hour'
+        if granularity not in stats_rollup.GRANULARITIES:
+            return jsonify({'success': False, 'message': 'granularity 仅支持 hour、day'}), 400
+
+        raw_metrics = str(request.args.get('metrics', '') or '').strip().lower()
+        metrics = [m.strip() for m in raw_metrics.split(',') if m.strip()] or list(stats_rollup.METRICS)
+        metrics = list(dict.fromkeys(metrics))
+        if any(m not in stats_rollup.METRICS for m in metrics):
+            return jsonify({
+                'success': False,
+                'message': f"metrics 仅支持 {'、'.join(stats_rollup.METRICS)}"
+            }), 400
+
+        try:
+            start = _parse_local_time(request.args.get('start'))
+            end = _parse_local_time(request.args.get('end'))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'start/end 须为 ISO 格式日期或时间，如 2024-05-01 或 2024-05-01T08:00'}), 400
+
+        step = stats_rollup.GRANULARITY_STEPS[granularity]
+        end = stats_rollup.floor_bucket(end or stats_rollup.local_now(), granularity)
+        if start is None:
+            start = end - step * (stats_rollup.DEFAULT_BUCKETS[granularity] - 1)
+        start = stats_rollup.floor_bucket(start, granularity)
+        if start > end:
+            return jsonify({'success': False, 'message': 'start 不能晚于 end'}), 400
+        limit = stats_rollup.MAX_BUCKETS[granularity]
+        if (end - start) // step + 1 > limit:
+            return jsonify({'success': False, 'message': f'时间范围过大，{granularity} 粒度最多 {limit} 个桶'}), 400
+
+        category = request.args.get('category', None)
+        category = str(category).strip() if category is not None and str(category).strip() else None
+        by_category = _query_flag('by_category')
+
+        buckets, series, per_category = stats_rollup.timeseries(
+            db.session, granularity, start, end, metrics, category=category, by_category=by_category
+        )
+        data = {
+            'granularity': granularity,
+            'tz_offset_hours': stats_rollup.TZ_OFFSET.total_seconds() / 3600,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'buckets': [b.isoformat() for b in buckets],
+            'series': series,
+            'totals': {m: sum(v) for m, v in series.items()},
+        }
+        if by_category:
+            data['series_by_category'] = {
+                (c if str(c).strip() != '' else '未填写'): v for c, v in sorted(per_category.items())
+            }
+        return jsonify({'success': True, 'data': data})
 
     except Exception as e:
         return jsonify({'success': False, 'message': f'统计失败: {str(e)}'}), 500
@@ -583,20 +588,10 @@ def admin_get_application_by_match_no():
 @admin_bp.route('/api/admin/applications', methods=['GET'])
 @require_admin()
 def admin_list_applications():
-    """报名列表（管理员）：分页 + 筛选"""
+    """报名列表（管理员）：分页 + 筛选；带 cursor 参数时走游标分页"""
     try:
         from models import Application
-
-        def _school_initial(name: str) -> str:
-            try:
-                from pypinyin import lazy_pinyin, Style
-                s = str(name or '').strip()
-                if not s:
-                    return ''
-                letters = lazy_pinyin(s, style=Style.FIRST_LETTER)
-                return ''.join([str(x or '') for x in letters]).upper()
-            except Exception:
-                return ''
+        from pagination import clamp_per_page, cursor_listing, wants_cursor
 
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
@@ -608,7 +603,7 @@ def admin_list_applications():
         school_initial = str(request.args.get('school_initial', '') or '').strip().upper()
         match_no = str(request.args.get('match_no', '') or '').strip()
 
-        query = Application.query
+        query = Application.query_with_participants()
 
         if status:
             query = query.filter(Application.status == status)
@@ -622,30 +617,25 @@ def admin_list_applications():
             query = query.filter(Application.match_no == match_no)
 
         if school_initial:
-            ids = []
-            for row in query.with_entities(Application.id, Application.school_name).yield_per(500):
-                if _school_initial(row.school_name).startswith(school_initial):
-                    ids.append(row.id)
-            if not ids:
-                return jsonify({
-                    'success': True,
-                    'data': {
-                        'applications': [],
-                        'total': 0,
-                        'pages': 0,
-                        'current_page': page
-                    }
-                })
-            query = query.filter(Application.id.in_(ids))
+            query = Application.filter_school_initial(query, school_initial)
 
-        applications = query.order_by(Application.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        if wants_cursor(request.args):
+            count_key = ('admin_list', status, category, education_level, school_name, school_initial, match_no)
+            try:
+                items, meta = cursor_listing(query, Application, request.args, count_key)
+            except ValueError:
+                return jsonify({'success': False, 'message': '分页游标无效，请从第一页重新加载'}), 400
+            meta['applications'] = Application.to_dicts(items, include_sensitive=True)
+            return jsonify({'success': True, 'data': meta})
+
+        applications = query.order_by(Application.created_at.desc(), Application.id.desc()).paginate(
+            page=page, per_page=clamp_per_page(per_page), error_out=False
         )
 
         return jsonify({
             'success': True,
             'data': {
-                'applications': [a.to_dict(include_sensitive=True) for a in applications.items],
+                'applications': Application.to_dicts(applications.items, include_sensitive=True),
                 'total': applications.total,
                 'pages': applications.pages,
                 'current_page': page
@@ -772,102 +762,34 @@ def admin_reject_application(application_id):
 @admin_bp.route('/api/admin/applications/export', methods=['GET'])
 @require_admin()
 def admin_export_applications():
-    """导出报名列表（管理员）：按筛选导出 Excel"""
+    """导出报名列表（管理员）：按筛选导出 Excel（默认）或 CSV（format=csv，边查边输出）；async=1 时后台导出"""
     try:
-        from models import Application
+        export_format = str(request.args.get('format', '') or 'xlsx').strip().lower()
+        if export_format not in application_export.EXPORT_FORMATS:
+            return jsonify({'success': False, 'message': '导出格式仅支持 xlsx 或 csv'}), 400
 
-        def _school_initial(name: str) -> str:
-            try:
-                from pypinyin import lazy_pinyin, Style
-                s = str(name or '').strip()
-                if not s:
-                    return ''
-                letters = lazy_pinyin(s, style=Style.FIRST_LETTER)
-                return ''.join([str(x or '') for x in letters]).upper()
-            except Exception:
-                return ''
+        filters = application_export.filters_from_args(request.args)
+        if _query_flag('async'):
+            return _start_export_job_response('applications', {'format': export_format, 'filters': filters})
 
-        status = str(request.args.get('status', '') or '').strip()
-        category = str(request.args.get('category', '') or '').strip()
-        education_level = str(request.args.get('education_level', '') or '').strip()
-        school_name = str(request.args.get('school_name', '') or '').strip()
-        school_initial = str(request.args.get('school_initial', '') or '').strip().upper()
-        match_no = str(request.args.get('match_no', '') or '').strip()
-
-        query = Application.query
-        if status:
-            query = query.filter(Application.status == status)
-        if category:
-            query = query.filter(Application.category == category)
-        if education_level:
-            query = query.filter(Application.education_level == education_level)
-        if school_name:
-            query = query.filter(Application.school_name.like(f"%{school_name}%"))
-        if match_no:
-            query = query.filter(Application.match_no == match_no)
-
-        if school_initial:
-            ids = []
-            for row in query.with_entities(Application.id, Application.school_name).yield_per(500):
-                if _school_initial(row.school_name).startswith(school_initial):
-                    ids.append(row.id)
-            if not ids:
-                export_df = pd.DataFrame([])
-                excel_file = io.BytesIO()
-                export_df.to_excel(excel_file, index=False)
-                excel_file.seek(0)
-                return send_file(
-                    excel_file,
-                    mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    as_attachment=True,
-                    download_name='applications.xlsx'
-                )
-            query = query.filter(Application.id.in_(ids))
-
-        items = query.order_by(Application.created_at.desc()).all()
-
-        rows = []
-        for a in items:
-            d = a.to_dict(include_sensitive=True)
-            match_no_val = d.get('match_no')
-            if _is_blank_text(match_no_val):
-                match_no_val = ''
-            rows.append({
-                '报名ID': d.get('id'),
-                '参赛号': match_no_val,
-                '项目大类': d.get('category'),
-                '具体任务': d.get('task'),
-                '学段': d.get('education_level'),
-                '人数': d.get('participant_count'),
-                '学校名称': d.get('school_name'),
-                '指导老师': d.get('teacher_name'),
-                '指导老师手机号': d.get('teacher_phone'),
-                '领队': d.get('leader_name'),
-                '参赛人手机号': d.get('participant_phone'),
-                '参赛人邮箱': d.get('participant_email'),
-                '联系人姓名': d.get('contact_name'),
-                '联系人手机号': d.get('contact_phone'),
-                '联系人邮箱': d.get('contact_email'),
-                '获奖等级': d.get('award_level'),
-                '状态': d.get('status'),
-                '退回原因': d.get('rejected_reason'),
-                '创建时间': d.get('created_at'),
-                '更新时间': d.get('updated_at')
-            })
-
-        df = pd.DataFrame(rows)
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='报名列表', index=False)
-        output.seek(0)
+        query = application_export.build_query(filters)
 
         ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"报名列表导出_{ts}.xlsx"
-        return send_file(
-            output,
+        if export_format == 'csv':
+            return Response(
+                stream_with_context(application_export.iter_csv(query)),
+                mimetype='text/csv; charset=utf-8',
+                headers={'Content-Disposition': import_artifacts.attachment_header(f"报名列表导出_{ts}.csv")}
+            )
+
+        path = application_export.write_xlsx(query)
+        return Response(
+            application_export.iter_file(path),
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
+            headers={
+                'Content-Disposition': import_artifacts.attachment_header(f"报名列表导出_{ts}.xlsx"),
+                'Content-Length': str(os.path.getsize(path))
+            }
         )
 
     except Exception as e:
@@ -886,26 +808,235 @@ def admin_get_applications_by_phone():
             return jsonify({'success': False, 'message': '请提供手机号'}), 400
 
         phone_hash = hashlib.sha256(phone.encode()).hexdigest()
-        applications = Application.query.filter(
+        applications = Application.query_with_participants().filter(
             Application.contact_phone_hash == phone_hash
         ).order_by(Application.created_at.desc()).all()
 
-        return jsonify({'success': True, 'data': [a.to_dict(include_sensitive=True) for a in applications]})
+        return jsonify({'success': True, 'data': Application.to_dicts(applications, include_sensitive=True)})
 
     except Exception as e:
         return jsonify({'success': False, 'message': '获取数据失败', 'error': str(e)}), 500
 
 def create_error_excel(error_data):
-    """创建包含错误信息的Excel文件"""
-    df = pd.DataFrame(error_data)
+    """创建包含错误信息的Excel文件，返回文件内容 bytes（error_data 为 dict 列表或 DataFrame）"""
+    df = error_data if isinstance(error_data, pd.DataFrame) else pd.DataFrame(error_data)
     
     # 创建Excel文件
     output = io.BytesIO()
     with pd.ExcelWriter(output, engine='openpyxl') as writer:
         df.to_excel(writer, sheet_name='导入错误记录', index=False)
     
-    output.seek(0)
-    return base64.b64encode(output.getvalue()).decode('utf-8')
+    return output.getvalue()
+
+
+# running 状态的导入记录超过该秒数没有新的检查点，视为已中断，可以续跑
+IMPORT_STALE_SECONDS = int(os.environ.get('IMPORT_STALE_SECONDS', '300') or 300)
+
+
+def begin_import_log(import_type, digest, force=False):
+    """取得本次导入使用的 ImportLog，返回 (import_log, existing)。
+
+    相同文件已导入完成或正在导入时 import_log 为 None，existing 为那条记录；
+    相同文件上次导入中断时返回那条记录，从它的检查点续跑。force=True 时总是新建。
+    """
+    from models import ImportLog
+    from app import db
+
+    if not force:
+        prev = ImportLog.query.filter_by(import_type=import_type, content_hash=digest).order_by(ImportLog.id.desc()).first()
+        if prev is not None:
+            touched = prev.updated_at or prev.created_at or datetime.min
+            stale = (datetime.utcnow() - touched).total_seconds() > IMPORT_STALE_SECONDS
+            if prev.status == 'completed' or (prev.status == 'running' and not stale):
+                return None, prev
+            prev.status = 'running'
+            db.session.commit()
+            return prev, None
+
+    import_log = ImportLog(
+        import_type=import_type,
+        total_count=0,
+        success_count=0,
+        failed_count=0,
+        status='running',
+        content_hash=digest
+    )
+    db.session.add(import_log)
+    db.session.commit()
+    return import_log, None
+
+
+def finish_import_log(import_log, report):
+    """导入完成：写入最终计数与错误日志，清掉检查点"""
+    from app import db
+
+    import_log.total_count = report.total_count
+    import_log.success_count = report.success_count
+    import_log.failed_count = report.failed_count
+    import_artifacts.save_error_log(import_log, create_error_excel(report.error_frame()) if report.failed_count else b'')
+    import_log.status = 'completed'
+    import_engine.clear_checkpoint(db.session, import_log)
+    db.session.commit()
+    return import_log
+
+
+def run_logged_import(import_type, path, filename, digest, force=False, progress=None):
+    """流式读取、分块提交的导入，返回 (import_log, report)。
+
+    相同文件已导入/正在导入时返回 (existing, None)；文件无法读取或缺少必要的列时抛 ValueError
+    （此时不会产生导入记录）。
+    """
+    from app import db
+    from config import AWARD_LEVELS
+
+    reader = sheet_reader.open_sheet(path, filename)
+    try:
+        import_engine.resolve_columns(import_type, reader.columns)
+        import_log, existing = begin_import_log(import_type, digest, force=force)
+        if existing is not None:
+            return existing, None
+        try:
+            report = import_engine.run_import(db.session, import_type, reader, award_levels=AWARD_LEVELS,
+                                              progress=progress, import_log=import_log)
+        except Exception:
+            # 已提交的分块保留，检查点之后的回滚；同一文件重新上传即可续跑
+            db.session.rollback()
+            try:
+                import_log.status = 'failed'
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+            raise
+        return finish_import_log(import_log, report), report
+    finally:
+        reader.close()
+
+
+def import_upload(import_type, file, force=False):
+    """上传文件落盘后导入（见 run_logged_import），结束后删除临时文件"""
+    upload_path, digest = sheet_reader.spool_upload(file)
+    try:
+        return run_logged_import(import_type, upload_path, file.filename, digest, force=force)
+    finally:
+        sheet_reader.remove_quietly(upload_path)
+
+
+def _skipped_import_response(existing):
+    if existing.status != 'completed':
+        return jsonify({
+            'success': False,
+            'message': f'相同文件正在导入中（导入记录 #{existing.id}），请稍后查看结果'
+        }), 409
+    return jsonify({
+        'success': True,
+        'message': f'该文件已导入过（导入记录 #{existing.id}），已跳过；如需重新导入请加参数 force=1',
+        'data': {
+            'total_count': existing.total_count,
+            'success_count': existing.success_count,
+            'failed_count': existing.failed_count,
+            'error_log_available': existing.error_log_available,
+            'import_log_id': existing.id,
+            'duplicate': True
+        }
+    })
+
+
+def _query_flag(name):
+    return str(request.args.get(name, '') or '').strip() in ['1', 'true', 'True', 'yes', 'on']
+
+
+def _start_import_job_response(import_type, file, options=None):
+    import import_jobs
+
+    job_id = import_jobs.start_import_job(import_type, file, options)
+    return jsonify({
+        'success': True,
+        'message': '文件已上传，正在后台导入',
+        'data': {
+            'job_id': job_id
+        }
+    }), 202
+
+
+@admin_bp.route('/api/admin/import-jobs/<string:job_id>', methods=['GET'])
+@require_admin()
+def get_import_job(job_id):
+    """后台导入任务进度"""
+    try:
+        import import_jobs
+
+        job = import_jobs.read_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        return jsonify({'success': True, 'data': job})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
+def _start_export_job_response(export_type, options=None):
+    import export_jobs
+
+    job_id, reused = export_jobs.start_export_job(export_type, options)
+    return jsonify({
+        'success': True,
+        'message': '已有相同的导出任务，直接复用' if reused else '正在后台导出',
+        'data': {
+            'job_id': job_id,
+            'reused': reused
+        }
+    }), 202
+
+
+@admin_bp.route('/api/admin/export-jobs/<string:job_id>', methods=['GET'])
+@require_admin()
+def get_export_job(job_id):
+    """后台导出任务进度；完成后附带短期下载链接"""
+    try:
+        import export_jobs
+
+        job = export_jobs.read_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        job.pop('artifact', None)
+        if job.get('status') == 'finished':
+            token = export_jobs.create_download_token(job['job_id'])
+            job['download_url'] = f"/api/admin/export-downloads/{token}"
+            job['download_expires_in'] = export_jobs.EXPORT_LINK_SECONDS
+        return jsonify({'success': True, 'data': job})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
+@admin_bp.route('/api/admin/export-downloads/<string:token>', methods=['GET'])
+def download_export(token):
+    """下载导出产物：签名链接本身即凭证（短期有效），不需要 Authorization 头，方便浏览器直接下载"""
+    try:
+        import export_jobs
+
+        job_id = export_jobs.verify_download_token(token)
+        if not job_id:
+            return jsonify({'success': False, 'message': '下载链接无效或已过期'}), 403
+        job = export_jobs.read_job(job_id)
+        path = export_jobs.artifact_path(job)
+        if not job or job.get('status') != 'finished' or not path or not os.path.isfile(path):
+            return jsonify({'success': False, 'message': '导出文件不存在或已清理'}), 404
+
+        filename = str((job.get('result') or {}).get('filename') or os.path.basename(path))
+        mimetypes = {
+            '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            '.csv': 'text/csv; charset=utf-8',
+            '.zip': 'application/zip',
+        }
+        return Response(
+            application_export.iter_file(path, remove=False),
+            mimetype=mimetypes.get(os.path.splitext(path)[1], 'application/octet-stream'),
+            headers={
+                'Content-Disposition': import_artifacts.attachment_header(filename),
+                'Content-Length': str(os.path.getsize(path))
+            }
+        )
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'下载失败: {str(e)}'}), 500
 
 
 def _safe_filename_part(val: str) -> str:
@@ -916,20 +1047,8 @@ def _safe_filename_part(val: str) -> str:
         s = s.replace(ch, '_')
     return s
 
-def _cell_to_str(value):
-    try:
-        if pd.isna(value):
-            return ''
-    except Exception:
-        pass
-    return str(value).strip() if value is not None else ''
-
-def _is_blank_text(s):
-    txt = str(s or '').strip()
-    if not txt:
-        return True
-    low = txt.lower()
-    return low in ['nan', 'none', 'null', 'undefined']
+_cell_to_str = import_engine.cell_to_str
+_is_blank_text = import_engine.is_blank_text
 
 
 def _make_template_excel(columns: list[str], sample_rows: list[dict] | None = None, sheet_name: str = '模板'):
@@ -1009,157 +1128,28 @@ def import_match_no():
                 'message': '请选择文件'
             }), 400
         
-        if not file.filename.endswith(('.xlsx', '.xls')):
+        if sheet_reader.extension_of(file.filename) not in sheet_reader.SUPPORTED_EXTENSIONS:
             return jsonify({
                 'success': False,
-                'message': '仅支持Excel文件格式'
+                'message': '仅支持Excel（.xlsx/.xls）或CSV文件格式'
             }), 400
+
+        if _query_flag('async'):
+            return _start_import_job_response('match_no', file, {'force': _query_flag('force')})
         
-        # 读取Excel文件
+        # 流式读取、分块提交，导入日志记录检查点
         try:
-            df = pd.read_excel(file)
-        except Exception as e:
-            return jsonify({
-                'success': False,
-                'message': f'Excel文件读取失败: {str(e)}'
-            }), 400
-        
-        # 列名兼容（按需求模板/常见表头）
-        def _pick_col(candidates):
-            for c in candidates:
-                if c in df.columns:
-                    return c
-            return None
-
-        match_no_col = _pick_col(['参赛号', '参赛编号', '参赛ID', 'match_no'])
-        if not match_no_col:
-            return jsonify({
-                'success': False,
-                'message': 'Excel文件缺少必要的列: 参赛号'
-            }), 400
-
-        phone_col = _pick_col(['手机号', '选手手机号', '参赛人手机号', '参赛手机号', '电话', '手机'])
-        if not phone_col:
+            import_log, report = import_upload('match_no', file, force=_query_flag('force'))
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': 'Excel文件缺少必要的列: 手机号'
+                'message': str(e)
             }), 400
-        
-        total_count = len(df)
-        success_count = 0
-        failed_count = 0
-        error_data = []
-        updated_application_ids = []
-
-        # 同一批次导入：参赛号唯一性（Excel 内部不能重复）
-        seen_match_no = set()
-        
-        # 逐行处理
-        for index, row in df.iterrows():
-            try:
-                match_no = _cell_to_str(row.get(match_no_col, ''))
-                phone = _cell_to_str(row.get(phone_col, ''))
-
-                if _is_blank_text(match_no):
-                    error_data.append({
-                        '行号': index + 2,  # Excel行号从2开始
-                        '手机号': phone,
-                        '参赛号': match_no,
-                        '错误原因': '参赛号为空'
-                    })
-                    failed_count += 1
-                    continue
-
-                # Excel 内部重复参赛号
-                if match_no in seen_match_no:
-                    error_data.append({
-                        '行号': index + 2,
-                        '手机号': phone,
-                        '参赛号': match_no,
-                        '错误原因': '参赛号在本次导入文件中重复'
-                    })
-                    failed_count += 1
-                    continue
-
-                seen_match_no.add(match_no)
-
-                if _is_blank_text(phone):
-                    error_data.append({
-                        '行号': index + 2,
-                        '手机号': phone,
-                        '参赛号': match_no,
-                        '错误原因': '手机号为空'
-                    })
-                    failed_count += 1
-                    continue
-
-                phone_hash = hashlib.sha256(phone.encode()).hexdigest()
-                application = Application.query.filter(
-                    Application.contact_phone_hash == phone_hash
-                ).order_by(Application.created_at.desc()).first()
-
-                if application is None:
-                    error_data.append({
-                        '行号': index + 2,
-                        '手机号': phone,
-                        '参赛号': match_no,
-                        '错误原因': '未找到匹配的报名记录'
-                    })
-                    failed_count += 1
-                    continue
-
-                if getattr(application, 'status', None) == 'rejected':
-                    error_data.append({
-                        '行号': index + 2,
-                        '手机号': phone,
-                        '参赛号': match_no,
-                        '错误原因': '该报名已退回(rejected)，不分配参赛号'
-                    })
-                    failed_count += 1
-                    continue
-
-                # 数据库唯一性：同一个参赛号不能分配给不同报名
-                existing = Application.query.filter(Application.match_no == match_no).first()
-                if existing and getattr(existing, 'id', None) != getattr(application, 'id', None):
-                    error_data.append({
-                        '行号': index + 2,
-                        '手机号': phone,
-                        '参赛号': match_no,
-                        '错误原因': f'参赛号已被其他报名占用(报名ID={existing.id})'
-                    })
-                    failed_count += 1
-                    continue
-
-                # 更新参赛号
-                application.match_no = match_no
-                success_count += 1
-                
-            except Exception as e:
-                error_data.append({
-                    '行号': index + 2,
-                    '手机号': row.get(phone_col, '') if phone_col else row.get('手机号', ''),
-                    '参赛号': row.get(match_no_col, ''),
-                    '错误原因': f'处理异常: {str(e)}'
-                })
-                failed_count += 1
-        
-        # 提交事务
-        db.session.commit()
-        
-        # 创建导入日志
-        error_log_content = None
-        if error_data:
-            error_log_content = create_error_excel(error_data)
-        
-        import_log = ImportLog(
-            import_type='match_no',
-            total_count=total_count,
-            success_count=success_count,
-            failed_count=failed_count,
-            error_log_content=error_log_content
-        )
-        db.session.add(import_log)
-        db.session.commit()
+        if report is None:
+            return _skipped_import_response(import_log)
+        total_count = report.total_count
+        success_count = report.success_count
+        failed_count = report.failed_count
         
         return jsonify({
             'success': True,
@@ -1168,7 +1158,7 @@ def import_match_no():
                 'total_count': total_count,
                 'success_count': success_count,
                 'failed_count': failed_count,
-                'error_log_available': error_log_content is not None,
+                'error_log_available': import_log.error_log_available,
                 'import_log_id': import_log.id
             }
         })
@@ -1187,7 +1177,6 @@ def import_awards():
     try:
         from models import Application, ImportLog
         from app import db
-        from config import AWARD_LEVELS
         import os
         
         if 'file' not in request.files:
@@ -1203,110 +1192,31 @@ def import_awards():
                 'message': '请选择文件'
             }), 400
         
-        if not file.filename.endswith(('.xlsx', '.xls')):
+        if sheet_reader.extension_of(file.filename) not in sheet_reader.SUPPORTED_EXTENSIONS:
             return jsonify({
                 'success': False,
-                'message': '仅支持Excel文件格式'
+                'message': '仅支持Excel（.xlsx/.xls）或CSV文件格式'
             }), 400
+
+        auto_generate = _query_flag('auto_generate')
+        if _query_flag('async'):
+            return _start_import_job_response('award', file, {'auto_generate': auto_generate, 'force': _query_flag('force')})
         
-        # 读取Excel文件
+        # 流式读取、分块提交，导入日志记录检查点
         try:
-            df = pd.read_excel(file)
-        except Exception as e:
+            import_log, report = import_upload('award', file, force=_query_flag('force'))
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': f'Excel文件读取失败: {str(e)}'
+                'message': str(e)
             }), 400
-        
-        # 检查必要的列
-        required_columns = ['参赛号', '获奖等级']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            return jsonify({
-                'success': False,
-                'message': f'Excel文件缺少必要的列: {", ".join(missing_columns)}'
-            }), 400
-        
-        total_count = len(df)
-        success_count = 0
-        failed_count = 0
-        error_data = []
-        updated_application_ids = []
-        
-        # 逐行处理
-        for index, row in df.iterrows():
-            try:
-                match_no = _cell_to_str(row['参赛号'])
-                award_level = _cell_to_str(row['获奖等级'])
-
-                if _is_blank_text(match_no) or _is_blank_text(award_level):
-                    error_data.append({
-                        '行号': index + 2,
-                        '参赛号': match_no,
-                        '获奖等级': award_level,
-                        '错误原因': '参赛号或获奖等级为空'
-                    })
-                    failed_count += 1
-                    continue
-
-                if AWARD_LEVELS and award_level not in AWARD_LEVELS:
-                    error_data.append({
-                        '行号': index + 2,
-                        '参赛号': match_no,
-                        '获奖等级': award_level,
-                        '错误原因': f'获奖等级不合法（允许：{",".join(AWARD_LEVELS)}）'
-                    })
-                    failed_count += 1
-                    continue
-                
-                # 优先使用参赛号匹配
-                application = Application.query.filter(
-                    Application.match_no == match_no
-                ).first()
-                
-                if not application:
-                    error_data.append({
-                        '行号': index + 2,
-                        '参赛号': match_no,
-                        '获奖等级': award_level,
-                        '错误原因': '未找到匹配的参赛号'
-                    })
-                    failed_count += 1
-                    continue
-                
-                # 更新获奖信息
-                application.award_level = award_level
-                success_count += 1
-                updated_application_ids.append(application.id)
-                
-            except Exception as e:
-                error_data.append({
-                    '行号': index + 2,
-                    '参赛号': row.get('参赛号', ''),
-                    '获奖等级': row.get('获奖等级', ''),
-                    '错误原因': f'处理异常: {str(e)}'
-                })
-                failed_count += 1
-        
-        # 提交事务
-        db.session.commit()
-        
-        # 创建导入日志
-        error_log_content = None
-        if error_data:
-            error_log_content = create_error_excel(error_data)
-        
-        import_log = ImportLog(
-            import_type='award',
-            total_count=total_count,
-            success_count=success_count,
-            failed_count=failed_count,
-            error_log_content=error_log_content
-        )
-        db.session.add(import_log)
-        db.session.commit()
+        if report is None:
+            return _skipped_import_response(import_log)
+        total_count = report.total_count
+        success_count = report.success_count
+        failed_count = report.failed_count
+        updated_application_ids = report.updated_ids
 
-        auto_generate = str(request.args.get('auto_generate', '') or '').strip() in ['1', 'true', 'True', 'yes', 'on']
         if auto_generate and updated_application_ids:
             try:
                 from certificate_routes import _start_background_cert_task
@@ -1323,7 +1233,7 @@ def import_awards():
                         'total_count': total_count,
                         'success_count': success_count,
                         'failed_count': failed_count,
-                        'error_log_available': error_log_content is not None,
+                        'error_log_available': import_log.error_log_available,
                         'import_log_id': import_log.id,
                         'task_id': task_id
                     }
@@ -1345,7 +1255,7 @@ def import_awards():
                 'total_count': total_count,
                 'success_count': success_count,
                 'failed_count': failed_count,
-                'error_log_available': error_log_content is not None,
+                'error_log_available': import_log.error_log_available,
                 'import_log_id': import_log.id
             }
         })
@@ -1360,26 +1270,27 @@ def import_awards():
 @admin_bp.route('/api/admin/download-error-log/<int:log_id>', methods=['GET'])
 @require_admin()
 def download_error_log(log_id):
-    """下载错误日志Excel文件"""
+    """下载错误日志Excel文件（逐块读取输出）"""
     try:
         from models import ImportLog
         
         import_log = ImportLog.query.get(log_id)
-        if not import_log or not import_log.error_log_content:
+        artifact = import_artifacts.open_error_log(import_log)
+        if artifact is None:
             return jsonify({
                 'success': False,
                 'message': '错误日志不存在'
             }), 404
         
-        # 解码Base64内容
-        excel_content = base64.b64decode(import_log.error_log_content)
-        
-        # 创建文件响应
-        return send_file(
-            io.BytesIO(excel_content),
+        size, chunks = artifact
+        filename = f'导入错误日志_{import_log.import_type}_{import_log.created_at.strftime("%Y%m%d_%H%M%S")}.xlsx'
+        return Response(
+            stream_with_context(chunks),
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'导入错误日志_{import_log.import_type}_{import_log.created_at.strftime("%Y%m%d_%H%M%S")}.xlsx'
+            headers={
+                'Content-Disposition': import_artifacts.attachment_header(filename),
+                'Content-Length': str(size)
+            }
         )
         
     except Exception as e:
@@ -1423,16 +1334,22 @@ def download_awards_zip(log_id):
 @admin_bp.route('/api/admin/import-logs', methods=['GET'])
 @require_admin()
 def get_import_logs():
-    """获取导入日志列表"""
+    """获取导入日志列表（游标分页，只返回元数据；错误日志通过 download-error-log 下载）"""
     try:
         from models import ImportLog
-        
-        logs = ImportLog.query.order_by(ImportLog.created_at.desc()).all()
-        
-        return jsonify({
-            'success': True,
-            'data': [log.to_dict() for log in logs]
-        })
+        from pagination import cursor_listing
+
+        query = ImportLog.query
+        import_type = str(request.args.get('import_type', '') or '').strip()
+        if import_type:
+            query = query.filter(ImportLog.import_type == import_type)
+
+        try:
+            items, meta = cursor_listing(query, ImportLog, request.args, ('import_logs', import_type))
+        except ValueError:
+            return jsonify({'success': False, 'message': '分页游标无效，请从第一页重新加载'}), 400
+        meta['logs'] = [log.to_dict() for log in items]
+        return jsonify({'success': True, 'data': meta})
         
     except Exception as e:
         return jsonify({
@@ -1440,3 +1357,72 @@ def get_import_logs():
             'message': '获取日志失败',
             'error': str(e)
         }), 500
+
+
+@admin_bp.route('/api/admin/encryption/status', methods=['GET'])
+@require_admin()
+def get_encryption_status():
+    """当前密钥 id、各表待重新加密的行数、最近一次重新加密任务"""
+    try:
+        from app import CURRENT_KEY_ID, cipher_keyring
+        from reencrypt import latest_job, pending_counts
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'key_id': CURRENT_KEY_ID,
+                'known_key_ids': list(cipher_keyring.keys()),
+                'pending': pending_counts(),
+                'latest_job': latest_job()
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': '查询失败', 'error': str(e)}), 500
+
+
+@admin_bp.route('/api/admin/encryption/reencrypt', methods=['POST'])
+@require_admin()
+def start_reencrypt_job():
+    """后台把旧密钥/旧格式的密文重新加密（默认续跑未完成的任务）"""
+    try:
+        from reencrypt import DEFAULT_CHUNK, start_background_job
+
+        data = request.get_json(silent=True) or {}
+        chunk_size = int(data.get('chunk_size') or DEFAULT_CHUNK)
+        chunk_size = max(1, min(chunk_size, 5000))
+        resume = str(data.get('resume', True)).strip().lower() not in ('0', 'false', 'no')
+
+        job_id, started = start_background_job(chunk_size=chunk_size, resume=resume)
+        if not started:
+            return jsonify({'success': False, 'message': '已有重新加密任务在执行', 'data': {'job_id': job_id}}), 409
+        return jsonify({'success': True, 'message': '已开始后台重新加密', 'data': {'job_id': job_id}})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'启动失败: {str(e)}'}), 500
+
+
+@admin_bp.route('/api/admin/encryption/reencrypt/<string:job_id>', methods=['GET'])
+@require_admin()
+def get_reencrypt_job(job_id):
+    try:
+        from reencrypt import read_job
+
+        job = read_job(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': '任务不存在'}), 404
+        return jsonify({'success': True, 'data': job})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
+@admin_bp.route('/api/admin/encryption/reencrypt/<string:job_id>/pause', methods=['POST'])
+@require_admin()
+def pause_reencrypt_job(job_id):
+    """暂停后可再次 POST /api/admin/encryption/reencrypt 从检查点续跑"""
+    try:
+        from reencrypt import pause_job
+
+        if not pause_job(job_id):
+            return jsonify({'success': False, 'message': '任务未在执行'}), 404
+        return jsonify({'success': True, 'message': '已请求暂停，当前分块提交后停止'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'暂停失败: {str(e)}'}), 500
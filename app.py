@@ -40,6 +40,9 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
         'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '10') or 10)
     }
 }
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # sqlite（测试与临时库）不支持连接池参数与 connect_timeout
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
 
 # Initialize extensions
 db = SQLAlchemy(app)
@@ -65,48 +68,57 @@ else:
 
 cipher_suite = Fernet(ENCRYPTION_KEY)
 
+from ciphertext import decrypt_with as _decrypt_with, key_id as _key_id, pack as _pack_ciphertext
+
+CURRENT_KEY_ID = _key_id(ENCRYPTION_KEY)
+# key id -> Fernet；当前密钥在前
+cipher_keyring = {CURRENT_KEY_ID: cipher_suite}
+
 _old_keys_raw = str(os.environ.get('OLD_ENCRYPTION_KEYS', '') or '').strip()
 _old_cipher_suites = []
 if _old_keys_raw:
     for k in [p.strip() for p in _old_keys_raw.split(',') if p.strip()]:
         try:
             _old_cipher_suites.append(Fernet(k.encode('utf-8')))
+            cipher_keyring.setdefault(_key_id(k), _old_cipher_suites[-1])
         except Exception:
             pass
 
+# 写入格式：v1（带 key id，默认）/ fernet（裸 Fernet token，兼容回滚）
+ENCRYPTION_FORMAT = str(os.environ.get('ENCRYPTION_FORMAT', 'v1') or 'v1').strip().lower()
+
 def encrypt_data(data):
     """Encrypt sensitive data"""
     if not data:
         return None
-    return cipher_suite.encrypt(data.encode()).decode()
+    token = cipher_suite.encrypt(data.encode())
+    if ENCRYPTION_FORMAT == 'fernet':
+        return token.decode()
+    return _pack_ciphertext(CURRENT_KEY_ID, token)
 
 def decrypt_data(encrypted_data):
     """Decrypt sensitive data"""
     if not encrypted_data:
         return None
-    try:
-        return cipher_suite.decrypt(encrypted_data.encode()).decode()
-    except Exception:
-        for cs in _old_cipher_suites:
-            try:
-                return cs.decrypt(encrypted_data.encode()).decode()
-            except Exception:
-                continue
-        raise
+    return _decrypt_with(cipher_keyring, CURRENT_KEY_ID, encrypted_data)
 
 def mask_phone(phone):
-    """Mask phone number for display"""
-    if not phone or len(phone) != 11:
+    """Mask phone number for display (never returns the input unchanged)"""
+    if not phone:
         return phone
+    if len(phone) < 11:
+        return "***"
     return phone[:3] + "****" + phone[-4:]
 
 def mask_email(email):
-    """Mask email for display"""
-    if not email or '@' not in email:
+    """Mask email for display (never returns the input unchanged)"""
+    if not email:
         return email
+    if '@' not in email:
+        return "***"
     local, domain = email.split('@', 1)
     if len(local) <= 2:
-        return email
+        return local[:1] + "**@" + domain
     return local[0] + "*" * (len(local) - 2) + local[-1] + "@" + domain
 
 # Import routes
@@ -119,6 +131,14 @@ app.register_blueprint(api_bp)
 app.register_blueprint(admin_bp)
 app.register_blueprint(certificate_bp)
 
+# 可选：按请求统计 SQL 条数（QUERY_COUNT_GUARD=<上限>）
+from query_guard import init_request_query_guard
+init_request_query_guard(app)
+
+# 报名统计汇总表随报名变更增量维护
+from stats_rollup import init_stats_rollup
+init_stats_rollup(db)
+
 
 def _ensure_default_certificate_templates():
     try:
@@ -0,0 +1,202 @@
+"""报名列表导出（流式）。
+
+- 按 EXPORT_BATCH_ROWS 行一批用 yield_per 读取，每批单独解密（批内相同密文只解一次），
+  解密缓存不跨批累积，导出十万行内存也保持平稳；
+- CSV（UTF-8 BOM，Excel 可直接打开）边查边输出，首字节立即返回；
+- Excel 用 openpyxl write-only 模式逐行写入临时文件，写完后分块输出并删除临时文件。
+  xlsx 是 zip 包，要等全部行写完才能生成，做不到边查边输出，大批量导出优先用 CSV。
+"""
+import csv
+import io
+import os
+import tempfile
+
+from import_engine import is_blank_text
+
+
+def _env_int(name, default):
+    try:
+        return int(str(os.environ.get(name, '') or '').strip() or default)
+    except Exception:
+        return default
+
+
+EXPORT_BATCH_ROWS = max(1, _env_int('EXPORT_BATCH_ROWS', 1000))
+EXPORT_FORMATS = ('xlsx', 'csv')
+SHEET_NAME = '报名列表'
+_COPY_BUFSIZE = 256 * 1024
+
+# (表头, to_dict 字段)
+COLUMNS = (
+    ('报名ID', 'id'),
+    ('参赛号', 'match_no'),
+    ('项目大类', 'category'),
+    ('具体任务', 'task'),
+    ('学段', 'education_level'),
+    ('人数', 'participant_count'),
+    ('学校名称', 'school_name'),
+    ('指导老师', 'teacher_name'),
+    ('指导老师手机号', 'teacher_phone'),
+    ('领队', 'leader_name'),
+    ('参赛人手机号', 'participant_phone'),
+    ('参赛人邮箱', 'participant_email'),
+    ('联系人姓名', 'contact_name'),
+    ('联系人手机号', 'contact_phone'),
+    ('联系人邮箱', 'contact_email'),
+    ('获奖等级', 'award_level'),
+    ('状态', 'status'),
+    ('退回原因', 'rejected_reason'),
+    ('创建时间', 'created_at'),
+    ('更新时间', 'updated_at'),
+)
+HEADERS = [h for h, _k in COLUMNS]
+# 筛选参数（与报名列表一致）
+FILTER_KEYS = ('status', 'category', 'education_level', 'school_name', 'school_initial', 'match_no')
+
+
+def filters_from_args(args) -> dict:
+    """从请求参数取筛选条件（去空白，school_initial 转大写，空值不保留）"""
+    filters = {}
+    for key in FILTER_KEYS:
+        val = str(args.get(key, '') or '').strip()
+        if key == 'school_initial':
+            val = val.upper()
+        if val:
+            filters[key] = val
+    return filters
+
+
+def build_query(filters):
+    from models import Application
+
+    filters = filters or {}
+    query = Application.query
+    if filters.get('status'):
+        query = query.filter(Application.status == filters['status'])
+    if filters.get('category'):
+        query = query.filter(Application.category == filters['category'])
+    if filters.get('education_level'):
+        query = query.filter(Application.education_level == filters['education_level'])
+    if filters.get('school_name'):
+        query = query.filter(Application.school_name.like(f"%{filters['school_name']}%"))
+    if filters.get('match_no'):
+        query = query.filter(Application.match_no == filters['match_no'])
+    if filters.get('school_initial'):
+        query = Application.filter_school_initial(query, filters['school_initial'])
+    return query
+
+
+def _row_values(d):
+    if is_blank_text(d.get('match_no')):
+        d['match_no'] = ''
+    return [d.get(k) for _h, k in COLUMNS]
+
+
+def _convert(batch):
+    from bulk_decrypt import decrypt_rows
+
+    plain = decrypt_rows(batch, memo={})
+    return [
+        _row_values(row.to_dict(include_sensitive=True, include_participants=False, decrypted=d))
+        for row, d in zip(batch, plain)
+    ]
+
+
+def iter_batches(query, batch_rows=None):
+    """按批产出导出行（值列表），顺序为创建时间倒序"""
+    from models import Application
+
+    batch_rows = max(1, int(batch_rows or EXPORT_BATCH_ROWS))
+    rows = query.order_by(Application.created_at.desc(), Application.id.desc()).yield_per(batch_rows)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield _convert(batch)
+            batch = []
+    if batch:
+        yield _convert(batch)
+
+
+def _csv_rows(values):
+    return (['' if v is None else v for v in row] for row in values)
+
+
+def iter_csv(query, batch_rows=None):
+    """CSV 字节流：表头先输出，之后每批输出一次"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(HEADERS)
+    yield ('\ufeff' + buf.getvalue()).encode('utf-8')
+    for values in iter_batches(query, batch_rows):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(_csv_rows(values))
+        yield buf.getvalue().encode('utf-8')
+
+
+def write_csv(query, path, batch_rows=None, progress=None):
+    """写出 CSV 文件，返回文件路径；progress(已写行数) 每批回调一次"""
+    count = 0
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for values in iter_batches(query, batch_rows):
+            writer.writerows(_csv_rows(values))
+            count += len(values)
+            if progress:
+                progress(count)
+    return path
+
+
+def write_xlsx(query, path=None, batch_rows=None, progress=None):
+    """写出 Excel 到临时文件，返回文件路径；progress(已写行数) 每批回调一次"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix='export-', suffix='.xlsx')
+        os.close(fd)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    # 表头样式与 pandas.to_excel 一致
+    thin = Side(style='thin')
+    header = []
+    for h in HEADERS:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        cell.alignment = Alignment(horizontal='center', vertical='top')
+        header.append(cell)
+    ws.append(header)
+    count = 0
+    try:
+        for values in iter_batches(query, batch_rows):
+            for row in values:
+                ws.append(row)
+            count += len(values)
+            if progress:
+                progress(count)
+        wb.save(path)
+    except Exception:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def iter_file(path, remove=True):
+    """分块读出文件，读完（或客户端断开）后删除"""
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_COPY_BUFSIZE), b''):
+                yield block
+    finally:
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,77 @@
+"""补齐 applications 的脱敏展示列（*_masked）。
+
+    python backfill_masked_contacts.py          # 只处理脱敏列为空或不含 * 的记录
+    python backfill_masked_contacts.py --all    # 全量重算
+
+脱敏值一定含 *；不含 * 的是旧版脱敏函数对非常规手机号/短邮箱原样返回、以明文落库的值，默认也会重算。
+按 id 分批解密、批量回写，可重复执行；解密失败的记录保持为空（接口展示为 ***）。
+"""
+import argparse
+
+
+def backfill(db, recompute_all=False, batch=500, log=print):
+    from sqlalchemy import and_, bindparam, or_
+    from bulk_decrypt import FAILED, SENSITIVE_FIELDS, decrypt_rows
+    from models import Application, masked_value
+
+    table = Application.__table__
+    masked_cols = [f"{field}_masked" for field, _col in SENSITIVE_FIELDS]
+    missing = or_(*[
+        and_(getattr(Application, f"{field}_masked").is_(None), getattr(Application, col).isnot(None))
+        for field, col in SENSITIVE_FIELDS
+    ], *[
+        ~getattr(Application, f"{field}_masked").contains('*', autoescape=True)
+        for field, _col in SENSITIVE_FIELDS
+    ])
+    last_id = 0
+    scanned = 0
+    updated = 0
+    failed = 0
+    while True:
+        query = Application.query.filter(Application.id > last_id)
+        if not recompute_all:
+            query = query.filter(missing)
+        rows = query.order_by(Application.id.asc()).limit(batch).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        changes = []
+        for row, plain in zip(rows, decrypt_rows(rows)):
+            if any(v is FAILED for v in plain.values()):
+                failed += 1
+                continue
+            values = {name: masked_value(field, plain[field]) for name, (field, _col) in zip(masked_cols, SENSITIVE_FIELDS)}
+            if any(getattr(row, name) != values[name] for name in masked_cols):
+                values['_id'] = row.id
+                changes.append(values)
+        if changes:
+            stmt = table.update().where(table.c.id == bindparam('_id')).values(
+                updated_at=table.c.updated_at,
+                **{name: bindparam(name) for name in masked_cols}
+            )
+            db.session.execute(stmt, changes)
+            updated += len(changes)
+        db.session.commit()
+        db.session.expunge_all()
+        log(f"scanned={scanned} updated={updated} failed={failed} last_id={last_id}")
+    return scanned, updated, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='补齐 applications 的脱敏展示列')
+    parser.add_argument('--all', action='store_true', help='全量重算，而不只是空值')
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    from app import app, db
+
+    with app.app_context():
+        scanned, updated, failed = backfill(db, recompute_all=args.all, batch=max(1, args.batch))
+    print(f"done: scanned={scanned} updated={updated} failed={failed}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
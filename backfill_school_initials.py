@@ -0,0 +1,60 @@
+"""补齐 / 重算 applications.school_initials。
+
+    python backfill_school_initials.py          # 只处理 school_initials 为空的记录
+    python backfill_school_initials.py --all    # 全量重算（例如升级了 pypinyin 词库之后）
+
+按 id 分批读取、批量回写，可重复执行。
+"""
+import argparse
+
+
+def backfill(db, recompute_all=False, batch=1000, log=print):
+    from models import Application, school_initials_of
+
+    table = Application.__table__
+    last_id = 0
+    scanned = 0
+    updated = 0
+    while True:
+        query = db.session.query(Application.id, Application.school_name, Application.school_initials).filter(Application.id > last_id)
+        if not recompute_all:
+            query = query.filter(Application.school_initials.is_(None))
+        rows = query.order_by(Application.id.asc()).limit(batch).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        scanned += len(rows)
+
+        changes = []
+        for row in rows:
+            value = school_initials_of(row.school_name) or None
+            if value != row.school_initials:
+                changes.append({'_id': row.id, '_initials': value})
+        if changes:
+            from sqlalchemy import bindparam
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('_id')).values(school_initials=bindparam('_initials')),
+                changes,
+            )
+            updated += len(changes)
+        db.session.commit()
+        log(f"scanned={scanned} updated={updated} last_id={last_id}")
+    return scanned, updated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='补齐 applications.school_initials')
+    parser.add_argument('--all', action='store_true', help='全量重算，而不只是空值')
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    from app import app, db
+
+    with app.app_context():
+        scanned, updated = backfill(db, recompute_all=args.all, batch=max(1, args.batch))
+    print(f"done: scanned={scanned} updated={updated}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,375 @@
+"""证书渲染基准测试。
+
+用与线上接口相同的模板配置（选手 / 辅导员 / 优秀辅导员）渲染一批合成数据，
+分别在 single / batch / pool 三种模式下统计吞吐、延迟分位数、峰值内存与 PDF 大小，
+结果写成 JSON，便于不同版本之间对比。
+
+用法（使用临时 sqlite 库，启动时会自动写入默认模板）：
+
+    DATABASE_URL=sqlite:////tmp/cert-bench.db python benchmark_certificates.py --count 200
+    python benchmark_certificates.py --modes batch,pool --workers 4 --compare benchmark_results/old.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+MODES = ('single', 'batch', 'pool')
+KINDS = ('player', 'coach', 'excellent_coach')
+
+_SURNAMES = list('王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤')
+_GIVEN = list('子涵浩宇欣怡梓轩雨桐一诺佳琪思远俊杰晨曦明轩若汐嘉怡宇航子墨诗琪博文雅静天佑梦瑶')
+# 生僻字 / 扩展区字符：用来覆盖字体回退与缺字路径
+_RARE = list('堃喆昇玥珺婳燊淼犇垚赟鑫焱䶮龘彧翀曌昱珩璟')
+_COMPOUND_NAMES = ['阿卜杜拉·买买提', '古丽娜扎·艾尼瓦尔', '欧阳娜娜', '司马相如', '迪丽热巴·迪力木拉提']
+
+
+@dataclass
+class _Participant:
+    seq_no: int
+    participant_name: str
+
+
+@dataclass
+class _Application:
+    id: int
+    match_no: str
+    category: str
+    task: str
+    education_level: str
+    award_level: str
+    teacher_name: str
+    contact_name: str
+    school_name: str
+    participant_count: int
+    participants: list = field(default_factory=list)
+
+
+def _random_name(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.05:
+        return rng.choice(_COMPOUND_NAMES)
+    given_len = 1 if roll < 0.35 else 2
+    given = ''.join(rng.choice(_GIVEN) for _ in range(given_len))
+    if rng.random() < 0.15:
+        given = given[:-1] + rng.choice(_RARE)
+    return rng.choice(_SURNAMES) + given
+
+
+def build_applications(count: int, seed: int = 20240501) -> list:
+    """按竞赛规则生成合成报名数据：队伍人数、学段、项目、奖项都取自 config"""
+    from config import COMPETITION_RULES, AWARD_LEVELS
+
+    rng = random.Random(seed)
+    tasks = [(cat, task, rule) for cat, items in COMPETITION_RULES.items() for task, rule in items.items()]
+    apps = []
+    for i in range(count):
+        cat, task, rule = rng.choice(tasks)
+        n = int(rule.get('participant_count', 1) or 1)
+        level = rng.choice(rule.get('allowed_levels') or ['初中'])
+        apps.append(_Application(
+            id=i + 1,
+            match_no=f"B{i + 1:05d}",
+            category=cat,
+            task=task,
+            education_level=level,
+            award_level=rng.choice(AWARD_LEVELS),
+            teacher_name=_random_name(rng),
+            contact_name=_random_name(rng),
+            school_name=f"十堰市第{rng.randint(1, 60)}中学",
+            participant_count=n,
+            participants=[_Participant(seq_no=j + 1, participant_name=_random_name(rng)) for j in range(n)],
+        ))
+    return apps
+
+
+def build_jobs(applications, kinds):
+    """按接口的组装方式生成 (kind, application, template_config) 列表；需要 app 上下文"""
+    import copy
+
+    from models import CertificateTemplate
+    from certificate_generator import CertificateGenerator
+    from certificate_routes import (
+        _pick_template_config,
+        _normalize_application_for_cert,
+        _apply_student_award_level_red,
+        _inject_player_stamps,
+        _apply_coach_layout,
+    )
+
+    generator = CertificateGenerator()
+    base_configs = {}
+
+    def _base(category, award_level, fallback):
+        key = (category, award_level)
+        if key not in base_configs:
+            cfg, err = _pick_template_config(
+                CertificateTemplate,
+                generator,
+                category=category,
+                award_level=award_level,
+                fallback_award_level=fallback
+            )
+            if err:
+                raise RuntimeError(err)
+            base_configs[key] = cfg
+        return copy.deepcopy(base_configs[key])
+
+    jobs = []
+    for src in applications:
+        for kind in kinds:
+            application = copy.deepcopy(src)
+            if kind == 'player':
+                _normalize_application_for_cert(application)
+                cfg = _base(application.category, application.award_level, '一等奖')
+                cfg = _inject_player_stamps(_apply_student_award_level_red(cfg))
+            else:
+                cfg = dict(_base(application.category, f"{application.award_level}-辅导员", '一等奖-辅导员') or {})
+                cfg = _apply_coach_layout(application, cfg)
+            jobs.append((kind, application, cfg))
+    return jobs
+
+
+_worker_generator = None
+
+
+def _init_worker():
+    global _worker_generator
+    from certificate_generator import CertificateGenerator
+    _worker_generator = CertificateGenerator()
+
+
+def _render_chunk(chunk):
+    out = []
+    for kind, application, cfg in chunk:
+        t0 = time.perf_counter()
+        content = _worker_generator.generate_certificate(application, cfg)
+        out.append((kind, (time.perf_counter() - t0) * 1000.0, len(content)))
+    return out
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * (float(pct) / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _peak_rss_mb(include_children=False):
+    # Linux 上 ru_maxrss 单位为 KB，macOS 为字节
+    unit = 1024.0 if sys.platform != 'darwin' else 1024.0 * 1024.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if include_children:
+        peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / unit, 1)
+
+
+def _run_mode(mode, jobs, workers, chunk_size):
+    """在当前进程执行一个模式，返回 [(kind, latency_ms, bytes)], wall_s, stage 汇总"""
+    from certificate_generator import CertificateGenerator, RenderTimingStats
+
+    timing = RenderTimingStats()
+    samples = []
+    t_start = time.perf_counter()
+    if mode == 'single':
+        # 与单张下载接口一致：每张证书新建一个生成器
+        for kind, application, cfg in jobs:
+            t0 = time.perf_counter()
+            content = CertificateGenerator().generate_certificate(application, cfg, timing_hook=timing)
+            samples.append((kind, (time.perf_counter() - t0) * 1000.0, len(content)))
+    elif mode == 'batch':
+        # 与后台批量任务一致：一个生成器顺序渲染全部证书
+        generator = CertificateGenerator()
+        generator.add_timing_hook(timing)
+        for kind, application, cfg in jobs:
+            t0 = time.perf_counter()
+            content = generator.generate_certificate(application, cfg)
+            samples.append((kind, (time.perf_counter() - t0) * 1000.0, len(content)))
+    elif mode == 'pool':
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for part in pool.map(_render_chunk, chunks):
+                samples.extend(part)
+    else:
+        raise ValueError(f"unknown mode: {mode}")
+    wall = time.perf_counter() - t_start
+    return samples, wall, (timing.snapshot() if mode != 'pool' else None)
+
+
+def _mode_entry(mode, jobs, workers, chunk_size, queue):
+    try:
+        samples, wall, stages = _run_mode(mode, jobs, workers, chunk_size)
+        queue.put({'ok': True, 'samples': samples, 'wall': wall, 'stages': stages, 'peak_rss_mb': _peak_rss_mb(include_children=(mode == 'pool'))})
+    except Exception as e:
+        queue.put({'ok': False, 'error': f"{type(e).__name__}: {e}"})
+
+
+def _summarize(mode, kind, samples, wall, peak_rss_mb, stages, workers):
+    latencies = [ms for _k, ms, _b in samples]
+    sizes = [b for _k, _ms, b in samples]
+    n = len(samples)
+    entry = {
+        'mode': mode,
+        'kind': kind,
+        'count': n,
+        'workers': workers if mode == 'pool' else 1,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+            'p50': round(_percentile(latencies, 50), 2),
+            'p95': round(_percentile(latencies, 95), 2),
+            'max': round(max(latencies), 2) if latencies else 0.0,
+        },
+        'bytes_per_pdf': {
+            'mean': int(statistics.fmean(sizes)) if sizes else 0,
+            'min': min(sizes) if sizes else 0,
+            'max': max(sizes) if sizes else 0,
+        },
+        'peak_rss_mb': peak_rss_mb,
+    }
+    if wall is not None:
+        entry['wall_s'] = round(wall, 3)
+        entry['certs_per_sec'] = round(n / wall, 2) if wall > 0 else 0.0
+    if stages is not None:
+        entry['stages'] = stages.get('stages')
+    return entry
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _environment(args):
+    import PIL
+    import reportlab
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'reportlab': getattr(reportlab, 'Version', None),
+        'pillow': getattr(PIL, '__version__', None),
+        'env': {k: os.environ.get(k) for k in ('CERT_PDF_INVARIANT', 'CERT_ASSET_PROFILE', 'CERT_FONT_FALLBACK_CHAIN')},
+        'args': vars(args),
+    }
+
+
+def compare_results(current, previous):
+    """按 (mode, kind) 对比吞吐与 p95，返回文本行"""
+    def _index(doc):
+        return {(r.get('mode'), r.get('kind')): r for r in (doc or {}).get('results', [])}
+
+    old = _index(previous)
+    lines = [f"{'mode':<8}{'kind':<18}{'certs/s':>12}{'Δ':>9}{'p95 ms':>12}{'Δ':>9}"]
+    for key, cur in _index(current).items():
+        prev = old.get(key) or {}
+        cps, p95 = cur.get('certs_per_sec'), cur['latency_ms']['p95']
+        prev_cps, prev_p95 = prev.get('certs_per_sec'), (prev.get('latency_ms') or {}).get('p95')
+        cps_txt = f"{cps:>12.2f}" if cps is not None else f"{'-':>12}"
+        d_cps = f"{(cps / prev_cps - 1.0) * 100.0:>+8.1f}%" if cps and prev_cps else f"{'-':>9}"
+        d_p95 = f"{(p95 / prev_p95 - 1.0) * 100.0:>+8.1f}%" if prev_p95 else f"{'-':>9}"
+        lines.append(f"{key[0]:<8}{key[1]:<18}{cps_txt}{d_cps}{p95:>12.2f}{d_p95}")
+    return lines
+
+
+def _parse_list(raw, allowed, label):
+    items = [x.strip() for x in str(raw or '').split(',') if x.strip()]
+    bad = [x for x in items if x not in allowed]
+    if bad:
+        raise SystemExit(f"unknown {label}: {', '.join(bad)}（可选：{', '.join(allowed)}）")
+    return items
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='证书渲染基准测试')
+    parser.add_argument('--count', type=int, default=100, help='合成报名记录数（每条按 --kinds 各渲染一张）')
+    parser.add_argument('--modes', default=','.join(MODES), help='single,batch,pool')
+    parser.add_argument('--kinds', default=','.join(KINDS), help='player,coach,excellent_coach')
+    parser.add_argument('--workers', type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    parser.add_argument('--chunk-size', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=20240501)
+    parser.add_argument('--profile', default='', help='资源档位 print/mobile/original，默认沿用模板/环境变量')
+    parser.add_argument('--output', default='', help='结果 JSON 路径，默认 benchmark_results/cert_bench_<时间>.json')
+    parser.add_argument('--compare', default='', help='与之前的结果 JSON 对比')
+    args = parser.parse_args(argv)
+
+    modes = _parse_list(args.modes, MODES, 'mode')
+    kinds = _parse_list(args.kinds, KINDS, 'kind')
+
+    from app import app
+
+    applications = build_applications(max(1, args.count), seed=args.seed)
+    with app.app_context():
+        jobs = build_jobs(applications, kinds)
+    if args.profile:
+        for _kind, _application, cfg in jobs:
+            cfg['asset_profile'] = args.profile
+
+    results = []
+    ctx = multiprocessing.get_context('fork') if sys.platform != 'win32' else multiprocessing.get_context()
+    for mode in modes:
+        # 每个模式在独立子进程中运行，峰值内存互不影响
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_mode_entry, args=(mode, jobs, args.workers, max(1, args.chunk_size), queue))
+        proc.start()
+        res = queue.get()
+        proc.join()
+        if not res.get('ok'):
+            print(f"[{mode}] failed: {res.get('error')}", file=sys.stderr)
+            continue
+
+        samples = res['samples']
+        total = _summarize(mode, 'all', samples, res['wall'], res['peak_rss_mb'], res['stages'], args.workers)
+        results.append(total)
+        for kind in kinds:
+            part = [s for s in samples if s[0] == kind]
+            if part:
+                results.append(_summarize(mode, kind, part, None, res['peak_rss_mb'], None, args.workers))
+
+        print(
+            f"[{mode}] {total['count']} certs in {total['wall_s']}s -> {total['certs_per_sec']} certs/s, "
+            f"p50 {total['latency_ms']['p50']} ms, p95 {total['latency_ms']['p95']} ms, "
+            f"peak RSS {total['peak_rss_mb']} MB, avg {total['bytes_per_pdf']['mean']} B/pdf"
+        )
+
+    doc = {'meta': _environment(args), 'results': results}
+
+    output = args.output
+    if not output:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        output = os.path.join(base_dir, 'benchmark_results', f"cert_bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+    print(f"Saved: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        for line in compare_results(doc, previous):
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,221 @@
+"""applications 表热点查询的执行计划对比。
+
+向目标库灌入合成报名数据（默认 20 万行），分别在“旧索引”（迁移前）和
+“迁移后索引”两种状态下对接口里的热点查询取 EXPLAIN 与耗时中位数，结果写成 JSON。
+
+    python benchmark_query_plans.py                      # 默认 sqlite:////tmp/query-plan-bench.db
+    DATABASE_URL=mysql+pymysql://... python benchmark_query_plans.py --rows 200000
+
+注意：会删除/重建 applications 上的索引，只能对测试库使用；结束时恢复为迁移后的状态。
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+
+_MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', 'versions', '3b7e2c41a9d0_hot_lookup_indexes.py')
+
+
+def _load_migration():
+    spec = importlib.util.spec_from_file_location('_hot_lookup_indexes', _MIGRATION)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _phone_hash(i: int) -> str:
+    return hashlib.sha256(f"138{i:08d}".encode()).hexdigest()
+
+
+def populate(db, rows: int, seed: int, batch: int = 5000):
+    from sqlalchemy import func
+    from config import COMPETITION_RULES, AWARD_LEVELS
+    from models import Application
+
+    existing = db.session.query(func.count(Application.id)).scalar() or 0
+    if existing >= rows:
+        return int(existing)
+
+    rng = random.Random(seed)
+    tasks = [(cat, task, rule) for cat, items in COMPETITION_RULES.items() for task, rule in items.items()]
+    start = datetime(2025, 3, 1)
+    table = Application.__table__
+    buf = []
+    for i in range(int(existing), rows):
+        cat, task, rule = rng.choice(tasks)
+        status = rng.choices(['pending', 'approved', 'rejected'], weights=[2, 7, 1])[0]
+        buf.append({
+            'category': cat,
+            'task': task,
+            'education_level': rng.choice(rule['allowed_levels']),
+            'participant_count': int(rule['participant_count']),
+            'school_name': f"第{rng.randint(1, 800)}中学",
+            'teacher_name': f"老师{rng.randint(1, 5000)}",
+            'teacher_phone_hash': _phone_hash(rng.randint(1, 5000)),
+            'contact_name': f"联系人{i}",
+            'contact_phone_encrypted': 'x',
+            'contact_email_encrypted': 'x',
+            'contact_phone_hash': _phone_hash(100000 + rng.randint(1, rows // 2)),
+            'openid': f"openid-{rng.randint(1, rows // 3)}",
+            'match_no': f"M{i:07d}" if status == 'approved' else None,
+            'award_level': rng.choice(AWARD_LEVELS) if status == 'approved' and rng.random() < 0.6 else None,
+            'status': status,
+            'created_at': start + timedelta(seconds=rng.randint(0, 90 * 24 * 3600)),
+            'updated_at': start,
+        })
+        if len(buf) >= batch:
+            db.session.execute(table.insert(), buf)
+            db.session.commit()
+            buf = []
+    if buf:
+        db.session.execute(table.insert(), buf)
+        db.session.commit()
+    return rows
+
+
+def _queries(rows: int):
+    """接口里的热点查询（参数取数据集中存在的值）"""
+    mid = rows // 2
+    return [
+        ('by_match_no', 'get_application_by_match_no / import_match_no',
+         "SELECT id FROM applications WHERE match_no = :m", {'m': f"M{mid:07d}"}),
+        ('my_applications', 'get_my_applications',
+         "SELECT id FROM applications WHERE match_no = :m AND award_level IS NOT NULL ORDER BY created_at DESC", {'m': f"M{mid:07d}"}),
+        ('list_by_status', 'admin_list_applications?status=',
+         "SELECT id FROM applications WHERE status = :s ORDER BY created_at DESC LIMIT 20 OFFSET 200", {'s': 'pending'}),
+        ('list_latest', 'admin_list_applications',
+         "SELECT id FROM applications ORDER BY created_at DESC LIMIT 20", {}),
+        ('filter_category_level', 'admin_list_applications?category=&education_level=',
+         "SELECT id FROM applications WHERE category = :c AND education_level = :e ORDER BY created_at DESC LIMIT 20", {'c': '空中对抗赛', 'e': '初中'}),
+        ('stats_education_level', 'admin_stats_applications?dimension=education_level',
+         "SELECT education_level, COUNT(*) FROM applications GROUP BY education_level", {}),
+        ('coach_lookup', '_find_awarded_application_for_coach',
+         "SELECT id FROM applications WHERE teacher_name = :t AND teacher_phone_hash = :h AND award_level IS NOT NULL ORDER BY created_at DESC LIMIT 1", {'t': '老师42', 'h': _phone_hash(42)}),
+        ('duplicate_check', 'register / phone-exists',
+         "SELECT id FROM applications WHERE contact_phone_hash = :h AND status IN ('pending', 'approved') LIMIT 1", {'h': _phone_hash(100000 + 42)}),
+        ('by_openid', 'wx_login / my records',
+         "SELECT id FROM applications WHERE openid = :o ORDER BY created_at DESC", {'o': 'openid-42'}),
+    ]
+
+
+def _explain(conn, dialect: str, sql: str, params: dict):
+    from sqlalchemy import text
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    rows = conn.execute(text(prefix + sql), params).fetchall()
+    if dialect == 'sqlite':
+        return [str(r[-1]) for r in rows]
+    return [' | '.join('' if v is None else str(v) for v in r) for r in rows]
+
+
+def _time_query(conn, sql: str, params: dict, repeat: int):
+    from sqlalchemy import text
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return round(statistics.median(samples), 3)
+
+
+def _analyze(conn, dialect: str):
+    from sqlalchemy import text
+    if dialect == 'sqlite':
+        conn.execute(text('ANALYZE'))
+    elif dialect == 'mysql':
+        conn.execute(text('ANALYZE TABLE applications'))
+    elif dialect == 'postgresql':
+        conn.execute(text('ANALYZE applications'))
+
+
+def _set_indexes(engine, migration, state: str):
+    """state=legacy：迁移前的单列索引；state=migrated：迁移后的复合索引"""
+    from sqlalchemy import inspect, text
+
+    with engine.begin() as conn:
+        names = {ix.get('name') for ix in inspect(conn).get_indexes(migration.TABLE)}
+        wanted = {}
+        if state == 'legacy':
+            for name, cols in migration.SUPERSEDED:
+                wanted[name] = (cols, False)
+        else:
+            for name, cols, unique in migration.INDEXES:
+                wanted[name] = (cols, unique)
+
+        managed = {n for n, _c, _u in migration.INDEXES} | {n for n, _c in migration.SUPERSEDED}
+        for name in managed & names:
+            if name not in wanted:
+                if engine.dialect.name == 'mysql':
+                    conn.execute(text(f"DROP INDEX {name} ON {migration.TABLE}"))
+                else:
+                    conn.execute(text(f"DROP INDEX {name}"))
+        for name, (cols, unique) in wanted.items():
+            if name not in names:
+                kw = 'UNIQUE INDEX' if unique else 'INDEX'
+                conn.execute(text(f"CREATE {kw} {name} ON {migration.TABLE} ({', '.join(cols)})"))
+        _analyze(conn, engine.dialect.name)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='applications 热点查询执行计划对比')
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=15)
+    parser.add_argument('--seed', type=int, default=20240501)
+    parser.add_argument('--output', default='', help='结果 JSON 路径，默认 benchmark_results/query_plans_<时间>.json')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('DATABASE_URL', 'sqlite:////tmp/query-plan-bench.db')
+
+    from app import app, db
+
+    migration = _load_migration()
+    results = {'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'rows': args.rows, 'repeat': args.repeat}, 'queries': []}
+
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+        results['meta']['dialect'] = dialect
+        t0 = time.perf_counter()
+        results['meta']['row_count'] = populate(db, args.rows, args.seed)
+        results['meta']['populate_s'] = round(time.perf_counter() - t0, 1)
+
+        by_name = {}
+        for state in ('legacy', 'migrated'):
+            _set_indexes(engine, migration, state)
+            with engine.connect() as conn:
+                for name, used_by, sql, params in _queries(args.rows):
+                    entry = by_name.setdefault(name, {'query': name, 'used_by': used_by, 'sql': sql})
+                    entry[state] = {
+                        'plan': _explain(conn, dialect, sql, params),
+                        'median_ms': _time_query(conn, sql, params, args.repeat),
+                    }
+        results['queries'] = list(by_name.values())
+
+    print(f"{'query':<24}{'legacy ms':>12}{'migrated ms':>14}{'speedup':>10}")
+    for q in results['queries']:
+        a, b = q['legacy']['median_ms'], q['migrated']['median_ms']
+        speedup = f"{a / b:.1f}x" if b else '-'
+        print(f"{q['query']:<24}{a:>12.3f}{b:>14.3f}{speedup:>10}")
+        print(f"    legacy:   {'; '.join(q['legacy']['plan'])}")
+        print(f"    migrated: {'; '.join(q['migrated']['plan'])}")
+
+    output = args.output
+    if not output:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        output = os.path.join(base_dir, 'benchmark_results', f"query_plans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Saved: {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
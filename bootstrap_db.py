@@ -39,8 +39,8 @@ def main():
     from app import app, db
     import models  # noqa: F401
 
+    # 表结构由 flask db upgrade 建立（见 docker-entrypoint.sh），这里只写入默认模板
     with app.app_context():
-        db.create_all()
         try:
             _seed_default_templates()
         except Exception:
@@ -0,0 +1,132 @@
+"""敏感字段批量解密。
+
+列表/导出序列化时按列收集密文，去重后一次性解密：
+- 相同密文只解一次，请求内（flask.g）结果复用；
+- 唯一密文数超过阈值时可以分发到线程池或进程池（DECRYPT_POOL=thread|process）。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from flask import g, has_request_context
+
+
+# 属性名 -> 密文列
+SENSITIVE_FIELDS = (
+    ('contact_phone', 'contact_phone_encrypted'),
+    ('contact_email', 'contact_email_encrypted'),
+    ('teacher_phone', 'teacher_phone_encrypted'),
+    ('leader_phone', 'leader_phone_encrypted'),
+    ('participant_phone', 'participant_phone_encrypted'),
+    ('participant_email', 'participant_email_encrypted'),
+)
+
+# 解密失败的占位（与 None 区分：None 表示原本就为空）
+FAILED = object()
+
+
+def _env_int(name, default):
+    try:
+        return int(str(os.environ.get(name, '') or '').strip() or default)
+    except Exception:
+        return default
+
+
+DECRYPT_POOL = str(os.environ.get('DECRYPT_POOL', '') or '').strip().lower()
+DECRYPT_POOL_WORKERS = max(1, _env_int('DECRYPT_POOL_WORKERS', os.cpu_count() or 2))
+# 唯一密文数达到该值才启用线程/进程池，小批量串行反而更快
+DECRYPT_POOL_MIN = max(1, _env_int('DECRYPT_POOL_MIN', 2000))
+_CHUNK = 500
+
+_worker_keyring = None
+
+
+def _keyring():
+    from app import CURRENT_KEY_ID, cipher_keyring
+    return CURRENT_KEY_ID, dict(cipher_keyring)
+
+
+def _decrypt_chunk(tokens, keyring=None):
+    from ciphertext import decrypt_with
+    current_kid, suites = keyring if keyring is not None else _worker_keyring
+    out = []
+    for t in tokens:
+        # 进程池里 FAILED 无法跨进程保持同一对象，失败统一回传 (False, None) 再在主进程标记
+        try:
+            out.append((True, decrypt_with(suites, current_kid, t)))
+        except Exception:
+            out.append((False, None))
+    return out
+
+
+def _init_worker(keyring):
+    global _worker_keyring
+    _worker_keyring = keyring
+
+
+def _request_memo():
+    if not has_request_context():
+        return None
+    memo = getattr(g, '_decrypt_memo', None)
+    if memo is None:
+        memo = g._decrypt_memo = {}
+    return memo
+
+
+def decrypt_many(tokens, pool=None, workers=None, memo=None):
+    """批量解密，返回 {密文: 明文 或 FAILED}；空密文不出现在结果里"""
+    if memo is None:
+        memo = _request_memo()
+    if memo is None:
+        memo = {}
+    result = {}
+    todo = []
+    for t in tokens:
+        if not t or t in result:
+            continue
+        if t in memo:
+            result[t] = memo[t]
+        else:
+            result[t] = None
+            todo.append(t)
+    if not todo:
+        return result
+
+    keyring = _keyring()
+    pool = DECRYPT_POOL if pool is None else str(pool or '').strip().lower()
+    workers = DECRYPT_POOL_WORKERS if workers is None else max(1, int(workers))
+    chunks = [todo[i:i + _CHUNK] for i in range(0, len(todo), _CHUNK)]
+
+    if pool in ('thread', 'process') and len(todo) >= DECRYPT_POOL_MIN and len(chunks) > 1 and workers > 1:
+        if pool == 'process':
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(keyring,))
+            jobs = lambda ex: ex.map(_decrypt_chunk, chunks)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            jobs = lambda ex: ex.map(lambda c: _decrypt_chunk(c, keyring), chunks)
+        with executor as ex:
+            decoded = [item for part in jobs(ex) for item in part]
+    else:
+        decoded = [item for c in chunks for item in _decrypt_chunk(c, keyring)]
+
+    for t, (ok, v) in zip(todo, decoded):
+        value = v if ok else FAILED
+        result[t] = value
+        memo[t] = value
+    return result
+
+
+def decrypt_rows(rows, fields=SENSITIVE_FIELDS, pool=None, memo=None):
+    """按列批量解密一组模型对象，返回与 rows 对齐的 [{属性名: 明文 或 FAILED}, ...]
+
+    memo 不传时复用请求内缓存；流式导出按批传入新的 dict，缓存不随行数增长。
+    """
+    rows = list(rows)
+    tokens = []
+    for row in rows:
+        for _attr, column in fields:
+            tokens.append(getattr(row, column, None))
+    plain = decrypt_many(tokens, pool=pool, memo=memo)
+    out = []
+    for row in rows:
+        out.append({attr: plain.get(getattr(row, column, None)) for attr, column in fields})
+    return out
@@ -0,0 +1,172 @@
+import hashlib
+import io
+import math
+import os
+import threading
+
+from PIL import Image
+
+
+_CERT_BASE_DIR = str(os.environ.get('CERT_STORAGE_DIR', '') or '').strip() or os.path.join('/tmp', 'competition-web-certs')
+_ASSET_CACHE_DIR = os.path.join(_CERT_BASE_DIR, 'asset_cache')
+
+# 资源输出档位：dpi=None 表示不做降采样；'original' 表示完全不预处理（直接用原图）
+ASSET_PROFILES = {
+    'print': {'dpi': 300, 'jpeg_quality': 92},
+    'mobile': {'dpi': 110, 'jpeg_quality': 72},
+    'original': None,
+}
+
+DEFAULT_ASSET_PROFILE = str(os.environ.get('CERT_ASSET_PROFILE', '') or '').strip().lower() or 'print'
+
+_prepared_lock = threading.Lock()
+_prepared = {}
+
+
+def normalize_asset_profile(name) -> str:
+    s = str(name or '').strip().lower()
+    if s in ASSET_PROFILES:
+        return s
+    if DEFAULT_ASSET_PROFILE in ASSET_PROFILES:
+        return DEFAULT_ASSET_PROFILE
+    return 'print'
+
+
+def _ensure_dir(p: str):
+    try:
+        os.makedirs(p, exist_ok=True)
+    except Exception:
+        pass
+
+
+def _source_signature(src_path: str):
+    st = os.stat(src_path)
+    return os.path.abspath(src_path), int(st.st_mtime_ns), int(st.st_size)
+
+
+def _flatten_onto_white(img: Image.Image) -> Image.Image:
+    bg = Image.new('RGB', img.size, (255, 255, 255))
+    bg.paste(img, mask=img.getchannel('A'))
+    return bg
+
+
+def _normalize_mode(img: Image.Image, *, flatten: bool) -> Image.Image:
+    if img.mode == 'P':
+        img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    elif img.mode in ('LA', 'PA'):
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGB')
+
+    if img.mode == 'RGBA':
+        lo, _hi = img.getchannel('A').getextrema()
+        if lo >= 255:
+            # 全不透明的 alpha 没有意义，直接丢弃
+            img = img.convert('RGB')
+        elif flatten:
+            img = _flatten_onto_white(img)
+    return img
+
+
+def _target_size(size, *, dpi, draw_w_pt, draw_h_pt):
+    w, h = size
+    if not dpi or not draw_w_pt or not draw_h_pt:
+        return w, h
+    tw = int(math.ceil(float(draw_w_pt) / 72.0 * float(dpi)))
+    th = int(math.ceil(float(draw_h_pt) / 72.0 * float(dpi)))
+    if tw <= 0 or th <= 0 or (tw >= w and th >= h):
+        return w, h
+    # 保持原图比例，只缩小不放大
+    s = min(float(tw) / float(w), float(th) / float(h))
+    return max(1, int(round(w * s))), max(1, int(round(h * s)))
+
+
+def _encode_smallest(img: Image.Image, *, jpeg_quality: int):
+    """返回 (bytes, ext)：无 alpha 时在 JPEG(DCT) 与 PNG(Flate) 中取较小者"""
+    png_buf = io.BytesIO()
+    img.save(png_buf, format='PNG', optimize=True)
+    best = (png_buf.getvalue(), 'png')
+
+    if img.mode in ('RGB', 'L'):
+        jpg_buf = io.BytesIO()
+        img.save(jpg_buf, format='JPEG', quality=int(jpeg_quality), optimize=True)
+        if len(jpg_buf.getvalue()) < len(best[0]):
+            best = (jpg_buf.getvalue(), 'jpg')
+    return best
+
+
+def prepare_image(src_path: str, *, profile=None, draw_w_pt=None, draw_h_pt=None, flatten=False) -> str:
+    """按档位预处理图片（去 alpha / 降采样 / 选更小编码），返回可直接 drawImage 的文件路径。
+
+    结果按源文件 mtime+size 缓存；模板或盖章文件变更后会自动重新生成。
+    任何异常都回退为原图路径。
+    """
+    if not src_path or not os.path.exists(src_path):
+        return src_path
+
+    profile = normalize_asset_profile(profile)
+    spec = ASSET_PROFILES.get(profile)
+    if not spec:
+        return src_path
+
+    try:
+        abs_path, mtime_ns, size = _source_signature(src_path)
+        draw_w = round(float(draw_w_pt), 2) if draw_w_pt else 0.0
+        draw_h = round(float(draw_h_pt), 2) if draw_h_pt else 0.0
+        memo_key = (abs_path, mtime_ns, size, profile, draw_w, draw_h, bool(flatten))
+
+        with _prepared_lock:
+            hit = _prepared.get(memo_key)
+        if hit and os.path.exists(hit):
+            return hit
+
+        digest = hashlib.sha1(repr(memo_key).encode('utf-8')).hexdigest()
+        folder = os.path.join(_ASSET_CACHE_DIR, profile)
+        for ext in ('jpg', 'png'):
+            fp = os.path.join(folder, f"{digest}.{ext}")
+            if os.path.exists(fp):
+                with _prepared_lock:
+                    _prepared[memo_key] = fp
+                return fp
+
+        with Image.open(abs_path) as src:
+            src.load()
+            img = _normalize_mode(src, flatten=bool(flatten))
+        tw, th = _target_size(img.size, dpi=spec.get('dpi'), draw_w_pt=draw_w, draw_h_pt=draw_h)
+        if (tw, th) != img.size:
+            img = img.resize((tw, th), Image.LANCZOS)
+
+        content, ext = _encode_smallest(img, jpeg_quality=int(spec.get('jpeg_quality', 90) or 90))
+        if len(content) >= size and ext == abs_path.rsplit('.', 1)[-1].lower() and (tw, th) == src.size:
+            # 没有任何收益时直接用原图
+            out_path = abs_path
+        else:
+            _ensure_dir(folder)
+            out_path = os.path.join(folder, f"{digest}.{ext}")
+            tmp = f"{out_path}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, out_path)
+
+        with _prepared_lock:
+            _prepared[memo_key] = out_path
+        return out_path
+    except Exception:
+        return src_path
+
+
+def purge_asset_cache(src_path: str):
+    """源图片被替换时清理其预处理结果（盖章上传等场景）"""
+    try:
+        abs_path = os.path.abspath(src_path)
+    except Exception:
+        return
+    with _prepared_lock:
+        stale = [k for k in _prepared if k[0] == abs_path]
+        paths = [_prepared.pop(k) for k in stale]
+    for fp in paths:
+        try:
+            if fp and fp != abs_path and os.path.exists(fp):
+                os.remove(fp)
+        except Exception:
+            pass
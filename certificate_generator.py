@@ -7,15 +7,205 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from reportlab.lib.units import mm
 from reportlab.lib.utils import ImageReader
+import hashlib
 import io
 import json
 import math
 import os
+import threading
+import time
+
+from certificate_assets import normalize_asset_profile, prepare_image
+from certificate_raster import RasterCanvas
+
+
+_DEFAULT_FONT_FALLBACK_CHAIN = ['SimHei', 'SimSun', 'STSong-Light']
+
+# 确定性输出：固定创建时间/文档 ID/元数据，相同输入得到逐字节相同的 PDF（CERT_PDF_INVARIANT=0 可关闭）
+PDF_INVARIANT = str(os.environ.get('CERT_PDF_INVARIANT', '1') or '').strip().lower() not in ('0', 'false', 'no', 'off')
+_PDF_METADATA = {
+    'creator': 'competition-web certificate generator',
+    'author': '十堰市科技教育学会',
+    'title': '获奖证书',
+}
+
+# 字体覆盖码位缓存：(字体名, 字体文件, mtime) -> frozenset；None 表示无法枚举（视为全覆盖）
+_FONT_COVERAGE_CACHE = {}
+
+
+def _font_coverage(font_name):
+    font = pdfmetrics.getFont(font_name)
+    face = getattr(font, 'face', None)
+    filename = getattr(face, 'filename', None) if getattr(font, '_dynamicFont', False) else None
+    try:
+        mtime = os.path.getmtime(filename) if filename else None
+    except Exception:
+        mtime = None
+    key = (font_name, filename, mtime)
+    if key in _FONT_COVERAGE_CACHE:
+        return _FONT_COVERAGE_CACHE[key]
+
+    coverage = None
+    if getattr(font, '_dynamicFont', False):
+        # TrueType：直接取 cmap
+        coverage = frozenset(getattr(face, 'charToGlyph', {}) or {})
+    elif not getattr(font, '_multiByte', False):
+        # 标准 Type1 字体：WinAnsi 编码范围
+        cps = set()
+        for b in range(0x20, 0x100):
+            try:
+                cps.add(ord(bytes([b]).decode('cp1252')))
+            except Exception:
+                continue
+        coverage = frozenset(cps)
+    _FONT_COVERAGE_CACHE[key] = coverage
+    return coverage
+
+
+# 渲染分段计时：默认关闭；CERT_RENDER_TIMING=1 时汇总到 RENDER_METRICS（调用方也可自行挂 hook）
+RENDER_TIMING_ENABLED = str(os.environ.get('CERT_RENDER_TIMING', '') or '').strip().lower() in ('1', 'true', 'yes', 'on')
+RENDER_STAGES = ('fonts', 'setup', 'background', 'stamps', 'text', 'save')
+
+
+class _RenderTimer:
+    """记录 generate_certificate 各阶段耗时（ms），结束时把结果交给 hooks"""
+
+    def __init__(self, hooks):
+        self.hooks = hooks
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def add(self, stage, ms):
+        self.stages[stage] = self.stages.get(stage, 0.0) + float(ms)
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.add(stage, (now - self._last) * 1000.0)
+        self._last = now
+
+    def finish(self, byte_size, **extra):
+        stats = {
+            'stages': {k: round(v, 3) for k, v in self.stages.items()},
+            'total_ms': round((time.perf_counter() - self.started) * 1000.0, 3),
+            'bytes': int(byte_size or 0),
+        }
+        stats.update(extra)
+        for hook in self.hooks:
+            try:
+                hook(stats)
+            except Exception:
+                pass
+
+
+class _NullRenderTimer:
+    def add(self, stage, ms):
+        pass
+
+    def mark(self, stage):
+        pass
+
+    def finish(self, byte_size, **extra):
+        pass
+
+
+_NULL_RENDER_TIMER = _NullRenderTimer()
+
+
+class RenderTimingStats:
+    """线程安全的渲染计时汇总，可直接作为 timing hook 使用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.bytes_total = 0
+            self.total_ms = 0.0
+            self.max_total_ms = 0.0
+            self.stages = {}
+
+    def __call__(self, stats):
+        self.add(stats)
+
+    def add(self, stats):
+        with self._lock:
+            self.count += 1
+            self.bytes_total += int(stats.get('bytes', 0) or 0)
+            total = float(stats.get('total_ms', 0.0) or 0.0)
+            self.total_ms += total
+            self.max_total_ms = max(self.max_total_ms, total)
+            for stage, ms in (stats.get('stages') or {}).items():
+                agg = self.stages.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+                agg['count'] += 1
+                agg['total_ms'] += float(ms)
+                agg['max_ms'] = max(agg['max_ms'], float(ms))
+
+    def snapshot(self):
+        with self._lock:
+            count = self.count
+            return {
+                'count': count,
+                'bytes_total': self.bytes_total,
+                'avg_bytes': int(self.bytes_total / count) if count else 0,
+                'avg_total_ms': round(self.total_ms / count, 3) if count else 0.0,
+                'max_total_ms': round(self.max_total_ms, 3),
+                'stages': {
+                    stage: {
+                        'count': agg['count'],
+                        'avg_ms': round(agg['total_ms'] / agg['count'], 3) if agg['count'] else 0.0,
+                        'max_ms': round(agg['max_ms'], 3),
+                        'total_ms': round(agg['total_ms'], 3),
+                    }
+                    for stage, agg in sorted(self.stages.items(), key=lambda kv: RENDER_STAGES.index(kv[0]) if kv[0] in RENDER_STAGES else len(RENDER_STAGES))
+                },
+            }
+
+
+RENDER_METRICS = RenderTimingStats()
+
+
+def pdf_content_hash(content: bytes) -> str:
+    """证书内容指纹（SHA-256 十六进制），用于缓存校验、ETag 与去重存储"""
+    return hashlib.sha256(content or b'').hexdigest()
+
 
 class CertificateGenerator:
     def __init__(self):
         self.page_width, self.page_height = A4
+        self.timing_hooks = []
+        t0 = time.perf_counter()
         self.register_fonts()
+        # 字体注册耗时只计入该生成器的第一次渲染
+        self._pending_font_ms = (time.perf_counter() - t0) * 1000.0
+
+    def add_timing_hook(self, hook):
+        """注册渲染计时回调：hook(stats)，stats = {'stages': {阶段: ms}, 'total_ms', 'bytes', 'raster'}"""
+        if hook is not None and hook not in self.timing_hooks:
+            self.timing_hooks.append(hook)
+
+    def remove_timing_hook(self, hook):
+        try:
+            self.timing_hooks.remove(hook)
+        except ValueError:
+            pass
+
+    def _start_render_timer(self, timing_hook=None):
+        hooks = list(self.timing_hooks)
+        if RENDER_TIMING_ENABLED:
+            hooks.append(RENDER_METRICS)
+        if timing_hook is not None:
+            hooks.append(timing_hook)
+        if not hooks:
+            return _NULL_RENDER_TIMER
+        timer = _RenderTimer(hooks)
+        font_ms = getattr(self, '_pending_font_ms', 0.0)
+        if font_ms:
+            timer.add('fonts', font_ms)
+            self._pending_font_ms = 0.0
+        return timer
     
     def register_fonts(self):
         """注册中文字体"""
@@ -66,6 +256,17 @@ class CertificateGenerator:
         self.font_name = 'SimHei' if 'SimHei' in self.registered_fonts else 'Helvetica'
         self.cjk_fallback_font = 'STSong-Light' if 'STSong-Light' in self.registered_fonts else self.font_name
 
+        self.glyph_coverage = {}
+        for name in self.registered_fonts:
+            try:
+                self.glyph_coverage[name] = _font_coverage(name)
+            except Exception:
+                self.glyph_coverage[name] = None
+
+        chain_raw = str(os.environ.get('CERT_FONT_FALLBACK_CHAIN', '') or '').strip()
+        chain = [p.strip() for p in chain_raw.split(',') if p.strip()] if chain_raw else list(_DEFAULT_FONT_FALLBACK_CHAIN)
+        self.font_fallback_chain = [self.font_aliases.get(f, f) for f in chain]
+
     def resolve_font_name(self, font_name):
         if not font_name:
             return self.font_name
@@ -76,6 +277,96 @@ class CertificateGenerator:
             return self.cjk_fallback_font
         return self.font_name
 
+    def font_chain(self, primary):
+        chain = getattr(self, '_current_font_fallback', None) or self.font_fallback_chain
+        fonts = [primary]
+        for f in chain:
+            f = self.font_aliases.get(f, f)
+            if f in self.registered_fonts and f not in fonts:
+                fonts.append(f)
+        return fonts
+
+    def covers_char(self, font_name, ch) -> bool:
+        cov = self.glyph_coverage.get(font_name)
+        return True if cov is None else (ord(ch) in cov)
+
+    def split_font_runs(self, text, primary):
+        """按字形覆盖把文本拆成 [(字体, 片段)]，缺字的字符沿回退链找第一个能显示的字体"""
+        text = str(text or '')
+        if not text:
+            return []
+        cov = self.glyph_coverage.get(primary)
+        if cov is None or all(ord(ch) in cov for ch in text):
+            return [(primary, text)]
+
+        chain = self.font_chain(primary)
+        runs = []
+        for ch in text:
+            font = primary
+            for f in chain:
+                if self.covers_char(f, ch):
+                    font = f
+                    break
+            if runs and runs[-1][0] == font:
+                runs[-1][1].append(ch)
+            else:
+                runs.append((font, [ch]))
+        return [(f, ''.join(chars)) for f, chars in runs]
+
+    def text_width(self, text, font_name, font_size, char_space=0.0) -> float:
+        text = str(text or '')
+        w = 0.0
+        for f, seg in self.split_font_runs(text, font_name):
+            w += float(pdfmetrics.stringWidth(seg, f, font_size))
+        n = len(text)
+        if n > 1 and char_space:
+            w += float(char_space) * float(n - 1)
+        return w
+
+    def draw_string_runs(self, canvas_obj, x, y, text, font_name, font_size, char_space=0.0):
+        """按字体分段输出一行文字；只有一段且没有字间距时就是 drawString，否则用文本对象（字间距用 Tc）"""
+        runs = self.split_font_runs(text, font_name)
+        if len(runs) <= 1 and not char_space:
+            if not runs or runs[0][0] == font_name:
+                canvas_obj.drawString(x, y, text)
+                return
+            # 整行都要回退字体：切过去画完再恢复主字体
+            canvas_obj.setFont(runs[0][0], font_size)
+            canvas_obj.drawString(x, y, runs[0][1])
+            canvas_obj.setFont(font_name, font_size)
+            return
+        if getattr(canvas_obj, 'is_raster', False):
+            # 位图画布没有 Tc，字间距逐字累加
+            cur_x = float(x)
+            for f, seg in runs:
+                canvas_obj.setFont(f, font_size)
+                if not char_space:
+                    canvas_obj.drawString(cur_x, y, seg)
+                    cur_x += float(pdfmetrics.stringWidth(seg, f, font_size))
+                    continue
+                for ch in seg:
+                    canvas_obj.drawString(cur_x, y, ch)
+                    cur_x += float(pdfmetrics.stringWidth(ch, f, font_size)) + float(char_space)
+            canvas_obj.setFont(font_name, font_size)
+            return
+        text_obj = canvas_obj.beginText(float(x), float(y))
+        if char_space:
+            text_obj.setCharSpace(char_space)
+        for f, seg in runs:
+            text_obj.setFont(f, font_size)
+            text_obj.textOut(seg)
+        if char_space:
+            text_obj.setCharSpace(0)
+        canvas_obj.drawText(text_obj)
+        canvas_obj.setFont(font_name, font_size)
+
+    def prepare_asset(self, path, profile, draw_w_pt=None, draw_h_pt=None, flatten=False):
+        """按资源档位返回预处理后的图片路径（失败时回退原图）"""
+        try:
+            return prepare_image(path, profile=profile, draw_w_pt=draw_w_pt, draw_h_pt=draw_h_pt, flatten=flatten)
+        except Exception:
+            return path
+
     def px_to_pt(self, px):
         try:
             return float(px) * 0.75
@@ -262,23 +553,10 @@ class CertificateGenerator:
         canvas_obj.setFont(font_name, font_size)
 
         def _get_char_space_pt() -> float:
-            try:
-                # reportlab stores this on canvas as a private attr
-                for k in ('_charSpace', 'charSpace'):
-                    v = getattr(canvas_obj, k, None)
-                    if v is not None:
-                        return float(v)
-            except Exception:
-                pass
-            return 0.0
+            return self.current_char_space()
 
         def _effective_text_width(t: str) -> float:
-            base = float(canvas_obj.stringWidth(t, font_name, font_size))
-            cs = _get_char_space_pt()
-            n = len(t) if isinstance(t, str) else 0
-            if n <= 1 or cs == 0:
-                return base
-            return base + cs * float(n - 1)
+            return self.text_width(t, font_name, font_size, char_space=_get_char_space_pt())
 
         def _draw_text_with_glyph_dx(*, t: str, x0: float, y0: float, box_w: float, a: str, glyph_dx_pt: dict):
             cs = _get_char_space_pt()
@@ -286,10 +564,14 @@ class CertificateGenerator:
             if not chars:
                 return
 
+            fonts = []
+            for run_font, seg in self.split_font_runs(t, font_name):
+                fonts.extend([run_font] * len(seg))
+
             # base (unshifted) text width includes char spacing
             base_w = 0.0
             for idx, ch in enumerate(chars):
-                base_w += float(canvas_obj.stringWidth(ch, font_name, font_size))
+                base_w += float(pdfmetrics.stringWidth(ch, fonts[idx], font_size))
                 if idx < len(chars) - 1:
                     base_w += cs
 
@@ -300,13 +582,26 @@ class CertificateGenerator:
             else:
                 start_shift = (float(box_w) - float(base_w)) / 2.0
 
-            adv = 0.0
-            for idx, ch in enumerate(chars):
-                dx = float(glyph_dx_pt.get(ch, 0.0) or 0.0)
-                canvas_obj.drawString(float(x0) + float(start_shift) + float(adv) + float(dx), float(y0), ch)
-                adv += float(canvas_obj.stringWidth(ch, font_name, font_size))
-                if idx < len(chars) - 1:
-                    adv += cs
+            dxs = [float(glyph_dx_pt.get(ch, 0.0) or 0.0) for ch in chars]
+
+            if getattr(canvas_obj, 'is_raster', False):
+                adv = 0.0
+                for idx, ch in enumerate(chars):
+                    canvas_obj.setFont(fonts[idx], font_size)
+                    canvas_obj.drawString(float(x0) + float(start_shift) + adv + dxs[idx], float(y0), ch)
+                    adv += float(pdfmetrics.stringWidth(ch, fonts[idx], font_size)) + cs
+                canvas_obj.setFont(font_name, font_size)
+                return
+
+            # 单个 BT/ET 文本对象：字间距用 Tc，逐字偏移用 Td 定位（偏移相同的相邻字合成一段）
+            text_obj = canvas_obj.beginText(float(x0) + float(start_shift), float(y0))
+            if cs:
+                text_obj.setCharSpace(cs)
+            self._emit_glyph_run(text_obj, chars, dxs, fonts, font_name, font_size, char_space=cs)
+            if cs:
+                # Tc 属于图形状态，ET 之后仍然生效，需要复位
+                text_obj.setCharSpace(0)
+            canvas_obj.drawText(text_obj)
 
         glyph_dx = getattr(self, '_current_glyph_dx', None)
         if isinstance(glyph_dx, dict) and glyph_dx:
@@ -321,16 +616,53 @@ class CertificateGenerator:
             return
 
         if align == 'left':
-            canvas_obj.drawString(x, y, text)
+            self.draw_string_runs(canvas_obj, x, y, text, font_name, font_size, char_space=_get_char_space_pt())
             return
         if align == 'right':
             text_width = _effective_text_width(text)
-            canvas_obj.drawString(x + width - text_width, y, text)
+            self.draw_string_runs(canvas_obj, x + width - text_width, y, text, font_name, font_size, char_space=_get_char_space_pt())
             return
 
         text_width = _effective_text_width(text)
         centered_x = x + (width - text_width) / 2
-        canvas_obj.drawString(centered_x, y, text)
+        self.draw_string_runs(canvas_obj, centered_x, y, text, font_name, font_size, char_space=_get_char_space_pt())
+
+    def current_char_space(self) -> float:
+        """当前文字项的字间距（pt），由模板 texts 项的 char_space 设置"""
+        try:
+            return float(getattr(self, '_current_char_space', 0.0) or 0.0)
+        except Exception:
+            return 0.0
+
+    def _emit_glyph_run(self, text_obj, chars, dxs, fonts, font_name, font_size, char_space=0.0):
+        """逐字偏移写入 text_obj：dxs[i] 为第 i 个字相对自然位置的偏移（pt），fonts[i] 为它的字体。
+
+        字体、偏移都相同的相邻字合成一段 textOut；偏移变化时用 moveCursor（Td，相对行首）定位下一段，
+        只换字体时接着上一段输出。不拼 TJ 调整量数组：那需要 reportlab 内部的字体编码接口，
+        这里只用 PDFTextObject 的公开方法。字间距由调用方先 setCharSpace。
+        """
+        line_x = 0.0
+        advance = 0.0
+        current = font_name
+        i, n = 0, len(chars)
+        while i < n:
+            j = i + 1
+            while j < n and fonts[j] == fonts[i] and dxs[j] == dxs[i]:
+                j += 1
+            if fonts[i] != current:
+                text_obj.setFont(fonts[i], font_size)
+                current = fonts[i]
+            if dxs[i] != (dxs[i - 1] if i else 0.0):
+                target = advance + dxs[i]
+                text_obj.moveCursor(target - line_x, 0)
+                line_x = target
+            text_obj.textOut(''.join(chars[i:j]))
+            for k in range(i, j):
+                advance += float(pdfmetrics.stringWidth(chars[k], fonts[k], font_size)) + char_space
+            i = j
+        if current != font_name:
+            # 回退字体改写了 Tf，恢复原字体，保证后续输出一致
+            text_obj.setFont(font_name, font_size)
 
     def draw_wrapped_text(self, canvas_obj, text, x, y, width, font_name=None, font_size=12, align='left', line_height=None, max_lines=None, direction='up'):
         if text is None:
@@ -344,22 +676,10 @@ class CertificateGenerator:
         canvas_obj.setFont(font_name, font_size)
 
         def _get_char_space_pt() -> float:
-            try:
-                for k in ('_charSpace', 'charSpace'):
-                    v = getattr(canvas_obj, k, None)
-                    if v is not None:
-                        return float(v)
-            except Exception:
-                pass
-            return 0.0
+            return self.current_char_space()
 
         def _effective_text_width(t: str) -> float:
-            base = float(canvas_obj.stringWidth(t, font_name, font_size))
-            cs = _get_char_space_pt()
-            n = len(t) if isinstance(t, str) else 0
-            if n <= 1 or cs == 0:
-                return base
-            return base + cs * float(n - 1)
+            return self.text_width(t, font_name, font_size, char_space=_get_char_space_pt())
 
         tokens, joiner = self._split_wrap_tokens(text)
         if not tokens:
@@ -416,11 +736,8 @@ class CertificateGenerator:
         max_font_size = int(max_font_size)
         min_font_size = int(min_font_size)
         for font_size in range(max_font_size, min_font_size - 1, -1):
-            # 设置字体并计算文字宽度
-            canvas_obj = canvas.Canvas(io.BytesIO(), pagesize=A4)
-            canvas_obj.setFont(font_name, font_size)
-            text_width = canvas_obj.stringWidth(text, font_name, font_size)
-            canvas_obj.save()
+            # 计算文字宽度（含缺字回退字体）
+            text_width = self.text_width(text, font_name, font_size)
             
             # 如果文字宽度不超过最大宽度，返回当前字号
             if text_width <= max_width:
@@ -445,22 +762,25 @@ class CertificateGenerator:
         canvas_obj.setFont(font_name, font_size)
         
         # 计算文字宽度
-        text_width = canvas_obj.stringWidth(text, font_name, font_size)
+        text_width = self.text_width(text, font_name, font_size)
         
         # 计算居中位置
         centered_x = x + (width - text_width) / 2
         
         # 绘制文字
-        canvas_obj.drawString(centered_x, y, text)
+        self.draw_string_runs(canvas_obj, centered_x, y, text, font_name, font_size)
 
-    def generate_certificate(self, application, template_config):
+    def generate_certificate(self, application, template_config, timing_hook=None):
         """
         生成证书PDF
         :param application: Application对象
         :param template_config: 证书模板配置（字典格式）
+        :param timing_hook: 可选，渲染结束后以分段耗时 stats 调用一次（见 add_timing_hook）
         """
+        timer = self._start_render_timer(timing_hook)
         # 创建PDF文件
         buffer = io.BytesIO()
+        asset_profile = normalize_asset_profile(template_config.get('asset_profile'))
 
         # Optional: use background PNG native size as PDF pagesize to avoid distortion.
         page_size = A4
@@ -478,15 +798,28 @@ class CertificateGenerator:
                 except Exception:
                     page_size = A4
 
-        canvas_obj = canvas.Canvas(buffer, pagesize=page_size)
+        raster = getattr(self, '_raster_options', None)
+        if raster:
+            canvas_obj = RasterCanvas(buffer, page_size, dpi=raster.get('dpi', 48), fmt=raster.get('fmt', 'png'))
+        else:
+            canvas_obj = self._new_pdf_canvas(buffer, page_size)
         old_page_w, old_page_h = self.page_width, self.page_height
+        old_font_fallback = getattr(self, '_current_font_fallback', None)
         try:
             self.page_width, self.page_height = page_size
+            font_fallback = template_config.get('font_fallback')
+            self._current_font_fallback = [str(f) for f in font_fallback] if isinstance(font_fallback, (list, tuple)) and font_fallback else None
+            timer.mark('setup')
 
             # 绘制背景图（可选）
             if bg_path and os.path.exists(bg_path):
                 try:
                     img = ImageReader(bg_path)
+
+                    def _bg_reader(draw_w, draw_h):
+                        # 背景位于最底层，可以安全地把 alpha 合成到白底上
+                        return ImageReader(self.prepare_asset(bg_path, asset_profile, draw_w, draw_h, flatten=True))
+
                     # IMPORTANT: avoid distorting landscape background images into portrait pages.
                     # Default behavior is to keep aspect ratio (contain) and center the image.
                     fit = str(template_config.get('background_fit', 'contain') or 'contain').lower()
@@ -508,14 +841,15 @@ class CertificateGenerator:
                             draw_h = float(ih_pt) * float(scale)
                             x = (float(self.page_width) - draw_w) / 2.0
                             y = (float(self.page_height) - draw_h) / 2.0
-                            canvas_obj.drawImage(img, x, y, width=draw_w, height=draw_h, mask='auto')
+                            canvas_obj.drawImage(_bg_reader(draw_w, draw_h), x, y, width=draw_w, height=draw_h, mask='auto')
                         else:
-                            canvas_obj.drawImage(img, 0, 0, width=self.page_width, height=self.page_height, mask='auto')
+                            canvas_obj.drawImage(_bg_reader(self.page_width, self.page_height), 0, 0, width=self.page_width, height=self.page_height, mask='auto')
                     else:
                         # stretch (legacy behavior)
-                        canvas_obj.drawImage(img, 0, 0, width=self.page_width, height=self.page_height, mask='auto')
+                        canvas_obj.drawImage(_bg_reader(self.page_width, self.page_height), 0, 0, width=self.page_width, height=self.page_height, mask='auto')
                 except Exception:
                     pass
+            timer.mark('background')
 
             # Optional stamp overlay
             try:
@@ -585,6 +919,7 @@ class CertificateGenerator:
 
                         draw_x = float(x) + (float(w_pt) - float(draw_w_pt)) / 2.0
                         sy = box_bottom + (float(h_pt) - float(draw_h_pt)) / 2.0
+                        stamp_img = ImageReader(self.prepare_asset(stamp_path, asset_profile, draw_w_pt, draw_h_pt))
                         canvas_obj.drawImage(stamp_img, float(draw_x), float(sy), width=float(draw_w_pt), height=float(draw_h_pt), mask='auto')
                         return
 
@@ -592,6 +927,7 @@ class CertificateGenerator:
                     if y_anchor == 'center':
                         sy = sy - float(h_pt) / 2.0
 
+                    stamp_img = ImageReader(self.prepare_asset(stamp_path, asset_profile, w_pt, h_pt))
                     canvas_obj.drawImage(stamp_img, float(x), float(sy), width=float(w_pt), height=float(h_pt), mask='auto')
 
                 # 1) New: stamp_repeat (centered symmetric)
@@ -727,6 +1063,7 @@ class CertificateGenerator:
                     _draw_one_stamp(path=stamp_image, x=sx, y=sy, width_pt=sw_pt, height_pt=sh_pt, y_anchor=sy_anchor, keep_aspect=keep_aspect)
             except Exception:
                 pass
+            timer.mark('stamps')
 
             debug_grid = template_config.get('debug_grid')
             if debug_grid:
@@ -784,6 +1121,7 @@ class CertificateGenerator:
                     return float(v) * mm
 
                 debug_points = template_config.get('debug_points')
+                apply_char_space = bool(template_config.get('apply_char_space'))
                 for item in template_config.get('texts', []):
                     try:
                         # Optional: per-item color override.
@@ -842,17 +1180,19 @@ class CertificateGenerator:
                         font = item.get('font')
 
                         # Optional: character spacing (tracking). Unit follows coord_unit.
-                        _char_space_set = False
+                        # Canvas 没有 setCharSpace，texts 项的 char_space 过去一直没有生效；
+                        # 为保持已出证书的版式不变，只有模板设置 apply_char_space 时才读取，
+                        # 记在生成器上，由 draw_text 用文本对象的 setCharSpace（Tc）输出
+                        self._current_char_space = 0.0
                         try:
-                            if 'char_space' in item and item.get('char_space') is not None:
+                            if apply_char_space and item.get('char_space') is not None:
                                 cs_raw = float(item.get('char_space') or 0)
                                 if coord_unit == 'px':
-                                    canvas_obj.setCharSpace(float(self.px_to_pt(cs_raw)))
+                                    self._current_char_space = float(self.px_to_pt(cs_raw))
                                 else:
-                                    canvas_obj.setCharSpace(float(cs_raw) * mm)
-                                _char_space_set = True
+                                    self._current_char_space = float(cs_raw) * mm
                         except Exception:
-                            _char_space_set = False
+                            self._current_char_space = 0.0
 
                         # Optional: per-glyph dx mapping (unit follows coord_unit)
                         _glyph_dx_prev = getattr(self, '_current_glyph_dx', None)
@@ -917,11 +1257,7 @@ class CertificateGenerator:
                         except Exception:
                             pass
 
-                        if _char_space_set:
-                            try:
-                                canvas_obj.setCharSpace(0)
-                            except Exception:
-                                pass
+                        self._current_char_space = 0.0
 
                         try:
                             setattr(self, '_current_glyph_dx', _glyph_dx_prev)
@@ -929,6 +1265,7 @@ class CertificateGenerator:
                             pass
                     except Exception:
                         continue
+                self._current_char_space = 0.0
 
                 debug_grid_overlay = template_config.get('debug_grid_overlay')
                 if debug_grid_overlay:
@@ -940,9 +1277,12 @@ class CertificateGenerator:
                     except Exception:
                         pass
 
+                timer.mark('text')
                 canvas_obj.save()
-                buffer.seek(0)
-                return buffer.getvalue()
+                timer.mark('save')
+                content = buffer.getvalue()
+                timer.finish(len(content), raster=bool(raster))
+                return content
 
             # Legacy blocks (mm-based). Used only when template_config does not use 'texts'.
             # 绘制证书标题
@@ -1031,12 +1371,36 @@ class CertificateGenerator:
                 )
 
             # 完成PDF绘制
+            timer.mark('text')
             canvas_obj.save()
-            buffer.seek(0)
-            return buffer.getvalue()
+            timer.mark('save')
+            content = buffer.getvalue()
+            timer.finish(len(content), raster=bool(raster))
+            return content
         finally:
             self.page_width, self.page_height = old_page_w, old_page_h
+            self._current_font_fallback = old_font_fallback
     
+    def _new_pdf_canvas(self, buffer, page_size):
+        if not PDF_INVARIANT:
+            return canvas.Canvas(buffer, pagesize=page_size)
+        canvas_obj = canvas.Canvas(buffer, pagesize=page_size, invariant=1)
+        canvas_obj.setCreator(_PDF_METADATA['creator'])
+        canvas_obj.setAuthor(_PDF_METADATA['author'])
+        canvas_obj.setTitle(_PDF_METADATA['title'])
+        return canvas_obj
+
+    def generate_preview(self, application, template_config, dpi=48, fmt='png', timing_hook=None):
+        """
+        按与 PDF 相同的模板版式输出低分辨率位图预览（PNG/WebP）
+        """
+        old_raster = getattr(self, '_raster_options', None)
+        self._raster_options = {'dpi': dpi, 'fmt': str(fmt or 'png').lower()}
+        try:
+            return self.generate_certificate(application, template_config, timing_hook=timing_hook)
+        finally:
+            self._raster_options = old_raster
+
     def create_default_template(self, category, award_level):
         """
         创建默认的证书模板配置
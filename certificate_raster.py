@@ -0,0 +1,168 @@
+import os
+
+from PIL import Image, ImageDraw, ImageFont
+from reportlab.lib.colors import black, toColor
+from reportlab.pdfbase import pdfmetrics
+
+
+# 无法直接映射到字体文件的字体（CID 字体 / 标准 Type1）在预览里使用的替代字体
+_PREVIEW_FONT_CANDIDATES = [
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+]
+
+PREVIEW_FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+_font_cache = {}
+
+
+def _fallback_font_file():
+    env_path = str(os.environ.get('CERT_PREVIEW_FONT', '') or '').strip()
+    for fp in ([env_path] if env_path else []) + _PREVIEW_FONT_CANDIDATES:
+        if fp and os.path.exists(fp):
+            return fp
+    return ''
+
+
+def _pil_font(font_name, size_px):
+    size_px = max(1, int(round(float(size_px))))
+    path, index = '', 0
+    try:
+        font = pdfmetrics.getFont(font_name)
+        if getattr(font, '_dynamicFont', False):
+            path = getattr(font.face, 'filename', '') or ''
+            index = int(getattr(font.face, 'subfontIndex', 0) or 0)
+    except Exception:
+        path = ''
+    if not path:
+        path = _fallback_font_file()
+
+    key = (path, index, size_px)
+    if key in _font_cache:
+        return _font_cache[key]
+    try:
+        pil_font = ImageFont.truetype(path, size_px, index=index) if path else ImageFont.load_default(size_px)
+    except Exception:
+        pil_font = ImageFont.load_default(size_px)
+    _font_cache[key] = pil_font
+    return pil_font
+
+
+def _rgba(color, default=(0, 0, 0, 255)):
+    try:
+        c = toColor(color)
+        alpha = getattr(c, 'alpha', 1)
+        alpha = 1 if alpha is None else float(alpha)
+        return (int(round(c.red * 255)), int(round(c.green * 255)), int(round(c.blue * 255)), int(round(alpha * 255)))
+    except Exception:
+        return default
+
+
+class RasterCanvas:
+    """按 reportlab Canvas 的子集接口把证书版式画到 Pillow 图片上（用于低分辨率预览）。
+
+    坐标、字号均沿用 PDF 的 pt 与左下角原点，保存时按 dpi 缩放。
+    """
+
+    is_raster = True
+
+    def __init__(self, buffer, pagesize, *, dpi=48, fmt='png'):
+        self._buffer = buffer
+        self._page_w, self._page_h = float(pagesize[0]), float(pagesize[1])
+        self._scale = float(dpi) / 72.0
+        self._fmt = fmt if fmt in PREVIEW_FORMATS else 'png'
+        size = (max(1, int(round(self._page_w * self._scale))), max(1, int(round(self._page_h * self._scale))))
+        self._image = Image.new('RGBA', size, (255, 255, 255, 255))
+        self._draw = ImageDraw.Draw(self._image)
+        self._fontname = 'Helvetica'
+        self._fontsize = 12
+        self._charSpace = 0
+        self._fillColor = black
+        self._strokeColor = black
+        self._lineWidth = 1
+        self._states = []
+
+    def _xy(self, x, y):
+        return float(x) * self._scale, (self._page_h - float(y)) * self._scale
+
+    def saveState(self):
+        self._states.append((self._fontname, self._fontsize, self._fillColor, self._strokeColor, self._lineWidth))
+
+    def restoreState(self):
+        if self._states:
+            self._fontname, self._fontsize, self._fillColor, self._strokeColor, self._lineWidth = self._states.pop()
+
+    def setFont(self, psfontname, size, leading=None):
+        self._fontname = psfontname
+        self._fontsize = size
+
+    def setFillColor(self, aColor, alpha=None):
+        self._fillColor = aColor
+
+    def setStrokeColor(self, aColor, alpha=None):
+        self._strokeColor = aColor
+
+    def setLineWidth(self, width):
+        self._lineWidth = width
+
+    def stringWidth(self, text, fontName=None, fontSize=None):
+        return pdfmetrics.stringWidth(text, fontName or self._fontname, fontSize or self._fontsize)
+
+    def drawString(self, x, y, text, *args, **kwargs):
+        text = str(text or '')
+        if not text:
+            return
+        font = _pil_font(self._fontname, float(self._fontsize) * self._scale)
+        self._draw.text(self._xy(x, y), text, font=font, fill=_rgba(self._fillColor), anchor='ls')
+
+    def drawImage(self, image, x, y, width=None, height=None, mask=None, **kwargs):
+        src = None
+        try:
+            src = getattr(image, '_image', None)
+            if src is None:
+                src = Image.open(getattr(image, 'fileName', None) or image)
+        except Exception:
+            return
+        w = max(1, int(round(float(width) * self._scale)))
+        h = max(1, int(round(float(height) * self._scale)))
+        left, bottom = self._xy(x, y)
+        img = src.convert('RGBA').resize((w, h), Image.BILINEAR)
+        self._image.paste(img, (int(round(left)), int(round(bottom - h))), img)
+
+    def line(self, x1, y1, x2, y2):
+        self._draw.line([self._xy(x1, y1), self._xy(x2, y2)], fill=_rgba(self._strokeColor), width=max(1, int(self._lineWidth * self._scale)))
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        x0, y0 = self._xy(x, y + height)
+        x1, y1 = self._xy(x + width, y)
+        self._draw.rectangle(
+            [min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)],
+            outline=_rgba(self._strokeColor) if stroke else None,
+            fill=_rgba(self._fillColor) if fill else None,
+        )
+
+    def circle(self, x_cen, y_cen, r, stroke=1, fill=0):
+        cx, cy = self._xy(x_cen, y_cen)
+        rr = float(r) * self._scale
+        self._draw.ellipse(
+            [cx - rr, cy - rr, cx + rr, cy + rr],
+            outline=_rgba(self._strokeColor) if stroke else None,
+            fill=_rgba(self._fillColor) if fill else None,
+        )
+
+    def grid(self, xlist, ylist):
+        for x in xlist:
+            self.line(x, ylist[0], x, ylist[-1])
+        for y in ylist:
+            self.line(xlist[0], y, xlist[-1], y)
+
+    def save(self):
+        pil_format = PREVIEW_FORMATS[self._fmt][0]
+        out = self._image.convert('RGB')
+        kwargs = {'quality': 80} if pil_format == 'WEBP' else {'optimize': True}
+        out.save(self._buffer, format=pil_format, **kwargs)
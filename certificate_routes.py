@@ -1,15 +1,17 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, has_request_context
 import io
 import json
 import zipfile
 from datetime import datetime
 import os
 import threading
+import time
 import uuid
 import logging
 
 from PIL import Image
 
+from sqlalchemy import or_, and_, exists
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import OperationalError
 
@@ -22,6 +24,8 @@ certificate_bp = Blueprint('certificate', __name__)
 _CERT_BASE_DIR = str(os.environ.get('CERT_STORAGE_DIR', '') or '').strip() or os.path.join('/tmp', 'competition-web-certs')
 _CERT_CACHE_DIR = os.path.join(_CERT_BASE_DIR, 'generated_certs')
 _CERT_TASK_DIR = os.path.join(_CERT_BASE_DIR, 'generated_cert_tasks')
+# 按 SHA-256 内容寻址的 PDF 存储：内容相同的证书只存一份，缓存路径通过硬链接指向它
+_CERT_BLOB_DIR = os.path.join(_CERT_CACHE_DIR, 'blobs')
 
 _logger = logging.getLogger(__name__)
 
@@ -64,11 +68,87 @@ def _read_json(path: str):
         return None
 
 
-def _cache_pdf_path(kind: str, key: str) -> str:
+def _cache_folder(kind: str, profile: str = '') -> str:
     kind = str(kind or '').strip().lower()
-    safe_key = _safe_filename_part(key)
+    profile = str(profile or '').strip().lower()
     folder = os.path.join(_CERT_CACHE_DIR, kind)
-    return os.path.join(folder, f"{safe_key}.pdf")
+    # 未指定档位（按模板配置）沿用原有目录，?profile= 指定的档位单独缓存在子目录中
+    if profile:
+        folder = os.path.join(folder, profile)
+    return folder
+
+
+def _cache_pdf_path(kind: str, key: str, profile: str = '') -> str:
+    safe_key = _safe_filename_part(key)
+    return os.path.join(_cache_folder(kind, profile), f"{safe_key}.pdf")
+
+
+def _cache_preview_path(kind: str, key: str, profile: str, fingerprint: str, dpi: int, fmt: str) -> str:
+    """预览图缓存按已登记 PDF 的内容哈希区分，PDF 重新生成后旧预览不再命中"""
+    safe_key = _safe_filename_part(key)
+    return os.path.join(_cache_folder(kind, profile), f"{safe_key}.{str(fingerprint)[:16]}.{int(dpi)}dpi.{fmt}")
+
+
+def _remove_cached_previews(kind: str, key: str, profile: str):
+    """删除某张证书的全部预览图缓存（PDF 内容变化时调用）"""
+    prefix = f"{_safe_filename_part(key)}."
+    folder = _cache_folder(kind, profile)
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(prefix) and 'dpi.' in name[len(prefix):]:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def _resolve_preview_options():
+    """预览参数：fmt=png|webp，dpi 默认 48，限制在 24~150"""
+    from certificate_raster import PREVIEW_FORMATS
+    fmt = str(request.args.get('fmt', 'png') or 'png').strip().lower()
+    if fmt not in PREVIEW_FORMATS:
+        fmt = 'png'
+    try:
+        dpi = int(request.args.get('dpi', 48))
+    except Exception:
+        dpi = 48
+    dpi = max(24, min(150, dpi))
+    return fmt, dpi
+
+
+def _send_preview(content_or_path, fmt: str):
+    from certificate_raster import PREVIEW_FORMATS
+    mimetype = PREVIEW_FORMATS[fmt][1]
+    if isinstance(content_or_path, (bytes, bytearray)):
+        return send_file(io.BytesIO(content_or_path), mimetype=mimetype, max_age=300)
+    return send_file(content_or_path, mimetype=mimetype, max_age=300)
+
+
+def _requested_asset_profile() -> str:
+    """请求参数 ?profile= 指定的档位；未指定时返回空串（按模板配置）。
+
+    缓存按它分目录，不需要先选模板就能命中缓存。
+    """
+    from certificate_assets import normalize_asset_profile
+    requested = ''
+    if has_request_context():
+        requested = str(request.args.get('profile', '') or '').strip()
+    return normalize_asset_profile(requested) if requested else ''
+
+
+def _resolve_asset_profile(template_config=None) -> str:
+    """渲染用的档位：请求参数 ?profile= 优先，其次模板配置 asset_profile，最后默认档位"""
+    from certificate_assets import normalize_asset_profile
+    requested = _requested_asset_profile()
+    if requested:
+        return requested
+    try:
+        return normalize_asset_profile((template_config or {}).get('asset_profile'))
+    except Exception:
+        return normalize_asset_profile(None)
 
 
 def _write_pdf_atomic(path: str, content: bytes) -> bool:
@@ -89,20 +169,173 @@ def _write_pdf_atomic(path: str, content: bytes) -> bool:
         return False
 
 
-def _try_send_cached_pdf(path: str, download_name: str):
+def _blob_path(digest: str) -> str:
+    return os.path.join(_CERT_BLOB_DIR, digest[:2], f"{digest}.pdf")
+
+
+def _store_certificate_pdf(path: str, content: bytes) -> str:
+    """写入证书缓存并返回内容 SHA-256；相同内容复用同一个 blob（硬链接失败时退回直接写文件）"""
+    from certificate_generator import pdf_content_hash
+
+    digest = pdf_content_hash(content)
+    blob = _blob_path(digest)
+    if not os.path.exists(blob):
+        if not _write_pdf_atomic(blob, content):
+            blob = ''
+
+    stored = False
+    if blob:
+        try:
+            _ensure_dir(os.path.dirname(path))
+            tmp = f"{path}.tmp"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            os.link(blob, tmp)
+            os.replace(tmp, path)
+            stored = True
+        except Exception:
+            stored = False
+    if not stored:
+        stored = _write_pdf_atomic(path, content)
+    if not stored:
+        return ''
+    return digest
+
+
+def _prune_orphan_blobs(min_age_seconds: int = 600):
+    """清理已没有缓存文件引用的 blob（硬链接计数为 1），跳过刚写入的文件"""
+    removed = 0
+    now = datetime.now().timestamp()
     try:
-        if path and os.path.exists(path):
-            return send_file(
-                path,
-                mimetype='application/pdf',
-                as_attachment=True,
-                download_name=download_name
-            )
+        for root, _dirs, files in os.walk(_CERT_BLOB_DIR):
+            for fn in files:
+                fp = os.path.join(root, fn)
+                try:
+                    st = os.stat(fp)
+                    if st.st_nlink <= 1 and (now - st.st_mtime) >= min_age_seconds:
+                        os.remove(fp)
+                        removed += 1
+                except Exception:
+                    continue
     except Exception:
-        return None
+        pass
+    return removed
+
+
+def _admin_debug_requested() -> bool:
+    """请求头 X-Admin-Debug 携带有效的管理员 token 时，返回渲染分段耗时"""
+    try:
+        from admin_auth import verify_admin_token
+        token = str(request.headers.get('X-Admin-Debug', '') or '').strip()
+        if not token:
+            return False
+        payload = verify_admin_token(token, max_age_seconds=12 * 60 * 60)
+        return bool(payload and payload.get('role') == 'admin')
+    except Exception:
+        return False
+
+
+def _with_render_timing(resp, stats, cache_hit: bool = False):
+    if stats is None or resp is None:
+        return resp
+    try:
+        resp.headers['X-Cert-Cache'] = 'hit' if cache_hit else 'miss'
+        if stats:
+            parts = [f"{stage};dur={float(ms):.2f}" for stage, ms in (stats.get('stages') or {}).items()]
+            parts.append(f"total;dur={float(stats.get('total_ms', 0.0)):.2f}")
+            resp.headers['Server-Timing'] = ', '.join(parts)
+            resp.headers['X-Cert-Render-Bytes'] = str(int(stats.get('bytes', 0) or 0))
+    except Exception:
+        pass
+    return resp
+
+
+def _send_pdf(content: bytes, download_name: str, digest: str = ''):
+    return send_file(
+        io.BytesIO(content),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name,
+        etag=digest or False
+    )
+
+
+def _storage_key(path: str) -> str:
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(_CERT_BASE_DIR))
+
+
+def _storage_path(storage_key: str) -> str:
+    return os.path.join(_CERT_BASE_DIR, storage_key)
+
+
+def _registry_session():
+    """登记表使用独立会话：生成证书时会临时改写 application 字段（去“赛”等），不能随登记一起提交"""
+    from sqlalchemy.orm import Session
+    from app import db
+    return Session(db.engine, expire_on_commit=False)
+
+
+def _lookup_generated_certificate(kind: str, cert_key: str, profile: str):
+    """按 (kind, cert_key, profile) 查登记表；存储文件已丢失时视为未生成"""
+    try:
+        from models import GeneratedCertificate
+        with _registry_session() as session:
+            row = session.query(GeneratedCertificate).filter_by(
+                kind=kind, cert_key=str(cert_key), profile=profile
+            ).first()
+        if row and os.path.exists(_storage_path(row.storage_key)):
+            return row
+    except Exception:
+        pass
     return None
 
 
+def _register_certificate_pdf(*, kind: str, cert_key: str, profile: str, application_id, path: str, content: bytes, filename: str, render_ms=None):
+    """写入缓存文件并登记，返回 GeneratedCertificate；失败返回 None"""
+    digest = _store_certificate_pdf(path, content)
+    if not digest:
+        return None
+    try:
+        from models import GeneratedCertificate
+        with _registry_session() as session:
+            row = session.query(GeneratedCertificate).filter_by(
+                kind=kind, cert_key=str(cert_key), profile=profile
+            ).first()
+            if not row:
+                row = GeneratedCertificate(kind=kind, cert_key=str(cert_key), profile=profile)
+                session.add(row)
+            row.application_id = int(application_id) if application_id is not None else None
+            if row.fingerprint and row.fingerprint != digest:
+                _remove_cached_previews(kind, cert_key, profile)
+            row.fingerprint = digest
+            row.storage_key = _storage_key(path)
+            row.byte_size = len(content or b'')
+            row.render_ms = round(float(render_ms), 2) if render_ms is not None else None
+            row.filename = str(filename or '')[:255]
+            row.updated_at = datetime.utcnow()
+            session.commit()
+            return row
+    except Exception:
+        try:
+            _logger.exception('register certificate %s/%s failed', kind, cert_key)
+        except Exception:
+            pass
+        return None
+
+
+def _send_registered_pdf(row, download_name: str):
+    try:
+        return send_file(
+            _storage_path(row.storage_key),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=download_name,
+            etag=row.fingerprint or True
+        )
+    except Exception:
+        return None
+
+
 def _start_background_cert_task(*, application_ids, source: str = ''):
     task_id = uuid.uuid4().hex
     now = datetime.now().isoformat()
@@ -134,7 +367,7 @@ def _start_background_cert_task(*, application_ids, source: str = ''):
         try:
             from app import app as flask_app
             from models import Application, CertificateTemplate
-            from certificate_generator import CertificateGenerator
+            from certificate_generator import CertificateGenerator, RenderTimingStats, RENDER_TIMING_ENABLED
 
             _ensure_dir(_CERT_CACHE_DIR)
             _ensure_dir(_CERT_TASK_DIR)
@@ -164,6 +397,9 @@ def _start_background_cert_task(*, application_ids, source: str = ''):
                         raise
 
                 generator = CertificateGenerator()
+                task_timing = RenderTimingStats() if RENDER_TIMING_ENABLED else None
+                if task_timing is not None:
+                    generator.add_timing_hook(task_timing)
 
                 total = len(applications)
                 try:
@@ -190,8 +426,12 @@ def _start_background_cert_task(*, application_ids, source: str = ''):
                         if err:
                             raise ValueError(err)
                         template_config = _apply_student_award_level_red(template_config)
+                        player_profile = _resolve_asset_profile(template_config)
+                        template_config['asset_profile'] = player_profile
 
+                        t0 = time.perf_counter()
                         player_pdf = generator.generate_certificate(application, template_config)
+                        player_ms = (time.perf_counter() - t0) * 1000.0
                         player_filename = (
                             f"{match_no}_"
                             f"{_safe_filename_part(name_part)}_"
@@ -200,7 +440,16 @@ def _start_background_cert_task(*, application_ids, source: str = ''):
                             f"{_safe_filename_part(application.award_level)}.pdf"
                         )
                         player_path = _cache_pdf_path('player', str(application.id))
-                        if _write_pdf_atomic(player_path, player_pdf):
+                        if _register_certificate_pdf(
+                            kind='player',
+                            cert_key=str(application.id),
+                            profile='',
+                            application_id=application.id,
+                            path=player_path,
+                            content=player_pdf,
+                            filename=player_filename,
+                            render_ms=player_ms
+                        ):
                             meta['progress']['generated_files'] = int(meta['progress'].get('generated_files', 0) or 0) + 1
 
                         coach_award_level = f"{application.award_level}-辅导员"
@@ -219,7 +468,11 @@ def _start_background_cert_task(*, application_ids, source: str = ''):
                         except Exception:
                             pass
                         coach_config = _ensure_coach_title_red(coach_config)
+                        coach_profile = _resolve_asset_profile(coach_config)
+                        coach_config['asset_profile'] = coach_profile
+                        t0 = time.perf_counter()
                         coach_pdf = generator.generate_certificate(application, coach_config)
+                        coach_ms = (time.perf_counter() - t0) * 1000.0
                         teacher_name = getattr(application, 'teacher_name', '') or ''
                         coach_filename = (
                             f"{match_no}_"
@@ -228,21 +481,18 @@ def _start_background_cert_task(*, application_ids, source: str = ''):
                             f"{_safe_filename_part(coach_award_level)}.pdf"
                         )
                         coach_path = _cache_pdf_path('coach', str(application.id))
-                        if _write_pdf_atomic(coach_path, coach_pdf):
+                        if _register_certificate_pdf(
+                            kind='coach',
+                            cert_key=str(application.id),
+                            profile='',
+                            application_id=application.id,
+                            path=coach_path,
+                            content=coach_pdf,
+                            filename=coach_filename,
+                            render_ms=coach_ms
+                        ):
                             meta['progress']['generated_files'] = int(meta['progress'].get('generated_files', 0) or 0) + 1
 
-                        manifest_path = os.path.join(_CERT_CACHE_DIR, 'manifests')
-                        _ensure_dir(manifest_path)
-                        _write_json(
-                            os.path.join(manifest_path, f"{application.id}.json"),
-                            {
-                                'application_id': application.id,
-                                'player_filename': player_filename,
-                                'coach_filename': coach_filename,
-                                'updated_at': datetime.now().isoformat()
-                            }
-                        )
-
                     except Exception as e:
                         meta['progress']['errors'] = int(meta['progress'].get('errors', 0) or 0) + 1
                         try:
@@ -262,6 +512,11 @@ def _start_background_cert_task(*, application_ids, source: str = ''):
                         pass
                     _write_json(meta_path, meta)
 
+                _prune_orphan_blobs()
+
+                if task_timing is not None:
+                    meta['render_timing'] = task_timing.snapshot()
+
                 meta['status'] = 'finished'
                 meta['finished_at'] = datetime.now().isoformat()
                 _write_json(meta_path, meta)
@@ -331,26 +586,30 @@ def _pick_template_config(CertificateTemplate, generator, *, category, award_lev
     3) exact match: category + fallback_award_level (optional)
     4) any category + fallback_award_level (optional)
     """
-    template = CertificateTemplate.query.filter(
-        CertificateTemplate.category == category,
-        CertificateTemplate.award_level == award_level
-    ).first()
+    from app import db
 
-    if not template:
+    # 生成证书时 application 上有仅用于排版的临时改写（去“赛”等），查模板时不能被 autoflush 写回
+    with db.session.no_autoflush:
         template = CertificateTemplate.query.filter(
+            CertificateTemplate.category == category,
             CertificateTemplate.award_level == award_level
         ).first()
 
-    if (not template) and fallback_award_level:
-        template = CertificateTemplate.query.filter(
-            CertificateTemplate.category == category,
-            CertificateTemplate.award_level == fallback_award_level
-        ).first()
+        if not template:
+            template = CertificateTemplate.query.filter(
+                CertificateTemplate.award_level == award_level
+            ).first()
 
-    if (not template) and fallback_award_level:
-        template = CertificateTemplate.query.filter(
-            CertificateTemplate.award_level == fallback_award_level
-        ).first()
+        if (not template) and fallback_award_level:
+            template = CertificateTemplate.query.filter(
+                CertificateTemplate.category == category,
+                CertificateTemplate.award_level == fallback_award_level
+            ).first()
+
+        if (not template) and fallback_award_level:
+            template = CertificateTemplate.query.filter(
+                CertificateTemplate.award_level == fallback_award_level
+            ).first()
 
     if template:
         return template.get_config(), None
@@ -496,6 +755,155 @@ def _ensure_coach_title_red(template_config):
     except Exception:
         return template_config
 
+def _inject_player_stamps(template_config):
+    """选手证书底部统一注入 6 个盖章（px + 顶部原点）"""
+    # Student stamps (final): always inject 6 stamps at the bottom.
+    # Do NOT depend on a specific background_image value, because templates may vary.
+    # IMPORTANT: Do NOT override the template coordinate system (coord_unit/y_origin).
+    # Otherwise mm-based templates will render texts off-page and appear as "no text".
+    try:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        bg_rel = str((template_config or {}).get('background_image', '') or '').strip()
+        bg_abs = ''
+        if bg_rel and (not os.path.isabs(bg_rel)):
+            bg_abs = os.path.join(base_dir, bg_rel)
+        elif bg_rel:
+            bg_abs = bg_rel
+
+        bg_w = None
+        if bg_abs and os.path.exists(bg_abs):
+            try:
+                bg_w, _bg_h = Image.open(bg_abs).size
+            except Exception:
+                bg_w = None
+
+        stamp_count = 6
+
+        # Student certificate coordinates are px with top-origin.
+        # Reserve stamps horizontally centered within x=37..1224 and vertically within y=663..851.
+        x_left = 37
+        x_right = 1224
+        y_top = 663
+        y_bottom = 851
+        y_center = int((int(y_top) + int(y_bottom)) / 2)
+
+        span_w = max(1, int(x_right) - int(x_left))
+        stamp_gap = 30
+        stamp_w = int((span_w - stamp_gap * (stamp_count - 1)) / stamp_count)
+        stamp_w = max(50, min(180, stamp_w))
+
+        total_w = stamp_w * stamp_count + stamp_gap * (stamp_count - 1)
+        start_x = int(x_left) + int((span_w - total_w) / 2)
+
+        stamps = []
+        for i in range(stamp_count):
+            stamps.append({
+                'image': f"assets/cert/stamps/player/{i + 1}.png",
+                'fallback_images': [
+                    'assets/cert/测试盖章.png',
+                    'assets/cert/test.png',
+                ],
+                'x': int(start_x + i * (stamp_w + stamp_gap)),
+                'y': int(y_center),
+                'width': int(stamp_w),
+                'height': int(stamp_w),
+                'unit': 'px',
+                'y_origin': 'top',
+                'y_anchor': 'center',
+                'keep_aspect': True,
+            })
+
+        template_config = dict(template_config or {})
+        template_config.update({'stamp_images': stamps})
+    except Exception:
+        pass
+    return template_config
+
+
+def _apply_coach_layout(application, template_config):
+    """辅导员证书固定版式：coach.png 背景、姓名/项目文字位置、底部盖章与红色标题"""
+    try:
+        cat = str(getattr(application, 'category', '') or '')
+        if cat.endswith('赛'):
+            setattr(application, 'category', cat[:-1])
+    except Exception:
+        pass
+
+    try:
+        if isinstance(template_config, dict):
+            bg_w = 1240
+            try:
+                bg_abs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'cert', 'coach.png')
+                bg_w, _bg_h = Image.open(bg_abs).size
+            except Exception:
+                bg_w = 1240
+
+            stamp_count = 6
+            stamp_margin = 80
+            stamp_gap = 20
+            stamp_w = max(50, int((int(bg_w) - 2 * stamp_margin - stamp_gap * (stamp_count - 1)) / stamp_count))
+
+            template_config['background_image'] = 'assets/cert/coach.png'
+            template_config['coord_unit'] = 'px'
+            template_config['y_origin'] = 'top'
+            template_config['use_background_size'] = True
+            template_config['global_y_offset'] = 0
+
+            # Final coach texts layout (must match coach_final_with_test_stamp_*.pdf)
+            template_config['texts'] = [
+                {
+                    'field': 'teacher_name',
+                    'font': '宋体',
+                    'font_size': 34,
+                    'align': 'center',
+                    'width': 150,
+                    'x': 320,
+                    'x_anchor': 'left',
+                    'y': 1080,
+                },
+                {
+                    'field': 'category',
+                    'font': '宋体',
+                    'font_size': 52,
+                    'align': 'right',
+                    'width': 500,
+                    'x': 780,
+                    'x_anchor': 'right',
+                    'y': 1280,
+                },
+            ]
+
+            template_config['stamp_images'] = _build_centered_stamp_images(
+                cert_kind='coach',
+                count=stamp_count,
+                width=stamp_w,
+                height=stamp_w,
+                gap=stamp_gap,
+                y=170,
+                unit='px',
+                y_origin='bottom',
+                y_anchor='center',
+                keep_aspect=True,
+                dx=70,
+            )
+    except Exception:
+        pass
+
+    try:
+        if isinstance(template_config, dict):
+            try:
+                bg_abs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'cert', 'coach.png')
+                bg_w, _bg_h = Image.open(bg_abs).size
+                template_config['bg_width'] = int(bg_w)
+            except Exception:
+                pass
+    except Exception:
+        pass
+
+    template_config = _ensure_coach_title_red(template_config)
+    return template_config
+
+
 @certificate_bp.route('/api/certificate/generate/<int:application_id>', methods=['GET'])
 @require_user()
 def generate_certificate(application_id):
@@ -528,10 +936,14 @@ def generate_certificate(application_id):
             f"{_safe_filename_part(application.award_level)}.pdf"
         )
 
-        cached_path = _cache_pdf_path('player', str(application.id))
-        cached_resp = _try_send_cached_pdf(cached_path, filename)
-        if cached_resp is not None:
-            return cached_resp
+        requested_profile = _requested_asset_profile()
+        cached_path = _cache_pdf_path('player', str(application.id), requested_profile)
+        debug_stats = {} if _admin_debug_requested() else None
+        registered = _lookup_generated_certificate('player', str(application.id), requested_profile)
+        if registered is not None:
+            cached_resp = _send_registered_pdf(registered, filename)
+            if cached_resp is not None:
+                return _with_render_timing(cached_resp, debug_stats, cache_hit=True)
 
         generator = CertificateGenerator()
 
@@ -553,76 +965,32 @@ def generate_certificate(application_id):
 
         template_config = _apply_student_award_level_red(template_config)
 
-        # Student stamps (final): always inject 6 stamps at the bottom.
-        # Do NOT depend on a specific background_image value, because templates may vary.
-        # IMPORTANT: Do NOT override the template coordinate system (coord_unit/y_origin).
-        # Otherwise mm-based templates will render texts off-page and appear as "no text".
-        try:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            bg_rel = str((template_config or {}).get('background_image', '') or '').strip()
-            bg_abs = ''
-            if bg_rel and (not os.path.isabs(bg_rel)):
-                bg_abs = os.path.join(base_dir, bg_rel)
-            elif bg_rel:
-                bg_abs = bg_rel
-
-            bg_w = None
-            if bg_abs and os.path.exists(bg_abs):
-                try:
-                    bg_w, _bg_h = Image.open(bg_abs).size
-                except Exception:
-                    bg_w = None
-
-            stamp_count = 6
+        asset_profile = _resolve_asset_profile(template_config)
 
-            # Student certificate coordinates are px with top-origin.
-            # Reserve stamps horizontally centered within x=37..1224 and vertically within y=663..851.
-            x_left = 37
-            x_right = 1224
-            y_top = 663
-            y_bottom = 851
-            y_center = int((int(y_top) + int(y_bottom)) / 2)
-
-            span_w = max(1, int(x_right) - int(x_left))
-            stamp_gap = 30
-            stamp_w = int((span_w - stamp_gap * (stamp_count - 1)) / stamp_count)
-            stamp_w = max(50, min(180, stamp_w))
-
-            total_w = stamp_w * stamp_count + stamp_gap * (stamp_count - 1)
-            start_x = int(x_left) + int((span_w - total_w) / 2)
-
-            stamps = []
-            for i in range(stamp_count):
-                stamps.append({
-                    'image': f"assets/cert/stamps/player/{i + 1}.png",
-                    'fallback_images': [
-                        'assets/cert/测试盖章.png',
-                        'assets/cert/test.png',
-                    ],
-                    'x': int(start_x + i * (stamp_w + stamp_gap)),
-                    'y': int(y_center),
-                    'width': int(stamp_w),
-                    'height': int(stamp_w),
-                    'unit': 'px',
-                    'y_origin': 'top',
-                    'y_anchor': 'center',
-                    'keep_aspect': True,
-                })
+        template_config = _inject_player_stamps(template_config)
 
-            template_config = dict(template_config or {})
-            template_config.update({'stamp_images': stamps})
-        except Exception:
-            pass
+        template_config['asset_profile'] = asset_profile
         
-        pdf_content = generator.generate_certificate(application, template_config)
-        _write_pdf_atomic(cached_path, pdf_content)
-        
-        return send_file(
-            io.BytesIO(pdf_content),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
+        t0 = time.perf_counter()
+        pdf_content = generator.generate_certificate(
+            application,
+            template_config,
+            timing_hook=debug_stats.update if debug_stats is not None else None
+        )
+        render_ms = (time.perf_counter() - t0) * 1000.0
+        registered = _register_certificate_pdf(
+            kind='player',
+            cert_key=str(application.id),
+            profile=requested_profile,
+            application_id=application.id,
+            path=cached_path,
+            content=pdf_content,
+            filename=filename,
+            render_ms=render_ms
         )
+        digest = registered.fingerprint if registered is not None else ''
+        
+        return _with_render_timing(_send_pdf(pdf_content, filename, digest), debug_stats)
         
     except Exception as e:
         return jsonify({
@@ -662,10 +1030,14 @@ def generate_excellent_coach_certificate(coach_id):
             f"优秀辅导员.pdf"
         )
 
-        cached_path = _cache_pdf_path('excellent_coach', str(coach.id))
-        cached_resp = _try_send_cached_pdf(cached_path, filename)
-        if cached_resp is not None:
-            return cached_resp
+        requested_profile = _requested_asset_profile()
+        cached_path = _cache_pdf_path('excellent_coach', str(coach.id), requested_profile)
+        debug_stats = {} if _admin_debug_requested() else None
+        registered = _lookup_generated_certificate('excellent_coach', str(coach.id), requested_profile)
+        if registered is not None:
+            cached_resp = _send_registered_pdf(registered, filename)
+            if cached_resp is not None:
+                return _with_render_timing(cached_resp, debug_stats, cache_hit=True)
 
         generator = CertificateGenerator()
 
@@ -686,95 +1058,31 @@ def generate_excellent_coach_certificate(coach_id):
         except Exception:
             template_config = template_config
 
-        try:
-            cat = str(getattr(application, 'category', '') or '')
-            if cat.endswith('赛'):
-                setattr(application, 'category', cat[:-1])
-        except Exception:
-            pass
-
-        try:
-            if isinstance(template_config, dict):
-                bg_w = 1240
-                try:
-                    bg_abs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'cert', 'coach.png')
-                    bg_w, _bg_h = Image.open(bg_abs).size
-                except Exception:
-                    bg_w = 1240
-
-                stamp_count = 6
-                stamp_margin = 80
-                stamp_gap = 20
-                stamp_w = max(50, int((int(bg_w) - 2 * stamp_margin - stamp_gap * (stamp_count - 1)) / stamp_count))
-
-                template_config['background_image'] = 'assets/cert/coach.png'
-                template_config['coord_unit'] = 'px'
-                template_config['y_origin'] = 'top'
-                template_config['use_background_size'] = True
-                template_config['global_y_offset'] = 0
-
-                # Final coach texts layout (must match coach_final_with_test_stamp_*.pdf)
-                template_config['texts'] = [
-                    {
-                        'field': 'teacher_name',
-                        'font': '宋体',
-                        'font_size': 34,
-                        'align': 'center',
-                        'width': 150,
-                        'x': 320,
-                        'x_anchor': 'left',
-                        'y': 1080,
-                    },
-                    {
-                        'field': 'category',
-                        'font': '宋体',
-                        'font_size': 52,
-                        'align': 'right',
-                        'width': 500,
-                        'x': 780,
-                        'x_anchor': 'right',
-                        'y': 1280,
-                    },
-                ]
-
-                template_config['stamp_images'] = _build_centered_stamp_images(
-                    cert_kind='coach',
-                    count=stamp_count,
-                    width=stamp_w,
-                    height=stamp_w,
-                    gap=stamp_gap,
-                    y=170,
-                    unit='px',
-                    y_origin='bottom',
-                    y_anchor='center',
-                    keep_aspect=True,
-                    dx=70,
-                )
-        except Exception:
-            pass
-
-        try:
-            if isinstance(template_config, dict):
-                try:
-                    bg_abs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'cert', 'coach.png')
-                    bg_w, _bg_h = Image.open(bg_abs).size
-                    template_config['bg_width'] = int(bg_w)
-                except Exception:
-                    pass
-        except Exception:
-            pass
-
-        template_config = _ensure_coach_title_red(template_config)
+        asset_profile = _resolve_asset_profile(template_config)
 
-        pdf_content = generator.generate_certificate(application, template_config)
-        _write_pdf_atomic(cached_path, pdf_content)
+        template_config = _apply_coach_layout(application, template_config)
+        template_config['asset_profile'] = asset_profile
 
-        return send_file(
-            io.BytesIO(pdf_content),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
+        t0 = time.perf_counter()
+        pdf_content = generator.generate_certificate(
+            application,
+            template_config,
+            timing_hook=debug_stats.update if debug_stats is not None else None
+        )
+        render_ms = (time.perf_counter() - t0) * 1000.0
+        registered = _register_certificate_pdf(
+            kind='excellent_coach',
+            cert_key=str(coach.id),
+            profile=requested_profile,
+            application_id=application.id,
+            path=cached_path,
+            content=pdf_content,
+            filename=filename,
+            render_ms=render_ms
         )
+        digest = registered.fingerprint if registered is not None else ''
+
+        return _with_render_timing(_send_pdf(pdf_content, filename, digest), debug_stats)
 
     except Exception as e:
         return jsonify({'success': False, 'message': f'生成辅导员证书失败: {str(e)}'}), 500
@@ -809,10 +1117,14 @@ def generate_coach_certificate(application_id):
             f"{_safe_filename_part(coach_award_level)}.pdf"
         )
 
-        cached_path = _cache_pdf_path('coach', str(application.id))
-        cached_resp = _try_send_cached_pdf(cached_path, filename)
-        if cached_resp is not None:
-            return cached_resp
+        requested_profile = _requested_asset_profile()
+        cached_path = _cache_pdf_path('coach', str(application.id), requested_profile)
+        debug_stats = {} if _admin_debug_requested() else None
+        registered = _lookup_generated_certificate('coach', str(application.id), requested_profile)
+        if registered is not None:
+            cached_resp = _send_registered_pdf(registered, filename)
+            if cached_resp is not None:
+                return _with_render_timing(cached_resp, debug_stats, cache_hit=True)
 
         generator = CertificateGenerator()
         coach_award_level = coach_award_level
@@ -836,90 +1148,30 @@ def generate_coach_certificate(application_id):
         except Exception:
             template_config = template_config
 
-        try:
-            cat = str(getattr(application, 'category', '') or '')
-            if cat.endswith('赛'):
-                setattr(application, 'category', cat[:-1])
-        except Exception:
-            pass
-
-        try:
-            if isinstance(template_config, dict):
-                bg_abs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'cert', 'coach.png')
-                bg_w, _bg_h = Image.open(bg_abs).size
+        asset_profile = _resolve_asset_profile(template_config)
 
-                stamp_count = 6
-                stamp_margin = 80
-                stamp_gap = 20
-                stamp_w = max(50, int((int(bg_w) - 2 * stamp_margin - stamp_gap * (stamp_count - 1)) / stamp_count))
-
-                template_config['background_image'] = 'assets/cert/coach.png'
-                template_config['coord_unit'] = 'px'
-                template_config['y_origin'] = 'top'
-                template_config['use_background_size'] = True
-                template_config['global_y_offset'] = 0
-
-                template_config['texts'] = [
-                    {
-                        'field': 'teacher_name',
-                        'font': '宋体',
-                        'font_size': 34,
-                        'align': 'center',
-                        'width': 150,
-                        'x': 320,
-                        'x_anchor': 'left',
-                        'y': 1080,
-                    },
-                    {
-                        'field': 'category',
-                        'font': '宋体',
-                        'font_size': 52,
-                        'align': 'right',
-                        'width': 500,
-                        'x': 780,
-                        'x_anchor': 'right',
-                        'y': 1280,
-                    },
-                ]
-
-                template_config['stamp_images'] = _build_centered_stamp_images(
-                    cert_kind='coach',
-                    count=stamp_count,
-                    width=stamp_w,
-                    height=stamp_w,
-                    gap=stamp_gap,
-                    y=170,
-                    unit='px',
-                    y_origin='bottom',
-                    y_anchor='center',
-                    keep_aspect=True,
-                    dx=70,
-                )
-        except Exception:
-            pass
+        template_config = _apply_coach_layout(application, template_config)
+        template_config['asset_profile'] = asset_profile
 
-        try:
-            if isinstance(template_config, dict):
-                try:
-                    bg_abs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'cert', 'coach.png')
-                    bg_w, _bg_h = Image.open(bg_abs).size
-                    template_config['bg_width'] = int(bg_w)
-                except Exception:
-                    pass
-        except Exception:
-            pass
-
-        template_config = _ensure_coach_title_red(template_config)
-
-        pdf_content = generator.generate_certificate(application, template_config)
-
-        _write_pdf_atomic(cached_path, pdf_content)
-        return send_file(
-            io.BytesIO(pdf_content),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
+        t0 = time.perf_counter()
+        pdf_content = generator.generate_certificate(
+            application,
+            template_config,
+            timing_hook=debug_stats.update if debug_stats is not None else None
+        )
+        render_ms = (time.perf_counter() - t0) * 1000.0
+        registered = _register_certificate_pdf(
+            kind='coach',
+            cert_key=str(application.id),
+            profile=requested_profile,
+            application_id=application.id,
+            path=cached_path,
+            content=pdf_content,
+            filename=filename,
+            render_ms=render_ms
         )
+        digest = registered.fingerprint if registered is not None else ''
+        return _with_render_timing(_send_pdf(pdf_content, filename, digest), debug_stats)
 
     except Exception as e:
         return jsonify({
@@ -927,6 +1179,106 @@ def generate_coach_certificate(application_id):
             'message': f'生成辅导员证书失败: {str(e)}'
         }), 500
 
+@certificate_bp.route('/api/certificate/preview/<int:application_id>', methods=['GET'])
+@require_user()
+def preview_certificate(application_id):
+    """选手证书低分辨率预览图（PNG/WebP），与 PDF 使用同一套版式"""
+    try:
+        from models import Application, CertificateTemplate
+        from certificate_generator import CertificateGenerator
+
+        application = Application.query.get(application_id)
+        if not application:
+            return jsonify({'success': False, 'message': '未找到申请记录'}), 404
+        if not application.award_level:
+            return jsonify({'success': False, 'message': '该记录暂无获奖信息，无法生成证书'}), 400
+
+        fmt, dpi = _resolve_preview_options()
+        requested_profile = _requested_asset_profile()
+        # 只有已登记的 PDF 才缓存预览，缓存键带 PDF 内容哈希；未生成过 PDF 时每次现渲染
+        registered = _lookup_generated_certificate('player', str(application.id), requested_profile)
+        cached_path = None
+        if registered is not None and registered.fingerprint:
+            cached_path = _cache_preview_path('player', str(application.id), requested_profile, registered.fingerprint, dpi, fmt)
+            if os.path.exists(cached_path):
+                return _send_preview(cached_path, fmt)
+
+        generator = CertificateGenerator()
+        _normalize_application_for_cert(application)
+
+        template_config, err = _pick_template_config(
+            CertificateTemplate,
+            generator,
+            category=application.category,
+            award_level=application.award_level,
+            fallback_award_level='一等奖'
+        )
+        if err:
+            return jsonify({'success': False, 'message': err}), 404
+        template_config = _apply_student_award_level_red(template_config)
+
+        asset_profile = _resolve_asset_profile(template_config)
+        template_config = _inject_player_stamps(template_config)
+        template_config['asset_profile'] = asset_profile
+
+        content = generator.generate_preview(application, template_config, dpi=dpi, fmt=fmt)
+        if cached_path:
+            _write_pdf_atomic(cached_path, content)
+        return _send_preview(content, fmt)
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'生成证书预览失败: {str(e)}'}), 500
+
+
+@certificate_bp.route('/api/certificate/preview-coach/<int:application_id>', methods=['GET'])
+@require_admin()
+def preview_coach_certificate(application_id):
+    """辅导员证书低分辨率预览图（PNG/WebP）"""
+    try:
+        from models import Application, CertificateTemplate
+        from certificate_generator import CertificateGenerator
+
+        application = Application.query.get(application_id)
+        if not application:
+            return jsonify({'success': False, 'message': '未找到申请记录'}), 404
+        if not application.award_level:
+            return jsonify({'success': False, 'message': '该记录暂无获奖信息，无法生成证书'}), 400
+
+        fmt, dpi = _resolve_preview_options()
+        requested_profile = _requested_asset_profile()
+        # 只有已登记的 PDF 才缓存预览，缓存键带 PDF 内容哈希；未生成过 PDF 时每次现渲染
+        registered = _lookup_generated_certificate('coach', str(application.id), requested_profile)
+        cached_path = None
+        if registered is not None and registered.fingerprint:
+            cached_path = _cache_preview_path('coach', str(application.id), requested_profile, registered.fingerprint, dpi, fmt)
+            if os.path.exists(cached_path):
+                return _send_preview(cached_path, fmt)
+
+        generator = CertificateGenerator()
+
+        template_config, err = _pick_template_config(
+            CertificateTemplate,
+            generator,
+            category=application.category,
+            award_level=f"{application.award_level}-辅导员",
+            fallback_award_level='一等奖-辅导员'
+        )
+        if err:
+            return jsonify({'success': False, 'message': err}), 404
+        template_config = dict(template_config or {})
+
+        asset_profile = _resolve_asset_profile(template_config)
+        template_config = _apply_coach_layout(application, template_config)
+        template_config['asset_profile'] = asset_profile
+
+        content = generator.generate_preview(application, template_config, dpi=dpi, fmt=fmt)
+        if cached_path:
+            _write_pdf_atomic(cached_path, content)
+        return _send_preview(content, fmt)
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'生成辅导员证书预览失败: {str(e)}'}), 500
+
 @certificate_bp.route('/api/certificate/batch-generate', methods=['POST'])
 @require_admin()
 def batch_generate_certificates():
@@ -969,55 +1321,91 @@ def get_certificate_task(task_id):
         return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
 
 
+CERT_BUNDLE_KINDS = ('player', 'coach', 'excellent_coach')
+
+
+def write_certificate_bundle(fileobj, *, kind: str = '', task_id: str = '', asset_profile: str = '') -> int:
+    """把已生成的证书打包成 zip 写入 fileobj（路径或文件对象），返回打包的证书数"""
+    kinds = [kind] if kind else list(CERT_BUNDLE_KINDS)
+
+    selected_ids = None
+    if task_id:
+        meta = _read_json(_task_path(task_id))
+        if meta and isinstance(meta.get('application_ids'), list):
+            selected_ids = [str(x) for x in meta.get('application_ids')]
+
+    from models import GeneratedCertificate
+
+    with _registry_session() as session:
+        q = session.query(GeneratedCertificate).filter(
+            GeneratedCertificate.kind.in_(kinds),
+            GeneratedCertificate.profile == asset_profile
+        )
+        if selected_ids is not None:
+            # 任务只约束选手/辅导员证书；优秀辅导员证书照常全部打包
+            q = q.filter(or_(
+                GeneratedCertificate.kind == 'excellent_coach',
+                GeneratedCertificate.cert_key.in_(selected_ids)
+            ))
+        rows = q.order_by(GeneratedCertificate.kind, GeneratedCertificate.id).all()
+
+    found = 0
+    files = []
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for row in rows:
+            fp = _storage_path(row.storage_key)
+            if not os.path.isfile(fp):
+                continue
+            arcname = f"{row.kind}/{_safe_filename_part(row.cert_key)}.pdf"
+            try:
+                zf.write(fp, arcname)
+                found += 1
+                files.append({
+                    'path': arcname,
+                    'application_id': row.application_id,
+                    'filename': row.filename,
+                    'sha256': row.fingerprint,
+                    'byte_size': row.byte_size
+                })
+            except Exception:
+                continue
+
+        zf.writestr('manifest.json', json.dumps({
+            'found': found,
+            'kind': kind or 'all',
+            'task_id': task_id or None,
+            'profile': asset_profile or None,
+            'files': files,
+            'generated_at': datetime.now().isoformat()
+        }, ensure_ascii=False, indent=2))
+    return found
+
+
 @certificate_bp.route('/api/admin/certificates/download-zip', methods=['GET'])
 @require_admin()
 def download_cached_certificates_zip():
+    """打包下载已生成的证书；async=1 时后台打包，完成后通过短期下载链接获取"""
     try:
         kind = str(request.args.get('kind', '') or '').strip().lower()
         task_id = str(request.args.get('task_id', '') or '').strip()
+        asset_profile = _requested_asset_profile()
 
-        kinds = ['player', 'coach', 'excellent_coach']
-        if kind:
-            if kind not in kinds:
-                return jsonify({'success': False, 'message': 'kind 参数不合法'}), 400
-            kinds = [kind]
+        if kind and kind not in CERT_BUNDLE_KINDS:
+            return jsonify({'success': False, 'message': 'kind 参数不合法'}), 400
 
-        selected_ids = None
-        if task_id:
-            meta = _read_json(_task_path(task_id))
-            if meta and isinstance(meta.get('application_ids'), list):
-                selected_ids = [str(x) for x in meta.get('application_ids')]
+        if str(request.args.get('async', '') or '').strip() in ['1', 'true', 'True', 'yes', 'on']:
+            import export_jobs
+            job_id, reused = export_jobs.start_export_job('certificates', {
+                'kind': kind, 'task_id': task_id, 'profile': asset_profile
+            })
+            return jsonify({
+                'success': True,
+                'message': '已有相同的打包任务，直接复用' if reused else '正在后台打包',
+                'data': {'job_id': job_id, 'reused': reused}
+            }), 202
 
         zip_buffer = io.BytesIO()
-        found = 0
-        with zipfile.ZipFile(zip_buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-            for k in kinds:
-                folder = os.path.join(_CERT_CACHE_DIR, k)
-                if not os.path.exists(folder):
-                    continue
-                for fn in os.listdir(folder):
-                    if not fn.lower().endswith('.pdf'):
-                        continue
-                    key = fn[:-4]
-                    if selected_ids is not None and k in ('player', 'coach'):
-                        if key not in selected_ids:
-                            continue
-                    fp = os.path.join(folder, fn)
-                    if not os.path.isfile(fp):
-                        continue
-                    arcname = f"{k}/{fn}"
-                    try:
-                        zf.write(fp, arcname)
-                        found += 1
-                    except Exception:
-                        continue
-
-            zf.writestr('manifest.json', json.dumps({
-                'found': found,
-                'kind': kind or 'all',
-                'task_id': task_id or None,
-                'generated_at': datetime.now().isoformat()
-            }, ensure_ascii=False, indent=2))
+        found = write_certificate_bundle(zip_buffer, kind=kind, task_id=task_id, asset_profile=asset_profile)
 
         if found <= 0:
             return jsonify({'success': False, 'message': '当前没有可下载的已生成证书'}), 404
@@ -1035,6 +1423,91 @@ def download_cached_certificates_zip():
     except Exception as e:
         return jsonify({'success': False, 'message': f'下载失败: {str(e)}'}), 500
 
+@certificate_bp.route('/api/admin/certificates/coverage', methods=['GET'])
+@require_admin()
+def get_certificate_coverage():
+    """已获奖记录的证书覆盖情况：按 kind 统计已登记数量，并列出缺失证书的 application_id"""
+    try:
+        from app import db
+        from models import Application, GeneratedCertificate
+
+        asset_profile = _requested_asset_profile()
+        try:
+            limit = int(request.args.get('limit', 200))
+        except Exception:
+            limit = 200
+        limit = max(0, min(2000, limit))
+
+        awarded = db.session.query(Application.id).filter(Application.award_level.isnot(None))
+        total = awarded.count()
+
+        data = {'profile': asset_profile or None, 'total_awarded': int(total), 'kinds': {}}
+        for k in ('player', 'coach'):
+            missing_q = awarded.filter(~exists().where(and_(
+                GeneratedCertificate.application_id == Application.id,
+                GeneratedCertificate.kind == k,
+                GeneratedCertificate.profile == asset_profile
+            )))
+            missing_count = missing_q.count()
+            missing_ids = [r[0] for r in missing_q.order_by(Application.id).limit(limit).all()] if limit else []
+            data['kinds'][k] = {
+                'generated': int(total - missing_count),
+                'missing': int(missing_count),
+                'missing_application_ids': missing_ids
+            }
+
+        return jsonify({'success': True, 'data': data})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+@certificate_bp.route('/api/admin/certificates/metrics', methods=['GET'])
+@require_admin()
+def get_certificate_metrics():
+    """证书渲染指标：本进程分段耗时汇总（CERT_RENDER_TIMING=1 时采集）+ 登记表按类型统计"""
+    try:
+        from sqlalchemy import func
+        from app import db
+        from models import GeneratedCertificate
+        from certificate_generator import RENDER_METRICS, RENDER_TIMING_ENABLED
+
+        rows = db.session.query(
+            GeneratedCertificate.kind,
+            GeneratedCertificate.profile,
+            func.count(GeneratedCertificate.id),
+            func.count(func.distinct(GeneratedCertificate.fingerprint)),
+            func.avg(GeneratedCertificate.render_ms),
+            func.max(GeneratedCertificate.render_ms),
+            func.sum(GeneratedCertificate.byte_size)
+        ).group_by(GeneratedCertificate.kind, GeneratedCertificate.profile).all()
+
+        registry = []
+        for kind, profile, cnt, uniq, avg_ms, max_ms, total_bytes in rows:
+            registry.append({
+                'kind': kind,
+                'profile': profile,
+                'count': int(cnt or 0),
+                'unique_fingerprints': int(uniq or 0),
+                'avg_render_ms': round(float(avg_ms), 2) if avg_ms is not None else None,
+                'max_render_ms': round(float(max_ms), 2) if max_ms is not None else None,
+                'total_bytes': int(total_bytes or 0)
+            })
+
+        snapshot = RENDER_METRICS.snapshot()
+        if str(request.args.get('reset', '') or '').strip() in ('1', 'true'):
+            RENDER_METRICS.reset()
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'timing_enabled': bool(RENDER_TIMING_ENABLED),
+                'render': snapshot,
+                'registry': registry
+            }
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'查询失败: {str(e)}'}), 500
+
+
 @certificate_bp.route('/api/certificate/templates', methods=['GET'])
 def get_certificate_templates():
     """获取证书模板列表"""
@@ -0,0 +1,78 @@
+"""敏感字段密文格式。
+
+    v1:<key_id>:<fernet token>
+
+key_id 是密钥 SHA-256 的前 4 字节（8 位十六进制），解密时直接选中对应密钥，
+不必在 OLD_ENCRYPTION_KEYS 里逐个试错。没有前缀的是旧格式（裸 Fernet token），仍可读取。
+
+二进制形式（供 BLOB/VARBINARY 列使用）：
+    0x01 | key_id(4 字节) | Fernet token 原始字节
+比 base64 文本短约四分之一；目前各列仍是 Text，写入默认使用文本形式。
+"""
+import base64
+import hashlib
+
+
+TEXT_PREFIX = 'v1:'
+BINARY_VERSION = 0x01
+_KID_BYTES = 4
+
+
+def key_id(key) -> str:
+    """Fernet 密钥（urlsafe base64 的 32 字节）对应的 key id"""
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return hashlib.sha256(bytes(key)).digest()[:_KID_BYTES].hex()
+
+
+def pack(kid: str, token) -> str:
+    if isinstance(token, bytes):
+        token = token.decode('ascii')
+    return f"{TEXT_PREFIX}{kid}:{token}"
+
+
+def pack_binary(kid: str, token) -> bytes:
+    if isinstance(token, str):
+        token = token.encode('ascii')
+    raw = base64.urlsafe_b64decode(token)
+    return bytes([BINARY_VERSION]) + bytes.fromhex(kid) + raw
+
+
+def unpack(value):
+    """返回 (key_id 或 None, Fernet token bytes)；旧格式 key_id 为 None"""
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value)
+        if value[:1] == bytes([BINARY_VERSION]) and len(value) > 1 + _KID_BYTES:
+            kid = value[1:1 + _KID_BYTES].hex()
+            return kid, base64.urlsafe_b64encode(value[1 + _KID_BYTES:])
+        return None, value
+    s = str(value)
+    if s.startswith(TEXT_PREFIX):
+        kid, sep, token = s[len(TEXT_PREFIX):].partition(':')
+        if sep:
+            return kid, token.encode('ascii')
+    return None, s.encode('ascii')
+
+
+def is_current(value, current_kid: str) -> bool:
+    if not value:
+        return True
+    kid, _token = unpack(value)
+    return kid == current_kid
+
+
+def decrypt_with(keyring: dict, current_kid: str, value) -> str:
+    """keyring：{key_id: Fernet}。带 key id 的直接解；旧格式先试当前密钥，再试其它密钥"""
+    kid, token = unpack(value)
+    if kid is not None and kid in keyring:
+        return keyring[kid].decrypt(token).decode()
+    order = [current_kid] + [k for k in keyring if k != current_kid]
+    last_error = None
+    for k in order:
+        try:
+            return keyring[k].decrypt(token).decode()
+        except Exception as e:
+            last_error = e
+    raise last_error or ValueError('no encryption key')
@@ -1,6 +1,14 @@
 #!/usr/bin/env sh
 set -e
 
+cd /app
+export FLASK_APP=app.py
+
+# 表结构以迁移为准；之后补齐历史数据并重算统计汇总（均可重复执行）
+flask db upgrade
 python /app/bootstrap_db.py
+python /app/backfill_school_initials.py
+python /app/backfill_masked_contacts.py
+python /app/rebuild_stats_rollup.py
 
 exec gunicorn -w ${GUNICORN_WORKERS:-2} -b 0.0.0.0:5000 --timeout ${GUNICORN_TIMEOUT:-120} app:app
@@ -0,0 +1,253 @@
+"""后台导出任务。
+
+报名列表导出（xlsx/csv）和证书打包在后台线程里执行，产物写到存储目录 EXPORT_DIR
+（默认 CERT_STORAGE_DIR/exports），任务状态与导入任务一样写 JSON，多个 worker 进程都能读到。
+
+- 任务完成后，GET /api/admin/export-jobs/<job_id> 返回带签名的短期下载链接（EXPORT_LINK_SECONDS）；
+- 同样的导出（类型 + 筛选条件相同）在 EXPORT_REUSE_SECONDS 内重复提交，直接复用进行中或已完成的任务；
+- 产物保留 EXPORT_RETENTION_SECONDS，启动新任务时顺带清理过期文件。
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+def _env_int(name, default):
+    try:
+        return int(str(os.environ.get(name, '') or '').strip() or default)
+    except Exception:
+        return default
+
+
+_CERT_BASE_DIR = str(os.environ.get('CERT_STORAGE_DIR', '') or '').strip() or os.path.join('/tmp', 'competition-web-certs')
+_EXPORT_DIR = str(os.environ.get('EXPORT_DIR', '') or '').strip() or os.path.join(_CERT_BASE_DIR, 'exports')
+_KEY_DIR = os.path.join(_EXPORT_DIR, 'keys')
+
+EXPORT_TYPES = ('applications', 'certificates')
+EXPORT_REUSE_SECONDS = max(0, _env_int('EXPORT_REUSE_SECONDS', 600))
+EXPORT_LINK_SECONDS = max(1, _env_int('EXPORT_LINK_SECONDS', 600))
+EXPORT_RETENTION_SECONDS = max(EXPORT_REUSE_SECONDS, _env_int('EXPORT_RETENTION_SECONDS', 24 * 60 * 60))
+
+_logger = logging.getLogger(__name__)
+_start_lock = threading.Lock()
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(_EXPORT_DIR, f"{os.path.basename(str(job_id))}.json")
+
+
+def _key_path(key: str) -> str:
+    return os.path.join(_KEY_DIR, f"{os.path.basename(str(key))}.json")
+
+
+def _write_json(path: str, payload: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_state(state: dict):
+    state['updated_at'] = datetime.now().isoformat()
+    _write_json(_job_path(state['job_id']), state)
+
+
+def export_key(export_type: str, options: dict) -> str:
+    """导出类型 + 参数的摘要，用于复用相同的导出"""
+    raw = json.dumps([export_type, options or {}], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def artifact_path(state: dict):
+    name = os.path.basename(str((state or {}).get('artifact') or ''))
+    return os.path.join(_EXPORT_DIR, name) if name else None
+
+
+def read_job(job_id: str):
+    return _read_json(_job_path(job_id))
+
+
+def _age_seconds(iso_ts) -> float:
+    try:
+        return (datetime.now() - datetime.fromisoformat(iso_ts or '')).total_seconds()
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+def _reusable(state) -> bool:
+    """进行中（且状态仍在刷新，进程没退出）或窗口内完成、产物还在的任务可以复用"""
+    if not state:
+        return False
+    status = state.get('status')
+    if status in ('queued', 'running'):
+        return _age_seconds(state.get('updated_at')) <= EXPORT_REUSE_SECONDS
+    if status != 'finished':
+        return False
+    path = artifact_path(state)
+    if not path or not os.path.isfile(path):
+        return False
+    return _age_seconds(state.get('finished_at')) <= EXPORT_REUSE_SECONDS
+
+
+def _prune():
+    """删除过期的任务状态、产物和复用索引"""
+    cutoff = time.time() - EXPORT_RETENTION_SECONDS
+    for folder in (_EXPORT_DIR, _KEY_DIR):
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            continue
+        for name in names:
+            path = os.path.join(folder, name)
+            try:
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def start_export_job(export_type: str, options=None):
+    """启动后台导出，返回 (job_id, 是否复用了已有任务)"""
+    if export_type not in EXPORT_TYPES:
+        raise ValueError(f'未知的导出类型: {export_type}')
+    options = dict(options or {})
+    key = export_key(export_type, options)
+
+    with _start_lock:
+        pointer = _read_json(_key_path(key)) or {}
+        existing = read_job(pointer.get('job_id') or '') if pointer.get('job_id') else None
+        if EXPORT_REUSE_SECONDS and _reusable(existing):
+            return existing['job_id'], True
+
+        _prune()
+        job_id = uuid.uuid4().hex
+        state = {
+            'job_id': job_id,
+            'export_type': export_type,
+            'options': options,
+            'key': key,
+            'status': 'queued',
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'progress': {
+                'stage': 'queued',
+                'rows': 0,
+            },
+            'result': None,
+            'error': None,
+            'artifact': None,
+        }
+        _write_state(state)
+        _write_json(_key_path(key), {'job_id': job_id})
+
+    t = threading.Thread(target=_run, args=(state,), daemon=True)
+    t.start()
+    return job_id, False
+
+
+def _export_applications(state, progress):
+    import application_export
+
+    options = state['options']
+    fmt = options.get('format') if options.get('format') in application_export.EXPORT_FORMATS else 'xlsx'
+    name = f"{state['job_id']}.{fmt}"
+    path = os.path.join(_EXPORT_DIR, name)
+    query = application_export.build_query(options.get('filters'))
+    if fmt == 'csv':
+        application_export.write_csv(query, path, progress=progress)
+    else:
+        application_export.write_xlsx(query, path, progress=progress)
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return name, f"报名列表导出_{ts}.{fmt}", {'row_count': state['progress']['rows']}
+
+
+def _export_certificates(state, progress):
+    from certificate_routes import write_certificate_bundle
+
+    options = state['options']
+    name = f"{state['job_id']}.zip"
+    path = os.path.join(_EXPORT_DIR, name)
+    found = write_certificate_bundle(
+        path, kind=options.get('kind') or '', task_id=options.get('task_id') or '',
+        asset_profile=options.get('profile') or ''
+    )
+    if found <= 0:
+        os.remove(path)
+        raise ValueError('当前没有可下载的已生成证书')
+    progress(found)
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return name, f"证书已生成缓存_{options.get('kind') or 'all'}_{ts}.zip", {'found': found}
+
+
+_EXPORTERS = {
+    'applications': _export_applications,
+    'certificates': _export_certificates,
+}
+
+
+def _run(state: dict):
+    from app import app as flask_app, db
+
+    progress = state['progress']
+
+    def _on_progress(rows):
+        progress['rows'] = rows
+        _write_state(state)
+
+    state['status'] = 'running'
+    state['started_at'] = datetime.now().isoformat()
+    progress['stage'] = 'exporting'
+    _write_state(state)
+    try:
+        with flask_app.app_context():
+            try:
+                artifact, filename, extra = _EXPORTERS[state['export_type']](state, _on_progress)
+            except Exception:
+                db.session.rollback()
+                raise
+        state['artifact'] = artifact
+        state['result'] = dict(extra, filename=filename, byte_size=os.path.getsize(artifact_path(state)))
+        state['status'] = 'finished'
+        progress['stage'] = 'finished'
+    except Exception as e:
+        state['status'] = 'failed'
+        state['error'] = str(e)
+        _logger.exception('export job %s failed', state.get('job_id'))
+    finally:
+        state['finished_at'] = datetime.now().isoformat()
+        _write_state(state)
+
+
+def _serializer():
+    from flask import current_app
+    from itsdangerous import URLSafeTimedSerializer
+    return URLSafeTimedSerializer(secret_key=current_app.config['SECRET_KEY'], salt='export-download')
+
+
+def create_download_token(job_id: str) -> str:
+    return _serializer().dumps({'job_id': str(job_id)})
+
+
+def verify_download_token(token: str):
+    """校验下载链接，返回 job_id；过期或签名不对返回 None"""
+    from itsdangerous import BadSignature, SignatureExpired
+    try:
+        payload = _serializer().loads(token, max_age=EXPORT_LINK_SECONDS)
+    except (BadSignature, SignatureExpired):
+        return None
+    return str((payload or {}).get('job_id') or '') or None
@@ -0,0 +1,64 @@
+"""导入错误日志的存取。
+
+错误日志 Excel 按 BLOB_CHUNK_SIZE 切块写入 import_log_blobs，ImportLog 上只记字节数；
+下载时逐块查询、逐块输出，不把整个文件读进内存。旧记录里的 Base64 内容（error_log_content）仍可下载。
+"""
+import base64
+import unicodedata
+from urllib.parse import quote
+
+
+BLOB_CHUNK_SIZE = 256 * 1024
+
+
+def save_error_log(import_log, content: bytes):
+    """替换 import_log 的错误日志（不提交事务）；content 为空表示没有错误日志"""
+    from app import db
+    from models import ImportLogBlob
+
+    table = ImportLogBlob.__table__
+    db.session.execute(table.delete().where(table.c.import_log_id == import_log.id))
+    content = bytes(content or b'')
+    for seq, start in enumerate(range(0, len(content), BLOB_CHUNK_SIZE)):
+        db.session.execute(table.insert().values(
+            import_log_id=import_log.id, seq=seq, data=content[start:start + BLOB_CHUNK_SIZE]
+        ))
+    import_log.error_log_size = len(content) or None
+    import_log.error_log_content = None
+
+
+def _iter_blobs(import_log_id):
+    from app import db
+    from models import ImportLogBlob
+
+    seq = -1
+    while True:
+        row = (
+            db.session.query(ImportLogBlob.seq, ImportLogBlob.data)
+            .filter(ImportLogBlob.import_log_id == import_log_id, ImportLogBlob.seq > seq)
+            .order_by(ImportLogBlob.seq.asc())
+            .first()
+        )
+        if row is None:
+            return
+        seq = row.seq
+        yield bytes(row.data)
+
+
+def open_error_log(import_log):
+    """返回 (字节数, 内容块迭代器)；没有错误日志时返回 None"""
+    if import_log is None:
+        return None
+    if import_log.error_log_size:
+        return int(import_log.error_log_size), _iter_blobs(import_log.id)
+    legacy = import_log.error_log_content
+    if legacy:
+        data = base64.b64decode(legacy)
+        return len(data), iter([data])
+    return None
+
+
+def attachment_header(filename: str) -> str:
+    """Content-Disposition（中文文件名用 RFC 5987 的 filename*）"""
+    simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii').replace('"', '')
+    return f"attachment; filename=\"{simple or 'download'}\"; filename*=UTF-8''{quote(filename, safe='')}"
@@ -0,0 +1,536 @@
+"""Excel 导入的批量对账引擎。
+
+1. 按列校验：单元格清洗、空值、文件内重复、取值范围都用 pandas 向量运算完成，
+   校验失败的行直接生成错误表；
+2. 只有通过校验的行进入对账：分块 IN 查询一次取回候选记录，在内存里按哈希表匹配，
+   最后用批量 UPDATE / INSERT 写回；
+3. 带 ImportLog 执行时按 IMPORT_CHUNK_ROWS 行分块提交，每块提交时把检查点写进
+   ImportLog，中断后用同一文件重新上传即可从最后提交的分块继续。检查点只记行号和计数，
+   每块更新的报名 ID 与对账错误各写一行 import_checkpoint_chunks，提交开销不随已导入行数增长。
+
+各行的校验顺序与错误原因与原来逐行查库的实现一致。
+"""
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import bindparam
+
+
+IN_CHUNK = 500
+
+
+def _env_int(name, default):
+    try:
+        return int(str(os.environ.get(name, '') or '').strip() or default)
+    except Exception:
+        return default
+
+
+# 每个提交分块包含的（通过校验的）行数
+IMPORT_CHUNK_ROWS = max(1, _env_int('IMPORT_CHUNK_ROWS', 1000))
+# 进度回调的最短间隔（秒）
+PROGRESS_INTERVAL = 1.0
+
+# 导入类型 -> [(引擎参数名, 必需列, 可接受的表头)]
+IMPORT_COLUMNS = {
+    'match_no': [
+        ('match_no_col', '参赛号', ['参赛号', '参赛编号', '参赛ID', 'match_no']),
+        ('phone_col', '手机号', ['手机号', '选手手机号', '参赛人手机号', '参赛手机号', '电话', '手机']),
+    ],
+    'award': [
+        ('match_no_col', '参赛号', ['参赛号']),
+        ('award_col', '获奖等级', ['获奖等级']),
+    ],
+    'excellent_coach': [
+        ('name_col', '指导老师姓名', ['指导老师姓名', '指导老师', '老师姓名', '姓名', 'teacher_name']),
+        ('phone_col', '指导老师电话', ['指导老师电话', '指导老师手机号', '老师电话', '电话', '手机号', 'teacher_phone']),
+    ],
+}
+
+
+def cell_to_str(value):
+    try:
+        import pandas as pd
+        if pd.isna(value):
+            return ''
+    except Exception:
+        pass
+    return str(value).strip() if value is not None else ''
+
+
+_BLANK_WORDS = ['nan', 'none', 'null', 'undefined']
+
+
+def is_blank_text(s):
+    txt = str(s or '').strip()
+    if not txt:
+        return True
+    low = txt.lower()
+    return low in _BLANK_WORDS
+
+
+def normalize_cells(col):
+    """整列版 cell_to_str：空单元格 -> ''，其余 str() 后去首尾空白"""
+    obj = pd.Series(col).astype(object)
+    return obj.where(obj.notna(), '').astype(str).str.strip()
+
+
+def normalize_truthy(col):
+    """整列版 str(v or '').strip()（优秀辅导员导入沿用的写法：NaN 会变成 'nan'）"""
+    obj = pd.Series(col).astype(object)
+    out = obj.astype(str).str.strip()
+    out[~obj.astype(bool)] = ''
+    return out
+
+
+def blank_mask(norm):
+    """整列版 is_blank_text（输入为已清洗的字符串列）"""
+    return norm.eq('') | norm.str.lower().isin(_BLANK_WORDS)
+
+
+def phone_hash(phone: str) -> str:
+    return hashlib.sha256(phone.encode()).hexdigest()
+
+
+def match_key(match_no):
+    """参赛号的比较键：生产库 utf8mb4_unicode_ci 排序规则下参赛号不区分大小写，内存里的比较要与之一致"""
+    return match_no.casefold() if isinstance(match_no, str) else match_no
+
+
+def match_lookup_keys(match_nos):
+    """按参赛号查库用的 IN 列表：不区分大小写的库上原值即可，区分大小写的库（sqlite）补上全大写/全小写写法"""
+    keys = []
+    for m in match_nos:
+        keys.extend((m, m.upper(), m.lower()))
+    return keys
+
+
+def chunks(seq, size=IN_CHUNK):
+    seq = list(seq)
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def fetch_in(session, columns, key_column, keys, size=IN_CHUNK):
+    """按 key_column IN (...) 分块查询，返回所有行"""
+    keys = [k for k in dict.fromkeys(keys) if k is not None]
+    rows = []
+    for part in chunks(keys, size):
+        rows.extend(session.query(*columns).filter(key_column.in_(part)).all())
+    return rows
+
+
+def bulk_update(session, model, changes, size=IN_CHUNK):
+    """changes：[{'id': .., 列: 值}, ...]，同一批各行的列集合需一致"""
+    if not changes:
+        return 0
+    table = model.__table__
+    cols = [k for k in changes[0] if k != 'id']
+    if table.name == 'applications':
+        # Core 更新绕过会话事件，统计汇总表在这里同步
+        import stats_rollup
+        stats_rollup.track_bulk_update(session, changes)
+    stmt = table.update().where(table.c.id == bindparam('_id')).values(**{c: bindparam(f"_v_{c}") for c in cols})
+    for part in chunks(changes, size):
+        session.execute(stmt, [dict({'_id': ch['id']}, **{f"_v_{c}": ch[c] for c in cols}) for ch in part])
+    return len(changes)
+
+
+def resolve_columns(import_type, columns):
+    """按候选表头找到实际列名，返回引擎参数；缺列时抛 ValueError（消息可直接返回给前端）"""
+    found = {}
+    missing = []
+    for arg, label, candidates in IMPORT_COLUMNS[import_type]:
+        col = next((c for c in candidates if c in columns), None)
+        if col is None:
+            missing.append(label)
+        else:
+            found[arg] = col
+    if missing:
+        raise ValueError(f'Excel文件缺少必要的列: {", ".join(missing)}')
+    return found
+
+
+class ImportReport:
+    def __init__(self, total=0, columns=(), progress=None):
+        self.total_count = int(total)
+        self.success_count = 0
+        self.columns = list(columns)
+        self.updated_ids = []
+        self._frames = []
+        self._rows = []
+        self.expected_rows = None
+        self._progress = progress
+        self._last_tick = 0.0
+
+    def tick(self, processed, force=False):
+        """上报进度 progress(已处理行数, 成功数, 失败数, 预计总行数)；非 force 时按 PROGRESS_INTERVAL 节流"""
+        if self._progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_tick < PROGRESS_INTERVAL:
+            return
+        self._last_tick = now
+        self._progress(int(processed), self.success_count, self.failed_count, self.expected_rows)
+
+    def fail(self, row: dict, reason: str):
+        row = dict(row)
+        row['错误原因'] = reason
+        self._rows.append(row)
+
+    def fail_frame(self, frame, reason: str, validation=True):
+        """整批失败的行：frame 的列与 self.columns 一致；validation=False 表示对账阶段的错误"""
+        if len(frame):
+            frame = frame.copy()
+            frame['错误原因'] = reason
+            if validation:
+                self._frames.append(frame)
+            else:
+                self._rows.extend(frame.to_dict('records'))
+
+    def apply_errors(self, start=0):
+        """对账阶段的错误行（dict 列表，检查点里保存这部分）；start 为起始下标"""
+        return self._rows[start:]
+
+    @property
+    def apply_error_count(self):
+        return len(self._rows)
+
+    @property
+    def failed_count(self):
+        return sum(len(f) for f in self._frames) + len(self._rows)
+
+    def error_frame(self):
+        """错误明细（按行号排序，与逐行处理时的顺序一致）"""
+        frames = list(self._frames)
+        if self._rows:
+            frames.append(pd.DataFrame(self._rows))
+        if not frames:
+            return pd.DataFrame([])
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values('行号', kind='stable').reset_index(drop=True)[self.columns + ['错误原因']]
+
+    @property
+    def error_data(self):
+        return self.error_frame().to_dict('records') if self.failed_count else []
+
+
+def _row_numbers(df):
+    return pd.Series(df.index, index=df.index) + 2
+
+
+def _duplicated(col, seen):
+    """文件内重复：本批内重复或在之前的批次出现过（seen 跨批次累积）"""
+    dup = col.duplicated(keep='first') | col.isin(seen)
+    seen.update(col[~dup])
+    return dup
+
+
+def _latest(rows):
+    """同一手机号多条报名时取最新一条（created_at 倒序，与原逐行查询一致）"""
+    best = None
+    for r in rows:
+        key = (r.created_at is not None, r.created_at or datetime.min, r.id)
+        if best is None or key > best[0]:
+            best = (key, r)
+    return best[1] if best else None
+
+
+# ---- 参赛号 ----
+
+def _validate_match_numbers(df, report, seen, match_no_col, phone_col):
+    frame = pd.DataFrame({
+        '行号': _row_numbers(df),
+        '手机号': normalize_cells(df[phone_col]),
+        '参赛号': normalize_cells(df[match_no_col]),
+    }, index=df.index)
+
+    no_match = blank_mask(frame['参赛号'])
+    report.fail_frame(frame[no_match], '参赛号为空')
+    rest = frame[~no_match]
+    dup = _duplicated(rest['参赛号'].map(match_key), seen)
+    report.fail_frame(rest[dup], '参赛号在本次导入文件中重复')
+    rest = rest[~dup]
+    no_phone = blank_mask(rest['手机号'])
+    report.fail_frame(rest[no_phone], '手机号为空')
+    return rest[~no_phone]
+
+
+def _apply_match_numbers(session, rest, report):
+    from models import Application
+
+    hashes = [phone_hash(p) for p in rest['手机号']]
+    by_hash = {}
+    for r in fetch_in(session, (Application.id, Application.contact_phone_hash, Application.status, Application.created_at, Application.match_no),
+                      Application.contact_phone_hash, hashes):
+        by_hash.setdefault(r.contact_phone_hash, []).append(r)
+    candidates = {h: _latest(rows) for h, rows in by_hash.items()}
+
+    # 参赛号比较键 -> 当前占用的报名 id；报名 id -> 当前参赛号（随逐行分配同步更新）
+    owner = {}
+    current = {}
+    for r in fetch_in(session, (Application.id, Application.match_no), Application.match_no, match_lookup_keys(rest['参赛号'])):
+        owner[match_key(r.match_no)] = r.id
+        current[r.id] = r.match_no
+    for app in candidates.values():
+        current.setdefault(app.id, app.match_no)
+        if app.match_no:
+            owner.setdefault(match_key(app.match_no), app.id)
+
+    original = dict(current)
+    for (row_no, phone, match_no), h in zip(rest.itertuples(index=False, name=None), hashes):
+        base = {'行号': row_no, '手机号': phone, '参赛号': match_no}
+        try:
+            app = candidates.get(h)
+            if app is None:
+                report.fail(base, '未找到匹配的报名记录')
+                continue
+            if app.status == 'rejected':
+                report.fail(base, '该报名已退回(rejected)，不分配参赛号')
+                continue
+
+            taken_by = owner.get(match_key(match_no))
+            if taken_by is not None and taken_by != app.id:
+                report.fail(base, f'参赛号已被其他报名占用(报名ID={taken_by})')
+                continue
+
+            old = current.get(app.id)
+            if old and owner.get(match_key(old)) == app.id:
+                del owner[match_key(old)]
+            owner[match_key(match_no)] = app.id
+            current[app.id] = match_no
+            report.success_count += 1
+            report.updated_ids.append(app.id)
+        except Exception as e:
+            report.fail(base, f'处理异常: {str(e)}')
+
+    changed = [app_id for app_id, m in current.items() if m != original.get(app_id)]
+    if changed:
+        # 先清空再写入：逐行分配中间可能出现“先释放、后占用”，直接按最终值更新会撞唯一索引
+        bulk_update(session, Application, [{'id': i, 'match_no': None} for i in changed if original.get(i)])
+        bulk_update(session, Application, [{'id': i, 'match_no': current[i]} for i in changed])
+
+
+# ---- 获奖等级 ----
+
+def _validate_awards(df, report, seen, match_no_col, award_col, award_levels=None):
+    frame = pd.DataFrame({
+        '行号': _row_numbers(df),
+        '参赛号': normalize_cells(df[match_no_col]),
+        '获奖等级': normalize_cells(df[award_col]),
+    }, index=df.index)
+
+    blank = blank_mask(frame['参赛号']) | blank_mask(frame['获奖等级'])
+    report.fail_frame(frame[blank], '参赛号或获奖等级为空')
+    rest = frame[~blank]
+    if award_levels:
+        bad = ~rest['获奖等级'].isin(list(award_levels))
+        report.fail_frame(rest[bad], f'获奖等级不合法（允许：{",".join(award_levels)}）')
+        rest = rest[~bad]
+    return rest
+
+
+def _apply_awards(session, rest, report):
+    from models import Application
+
+    rows = fetch_in(session, (Application.id, Application.match_no), Application.match_no, match_lookup_keys(rest['参赛号']))
+    by_match_no = {match_key(r.match_no): r.id for r in rows}
+    app_ids = rest['参赛号'].map(match_key).map(by_match_no)
+    missing = app_ids.isna()
+    report.fail_frame(rest[missing], '未找到匹配的参赛号', validation=False)
+
+    matched = rest[~missing].assign(app_id=app_ids[~missing].astype(int))
+    report.success_count += len(matched)
+    report.updated_ids.extend(int(i) for i in matched['app_id'])
+    # 同一报名出现多行时以最后一行为准
+    final = matched.drop_duplicates('app_id', keep='last')
+    bulk_update(session, Application, [{'id': int(i), 'award_level': v} for i, v in zip(final['app_id'], final['获奖等级'])])
+
+
+# ---- 优秀辅导员 ----
+
+def _validate_excellent_coaches(df, report, seen, name_col, phone_col):
+    frame = pd.DataFrame({
+        '行号': _row_numbers(df),
+        '指导老师姓名': normalize_truthy(df[name_col]),
+        '指导老师电话': normalize_truthy(df[phone_col]),
+    }, index=df.index)
+
+    blank = blank_mask(frame['指导老师姓名']) | blank_mask(frame['指导老师电话'])
+    report.fail_frame(frame[blank], '姓名或电话为空')
+    rest = frame[~blank]
+    dup = _duplicated(rest['指导老师电话'], seen)
+    report.fail_frame(rest[dup], '该电话在本次导入文件中重复')
+    return rest[~dup]
+
+
+def _apply_excellent_coaches(session, rest, report):
+    from app import encrypt_data
+    from models import ExcellentCoach
+
+    hashes = [phone_hash(p) for p in rest['指导老师电话']]
+    existing = {}
+    for r in fetch_in(session, (ExcellentCoach.id, ExcellentCoach.teacher_phone_hash), ExcellentCoach.teacher_phone_hash, hashes):
+        existing.setdefault(r.teacher_phone_hash, r.id)
+
+    updates = []
+    inserts = []
+    now = datetime.utcnow()
+    for (row_no, name, phone), h in zip(rest.itertuples(index=False, name=None), hashes):
+        try:
+            values = {'teacher_name': name, 'teacher_phone_encrypted': encrypt_data(phone), 'teacher_phone_hash': h}
+            if h in existing:
+                updates.append(dict(values, id=existing[h]))
+            else:
+                inserts.append(dict(values, created_at=now, updated_at=now))
+            report.success_count += 1
+        except Exception as e:
+            report.fail({'行号': row_no, '指导老师姓名': name, '指导老师电话': phone}, f'处理异常: {str(e)}')
+
+    bulk_update(session, ExcellentCoach, updates)
+    if inserts:
+        table = ExcellentCoach.__table__
+        for part in chunks(inserts):
+            session.execute(table.insert(), part)
+
+
+# 导入类型 -> (错误表列, 校验, 对账写入)
+_IMPORTERS = {
+    'match_no': (['行号', '手机号', '参赛号'], _validate_match_numbers, _apply_match_numbers),
+    'award': (['行号', '参赛号', '获奖等级'], _validate_awards, _apply_awards),
+    'excellent_coach': (['行号', '指导老师姓名', '指导老师电话'], _validate_excellent_coaches, _apply_excellent_coaches),
+}
+
+
+def _json_default(o):
+    return o.item() if hasattr(o, 'item') else str(o)
+
+
+def _save_checkpoint_chunk(session, import_log_id, checkpoint_row, state):
+    from models import ImportCheckpointChunk
+
+    session.execute(ImportCheckpointChunk.__table__.insert().values(
+        import_log_id=import_log_id,
+        checkpoint_row=int(checkpoint_row),
+        data=json.dumps(state, ensure_ascii=False, default=_json_default),
+    ))
+
+
+def _checkpoint_chunks(session, import_log_id, done_row):
+    """按提交顺序逐块产出检查点明细（JSON 文本），只取 done_row 及之前提交的分块"""
+    from models import ImportCheckpointChunk
+
+    table = ImportCheckpointChunk.__table__
+    last = 0
+    while True:
+        row = session.execute(
+            table.select()
+            .with_only_columns(table.c.checkpoint_row, table.c.data)
+            .where(table.c.import_log_id == import_log_id, table.c.checkpoint_row > last,
+                   table.c.checkpoint_row <= done_row)
+            .order_by(table.c.checkpoint_row.asc())
+            .limit(1)
+        ).first()
+        if row is None:
+            return
+        last = row.checkpoint_row
+        yield row.data
+
+
+def clear_checkpoint(session, import_log):
+    """删掉 import_log 的检查点明细（不提交事务）"""
+    from models import ImportCheckpointChunk
+
+    table = ImportCheckpointChunk.__table__
+    session.execute(table.delete().where(table.c.import_log_id == import_log.id))
+    import_log.checkpoint_data = None
+
+
+def _batches(source):
+    """DataFrame 或 sheet_reader.SheetReader -> (表头, DataFrame 批次, 预计总行数)"""
+    if isinstance(source, pd.DataFrame):
+        return source.columns, [source], len(source)
+    return source.columns, source, getattr(source, 'total_rows', None)
+
+
+def run_import(session, import_type, source, award_levels=None, progress=None, import_log=None, chunk_rows=None):
+    """按导入类型解析列并执行导入。
+
+    source 为 DataFrame 或按批产出 DataFrame 的 SheetReader：逐批校验，通过校验的行攒够
+    chunk_rows 行就对账写入一次。不带 import_log 时不提交事务；带 import_log 时每块提交一次，
+    并把检查点写进 import_log（已有检查点则跳过检查点之前的行，接着导入）。
+    """
+    if import_type not in _IMPORTERS:
+        raise ValueError(f'未知的导入类型: {import_type}')
+    header, batches, expected_rows = _batches(source)
+    columns = resolve_columns(import_type, header)
+    error_columns, validate, apply = _IMPORTERS[import_type]
+    if import_type == 'award':
+        columns['award_levels'] = award_levels
+
+    report = ImportReport(0, error_columns, progress)
+    report.expected_rows = expected_rows
+    done_row = 0
+    if import_log is not None and import_log.checkpoint_row:
+        # 续跑：恢复已提交分块的结果，跳过检查点之前的行
+        done_row = int(import_log.checkpoint_row)
+        state = json.loads(import_log.checkpoint_data or '{}')
+        report.success_count = int(state.get('success_count') or 0)
+        for data in _checkpoint_chunks(session, import_log.id, done_row):
+            part = json.loads(data)
+            report.updated_ids.extend(int(i) for i in part.get('updated_ids') or [])
+            for row in part.get('errors') or []:
+                report.fail({k: v for k, v in row.items() if k != '错误原因'}, row.get('错误原因'))
+
+    size = max(1, int(chunk_rows or IMPORT_CHUNK_ROWS))
+    seen = set()
+    pending = []
+    pending_rows = 0
+    processed = 0
+
+    def _flush(part):
+        ids_before, errors_before = len(report.updated_ids), report.apply_error_count
+        apply(session, part, report)
+        if import_log is not None:
+            import_log.total_count = report.total_count
+            import_log.success_count = report.success_count
+            import_log.failed_count = report.failed_count
+            import_log.checkpoint_row = int(part['行号'].iloc[-1])
+            import_log.checkpoint_data = json.dumps({'success_count': report.success_count})
+            # 只追加本块的增量；只需保存对账阶段的错误，校验阶段的错误续跑时会重新算出
+            _save_checkpoint_chunk(session, import_log.id, import_log.checkpoint_row, {
+                'updated_ids': report.updated_ids[ids_before:],
+                'errors': report.apply_errors(errors_before),
+            })
+            session.commit()
+
+    for df in batches:
+        report.total_count += len(df)
+        rest = validate(df, report, seen, **columns)
+        if done_row:
+            rest = rest[rest['行号'] > done_row]
+        processed += len(df) - len(rest)
+        if len(rest):
+            pending.append(rest)
+            pending_rows += len(rest)
+        while pending_rows >= size:
+            frame = pd.concat(pending) if len(pending) > 1 else pending[0]
+            part, left = frame.iloc[:size], frame.iloc[size:]
+            _flush(part)
+            pending = [left] if len(left) else []
+            pending_rows = len(left)
+            processed += len(part)
+            report.tick(processed, force=True)
+        report.tick(processed)
+
+    if pending_rows:
+        _flush(pd.concat(pending) if len(pending) > 1 else pending[0])
+    if import_log is not None:
+        import_log.total_count = report.total_count
+    report.expected_rows = report.total_count
+    report.tick(report.total_count, force=True)
+    return report
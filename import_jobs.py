@@ -0,0 +1,190 @@
+"""后台导入任务。
+
+上传的表格先落盘，由后台线程流式读取并写库，进度写进任务 JSON（与证书任务一样，多个
+worker 进程都能读到），前端轮询 /api/admin/import-jobs/<job_id>。
+
+写库按分块提交，检查点记在 ImportLog 上（见 admin_routes.run_logged_import）：任务失败时
+已提交的分块保留，用同一文件重新上传会从检查点继续；ImportLog 在任务结束时才标记为 completed。
+
+后台线程随 worker 进程退出而中断时，任务 JSON 会停在 queued/running。查询时状态超过
+IMPORT_STALE_SECONDS（与 ImportLog 判断中断用的是同一个值）没有刷新，就把任务标记为失败。
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+
+_JOB_DIR = str(os.environ.get('IMPORT_JOB_DIR', '') or '').strip() or os.path.join('/tmp', 'competition-web-imports')
+
+IMPORT_TYPES = ('match_no', 'award', 'excellent_coach')
+
+_logger = logging.getLogger(__name__)
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(_JOB_DIR, f"{os.path.basename(str(job_id))}.json")
+
+
+def _write_state(state: dict):
+    os.makedirs(_JOB_DIR, exist_ok=True)
+    state['updated_at'] = datetime.now().isoformat()
+    path = _job_path(state['job_id'])
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _is_stale(state: dict) -> bool:
+    from admin_routes import IMPORT_STALE_SECONDS
+
+    try:
+        touched = datetime.fromisoformat(state.get('updated_at') or '')
+    except (TypeError, ValueError):
+        return True
+    return (datetime.now() - touched).total_seconds() > IMPORT_STALE_SECONDS
+
+
+def read_job(job_id: str):
+    try:
+        with open(_job_path(job_id), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except Exception:
+        return None
+    if state.get('status') in ('queued', 'running') and _is_stale(state):
+        state['status'] = 'failed'
+        state['error'] = '导入任务已中断（服务进程已重启或退出），请重新上传同一文件，将从上次的检查点继续'
+        state['finished_at'] = datetime.now().isoformat()
+        state['progress']['stage'] = 'failed'
+        try:
+            os.remove(state.get('upload_path') or '')
+        except OSError:
+            pass
+        try:
+            _write_state(state)
+        except OSError:
+            pass
+    state.pop('upload_path', None)
+    return state
+
+
+def start_import_job(import_type: str, file, options=None) -> str:
+    """保存上传文件并启动后台导入，返回 job_id"""
+    if import_type not in IMPORT_TYPES:
+        raise ValueError(f'未知的导入类型: {import_type}')
+    job_id = uuid.uuid4().hex
+    os.makedirs(_JOB_DIR, exist_ok=True)
+    import sheet_reader
+
+    ext = sheet_reader.extension_of(file.filename) or '.xlsx'
+    upload_path, digest = sheet_reader.spool_upload(file, os.path.join(_JOB_DIR, f"{job_id}.upload{ext}"))
+
+    state = {
+        'job_id': job_id,
+        'import_type': import_type,
+        'filename': str(file.filename or ''),
+        'options': dict(options or {}),
+        'status': 'queued',
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+        'progress': {
+            'stage': 'queued',
+            'total_rows': None,
+            'processed_rows': 0,
+            'success_count': 0,
+            'failed_count': 0,
+        },
+        'result': None,
+        'error': None,
+        'upload_path': upload_path,
+        'content_hash': digest,
+    }
+    _write_state(state)
+
+    t = threading.Thread(target=_run, args=(state,), daemon=True)
+    t.start()
+    return job_id
+
+
+def _run(state: dict):
+    from app import app as flask_app, db
+
+    progress = state['progress']
+
+    def _stage(name):
+        progress['stage'] = name
+        _write_state(state)
+
+    def _on_progress(processed, success, failed, total=None):
+        progress.update(processed_rows=processed, success_count=success, failed_count=failed)
+        if total is not None:
+            progress['total_rows'] = total
+        _write_state(state)
+
+    state['status'] = 'running'
+    state['started_at'] = datetime.now().isoformat()
+    try:
+        with flask_app.app_context():
+            try:
+                _stage('applying')
+                from admin_routes import run_logged_import
+
+                import_log, report = run_logged_import(
+                    state['import_type'], state['upload_path'], state['filename'], state['content_hash'],
+                    force=bool(state['options'].get('force')), progress=_on_progress
+                )
+            except Exception:
+                db.session.rollback()
+                raise
+
+            if report is None:
+                if import_log.status != 'completed':
+                    raise ValueError(f'相同文件正在导入中（导入记录 #{import_log.id}），请稍后查看结果')
+                state['result'] = {
+                    'total_count': import_log.total_count,
+                    'success_count': import_log.success_count,
+                    'failed_count': import_log.failed_count,
+                    'error_log_available': import_log.error_log_available,
+                    'import_log_id': import_log.id,
+                    'duplicate': True,
+                }
+                state['status'] = 'finished'
+                progress['stage'] = 'finished'
+                return
+
+            _on_progress(report.total_count, report.success_count, report.failed_count, report.total_count)
+            result = {
+                'total_count': report.total_count,
+                'success_count': report.success_count,
+                'failed_count': report.failed_count,
+                'error_log_available': import_log.error_log_available,
+                'import_log_id': import_log.id,
+            }
+            if state['import_type'] == 'award' and state['options'].get('auto_generate') and report.updated_ids:
+                try:
+                    from certificate_routes import _start_background_cert_task
+                    result['task_id'] = _start_background_cert_task(
+                        application_ids=report.updated_ids,
+                        source=f'award-import:{import_log.id}'
+                    )
+                except Exception as e:
+                    result['cert_error'] = f'证书批量生成失败: {str(e)}'
+
+        state['result'] = result
+        state['status'] = 'finished'
+        progress['stage'] = 'finished'
+    except Exception as e:
+        state['status'] = 'failed'
+        state['error'] = str(e)
+        _logger.exception('import job %s failed', state.get('job_id'))
+    finally:
+        state['finished_at'] = datetime.now().isoformat()
+        try:
+            os.remove(state.get('upload_path') or '')
+        except OSError:
+            pass
+        _write_state(state)
@@ -0,0 +1,85 @@
+"""hot lookup indexes on applications
+
+Revision ID: 3b7e2c41a9d0
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+表由应用启动时的 db.create_all() 创建，新库已经带有这些索引；
+本迁移只给历史库补齐，因此每一步都先检查是否已存在。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e2c41a9d0'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+TABLE = 'applications'
+
+# (索引名, 列, 是否唯一)
+INDEXES = [
+    ('uq_applications_match_no', ['match_no'], True),
+    ('ix_applications_created_at', ['created_at'], False),
+    ('ix_applications_status_created_at', ['status', 'created_at'], False),
+    ('ix_applications_category_level_created_at', ['category', 'education_level', 'created_at'], False),
+    ('ix_applications_education_level', ['education_level'], False),
+    ('ix_applications_teacher_name_phone_hash', ['teacher_name', 'teacher_phone_hash', 'created_at'], False),
+    ('ix_applications_contact_phone_hash_status', ['contact_phone_hash', 'status'], False),
+    ('ix_applications_openid_created_at', ['openid', 'created_at'], False),
+]
+
+# 被上面复合索引的前缀覆盖的旧单列索引
+SUPERSEDED = [
+    ('ix_applications_contact_phone_hash', ['contact_phone_hash']),
+    ('ix_applications_openid', ['openid']),
+]
+
+
+def _index_names(bind):
+    return {ix.get('name') for ix in sa.inspect(bind).get_indexes(TABLE)}
+
+
+def _check_match_no_duplicates(bind):
+    # 空串统一成 NULL，避免唯一索引把多个“未分配”视为重复
+    bind.execute(sa.text(f"UPDATE {TABLE} SET match_no = NULL WHERE match_no IS NOT NULL AND TRIM(match_no) = ''"))
+    dup = bind.execute(sa.text(
+        f"SELECT match_no, COUNT(*) AS n FROM {TABLE} "
+        f"WHERE match_no IS NOT NULL GROUP BY match_no HAVING COUNT(*) > 1 LIMIT 20"
+    )).fetchall()
+    if dup:
+        detail = ', '.join(f"{row[0]}×{row[1]}" for row in dup)
+        raise RuntimeError(f"applications.match_no 存在重复值，无法建立唯一索引，请先处理：{detail}")
+
+
+def upgrade():
+    bind = op.get_bind()
+    existing = _index_names(bind)
+
+    for name, cols, unique in INDEXES:
+        if name in existing:
+            continue
+        if unique and cols == ['match_no']:
+            _check_match_no_duplicates(bind)
+        op.create_index(name, TABLE, cols, unique=unique)
+
+    existing = _index_names(bind)
+    for name, _cols in SUPERSEDED:
+        if name in existing:
+            op.drop_index(name, table_name=TABLE)
+
+
+def downgrade():
+    bind = op.get_bind()
+    existing = _index_names(bind)
+
+    for name, cols in SUPERSEDED:
+        if name not in existing:
+            op.create_index(name, TABLE, cols, unique=False)
+
+    for name, _cols, _unique in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name=TABLE)
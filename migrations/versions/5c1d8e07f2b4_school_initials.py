@@ -0,0 +1,41 @@
+"""applications.school_initials
+
+Revision ID: 5c1d8e07f2b4
+Revises: c4f1a7e9b2d6
+Create Date: 2026-10-18 14:00:00
+
+学校名拼音首字母落库并建索引；历史数据升级后执行 python backfill_school_initials.py 补齐。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1d8e07f2b4'
+down_revision = 'c4f1a7e9b2d6'
+branch_labels = None
+depends_on = None
+
+
+TABLE = 'applications'
+COLUMN = 'school_initials'
+INDEX = 'ix_applications_school_initials'
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if COLUMN not in {c.get('name') for c in insp.get_columns(TABLE)}:
+        op.add_column(TABLE, sa.Column(COLUMN, sa.String(length=100), nullable=True))
+    if INDEX not in {ix.get('name') for ix in sa.inspect(bind).get_indexes(TABLE)}:
+        op.create_index(INDEX, TABLE, [COLUMN], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if INDEX in {ix.get('name') for ix in insp.get_indexes(TABLE)}:
+        op.drop_index(INDEX, table_name=TABLE)
+    if COLUMN in {c.get('name') for c in insp.get_columns(TABLE)}:
+        with op.batch_alter_table(TABLE) as batch_op:
+            batch_op.drop_column(COLUMN)
@@ -0,0 +1,48 @@
+"""applications masked contact fields
+
+Revision ID: 8a4f6d93c1e7
+Revises: 5c1d8e07f2b4
+Create Date: 2026-10-19 09:00:00
+
+脱敏展示值落库；历史数据升级后执行 python backfill_masked_contacts.py 补齐。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4f6d93c1e7'
+down_revision = '5c1d8e07f2b4'
+branch_labels = None
+depends_on = None
+
+
+TABLE = 'applications'
+COLUMNS = (
+    'contact_phone_masked',
+    'contact_email_masked',
+    'teacher_phone_masked',
+    'leader_phone_masked',
+    'participant_phone_masked',
+    'participant_email_masked',
+)
+
+
+def _column_names(bind):
+    return {c.get('name') for c in sa.inspect(bind).get_columns(TABLE)}
+
+
+def upgrade():
+    existing = _column_names(op.get_bind())
+    for name in COLUMNS:
+        if name not in existing:
+            op.add_column(TABLE, sa.Column(name, sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    existing = _column_names(op.get_bind())
+    drop = [name for name in COLUMNS if name in existing]
+    if drop:
+        with op.batch_alter_table(TABLE) as batch_op:
+            for name in drop:
+                batch_op.drop_column(name)
@@ -0,0 +1,69 @@
+"""application_stats rollup table
+
+Revision ID: a5d3c8e1f902
+Revises: f7c3a1d58e20
+Create Date: 2026-10-19 20:00:00
+
+报名统计汇总表：每种维度组合一行计数，升级时按 applications 全量重算一次
+（新库启动时 create_all 可能已建好空表，这里同样重算）。
+"""
+from collections import Counter
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d3c8e1f902'
+down_revision = 'f7c3a1d58e20'
+branch_labels = None
+depends_on = None
+
+
+TABLE = 'application_stats'
+DIMENSIONS = (
+    ('category', 50),
+    ('task', 100),
+    ('education_level', 20),
+    ('school_region', 100),
+    ('school_city', 100),
+    ('school_district', 100),
+    ('school_name', 100),
+    ('status', 20),
+    ('award_level', 20),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if TABLE not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            TABLE,
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('key_hash', sa.String(length=40), nullable=False, unique=True),
+            *[sa.Column(name, sa.String(length=size), nullable=False, server_default='') for name, size in DIMENSIONS],
+            sa.Column('app_count', sa.Integer(), nullable=False, server_default='0'),
+        )
+
+    names = [name for name, _size in DIMENSIONS]
+    apps = sa.table('applications', *[sa.column(n) for n in names], sa.column('id'))
+    stats = sa.table(TABLE, sa.column('key_hash'), *[sa.column(n) for n in names], sa.column('app_count'))
+
+    counts = Counter()
+    rows = bind.execute(sa.select(*[apps.c[n] for n in names], sa.func.count(apps.c.id)).group_by(*[apps.c[n] for n in names]))
+    for row in rows:
+        counts[tuple('' if v is None else str(v) for v in row[:-1])] += int(row[-1])
+
+    bind.execute(stats.delete())
+    payload = [
+        dict(zip(names, dims), key_hash=hashlib.sha1('\x1f'.join(dims).encode('utf-8')).hexdigest(), app_count=n)
+        for dims, n in counts.items()
+    ]
+    for start in range(0, len(payload), 1000):
+        bind.execute(stats.insert(), payload[start:start + 1000])
+
+
+def downgrade():
+    if TABLE in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table(TABLE)
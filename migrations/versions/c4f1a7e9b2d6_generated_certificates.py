@@ -0,0 +1,60 @@
+"""generated_certificates registry
+
+Revision ID: c4f1a7e9b2d6
+Revises: 3b7e2c41a9d0
+Create Date: 2026-10-18 10:05:00
+
+已生成证书登记表（models.GeneratedCertificate）。新库由 db.create_all() 建表；
+只跑 flask db upgrade 的库在这里建表，已存在时跳过，只补齐缺少的索引。
+历史的 manifests/*.json 不导入：登记表里没有的证书下载时重新生成并登记。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1a7e9b2d6'
+down_revision = '3b7e2c41a9d0'
+branch_labels = None
+depends_on = None
+
+
+TABLE = 'generated_certificates'
+
+# (索引名, 列)
+INDEXES = [
+    ('ix_generated_certificates_application_id', ['application_id']),
+    ('ix_generated_certificates_fingerprint', ['fingerprint']),
+    ('ix_generated_cert_kind_profile_app', ['kind', 'profile', 'application_id']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if TABLE not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            TABLE,
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('cert_key', sa.String(length=64), nullable=False),
+            sa.Column('application_id', sa.Integer(), nullable=True),
+            sa.Column('profile', sa.String(length=20), nullable=False, server_default=''),
+            sa.Column('fingerprint', sa.String(length=64), nullable=False),
+            sa.Column('storage_key', sa.String(length=255), nullable=False),
+            sa.Column('byte_size', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('render_ms', sa.Float(), nullable=True),
+            sa.Column('filename', sa.String(length=255), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint('kind', 'cert_key', 'profile', name='uq_generated_cert_kind_key_profile'),
+        )
+
+    existing = {ix.get('name') for ix in sa.inspect(bind).get_indexes(TABLE)}
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, TABLE, columns)
+
+
+def downgrade():
+    if TABLE in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table(TABLE)
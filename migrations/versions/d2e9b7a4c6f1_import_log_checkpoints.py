@@ -0,0 +1,67 @@
+"""import_logs status, content hash and checkpoint chunks
+
+Revision ID: d2e9b7a4c6f1
+Revises: 8a4f6d93c1e7
+Create Date: 2026-10-19 14:00:00
+
+分块提交的导入在 ImportLog 上记录检查点；content_hash 用于识别重复上传与续跑。
+检查点明细（models.ImportCheckpointChunk）每个提交分块一行，记该块更新的报名 ID 与对账错误。
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e9b7a4c6f1'
+down_revision = '8a4f6d93c1e7'
+branch_labels = None
+depends_on = None
+
+
+TABLE = 'import_logs'
+INDEX = 'ix_import_logs_type_content_hash'
+CHUNKS = 'import_checkpoint_chunks'
+
+
+def _columns():
+    return [
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='completed'),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('checkpoint_row', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('checkpoint_data', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade():
+    insp = sa.inspect(op.get_bind())
+    existing = {c.get('name') for c in insp.get_columns(TABLE)}
+    for column in _columns():
+        if column.name not in existing:
+            op.add_column(TABLE, column)
+    if INDEX not in {i.get('name') for i in insp.get_indexes(TABLE)}:
+        op.create_index(INDEX, TABLE, ['import_type', 'content_hash'])
+    if CHUNKS not in insp.get_table_names():
+        op.create_table(
+            CHUNKS,
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('import_log_id', sa.Integer(), sa.ForeignKey('import_logs.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('checkpoint_row', sa.Integer(), nullable=False),
+            sa.Column('data', sa.Text().with_variant(mysql.MEDIUMTEXT(), 'mysql'), nullable=False),
+            sa.UniqueConstraint('import_log_id', 'checkpoint_row', name='uq_import_checkpoint_chunks_log_row'),
+        )
+
+
+def downgrade():
+    insp = sa.inspect(op.get_bind())
+    if CHUNKS in insp.get_table_names():
+        op.drop_table(CHUNKS)
+    if INDEX in {i.get('name') for i in insp.get_indexes(TABLE)}:
+        op.drop_index(INDEX, table_name=TABLE)
+    existing = {c.get('name') for c in insp.get_columns(TABLE)}
+    drop = [c.name for c in _columns() if c.name in existing]
+    if drop:
+        with op.batch_alter_table(TABLE) as batch_op:
+            for name in drop:
+                batch_op.drop_column(name)
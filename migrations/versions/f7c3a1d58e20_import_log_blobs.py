@@ -0,0 +1,93 @@
+"""import error logs moved to import_log_blobs
+
+Revision ID: f7c3a1d58e20
+Revises: d2e9b7a4c6f1
+Create Date: 2026-10-19 18:00:00
+
+错误日志 Excel 从 import_logs.error_log_content（Base64 文本）移到 import_log_blobs 分块存放，
+import_logs 只保留 error_log_size。升级时把已有的错误日志搬过去，降级时搬回来。
+"""
+import base64
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c3a1d58e20'
+down_revision = 'd2e9b7a4c6f1'
+branch_labels = None
+depends_on = None
+
+
+LOGS = 'import_logs'
+BLOBS = 'import_log_blobs'
+LOGS_CREATED_INDEX = 'ix_import_logs_created_at'
+CHUNK = 256 * 1024
+
+logs = sa.table(
+    LOGS,
+    sa.column('id', sa.Integer),
+    sa.column('error_log_content', sa.Text),
+    sa.column('error_log_size', sa.Integer),
+)
+blobs = sa.table(
+    BLOBS,
+    sa.column('import_log_id', sa.Integer),
+    sa.column('seq', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    if BLOBS not in insp.get_table_names():
+        op.create_table(
+            BLOBS,
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('import_log_id', sa.Integer(), sa.ForeignKey(f'{LOGS}.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('seq', sa.Integer(), nullable=False),
+            sa.Column('data', sa.LargeBinary().with_variant(mysql.MEDIUMBLOB(), 'mysql'), nullable=False),
+            sa.UniqueConstraint('import_log_id', 'seq', name='uq_import_log_blobs_log_seq'),
+        )
+    if 'error_log_size' not in {c.get('name') for c in insp.get_columns(LOGS)}:
+        op.add_column(LOGS, sa.Column('error_log_size', sa.Integer(), nullable=True))
+    if LOGS_CREATED_INDEX not in {i.get('name') for i in insp.get_indexes(LOGS)}:
+        op.create_index(LOGS_CREATED_INDEX, LOGS, ['created_at'])
+
+    # 逐条搬迁已有的错误日志，避免一次读入所有 Base64 内容
+    ids = [r[0] for r in bind.execute(sa.select(logs.c.id).where(logs.c.error_log_content.isnot(None)).order_by(logs.c.id))]
+    for log_id in ids:
+        content = bind.execute(sa.select(logs.c.error_log_content).where(logs.c.id == log_id)).scalar()
+        try:
+            data = base64.b64decode(content or '')
+        except Exception:
+            continue
+        bind.execute(blobs.delete().where(blobs.c.import_log_id == log_id))
+        for seq, start in enumerate(range(0, len(data), CHUNK)):
+            bind.execute(blobs.insert().values(import_log_id=log_id, seq=seq, data=data[start:start + CHUNK]))
+        bind.execute(logs.update().where(logs.c.id == log_id).values(error_log_content=None, error_log_size=len(data) or None))
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = insp.get_table_names()
+    columns = {c.get('name') for c in insp.get_columns(LOGS)}
+    if BLOBS in tables and 'error_log_size' in columns:
+        ids = [r[0] for r in bind.execute(sa.select(logs.c.id).where(logs.c.error_log_size.isnot(None)).order_by(logs.c.id))]
+        for log_id in ids:
+            parts = bind.execute(sa.select(blobs.c.data).where(blobs.c.import_log_id == log_id).order_by(blobs.c.seq))
+            data = b''.join(bytes(r[0]) for r in parts)
+            bind.execute(logs.update().where(logs.c.id == log_id).values(
+                error_log_content=base64.b64encode(data).decode('ascii') if data else None
+            ))
+    if LOGS_CREATED_INDEX in {i.get('name') for i in insp.get_indexes(LOGS)}:
+        op.drop_index(LOGS_CREATED_INDEX, table_name=LOGS)
+    if 'error_log_size' in columns:
+        with op.batch_alter_table(LOGS) as batch_op:
+            batch_op.drop_column('error_log_size')
+    if BLOBS in tables:
+        op.drop_table(BLOBS)
@@ -1,6 +1,37 @@
 from datetime import datetime
+import os
+
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import deferred, joinedload, lazyload, selectinload, validates
+
 from app import db
 
+# 列表类接口加载 participants 的方式：selectin（默认，每批 IN 查询一次）/ joined / lazy（逐行查询，仅用于排查）
+PARTICIPANTS_LOADING = str(os.environ.get('PARTICIPANTS_LOADING', 'selectin') or 'selectin').strip().lower()
+
+
+def masked_value(field, value):
+    """敏感字段的脱敏展示值；空值存 None（与解密后再脱敏的结果一致）"""
+    if not value:
+        return None
+    from app import mask_email, mask_phone
+    masked = mask_email(value) if field.endswith('_email') else mask_phone(value)
+    return masked[:255] if masked else masked
+
+
+def school_initials_of(name) -> str:
+    """学校名拼音首字母（大写），如 “北京四中” -> “BJSZ”；非汉字部分原样保留"""
+    try:
+        from pypinyin import lazy_pinyin, Style
+        s = str(name or '').strip()
+        if not s:
+            return ''
+        letters = lazy_pinyin(s, style=Style.FIRST_LETTER)
+        return ''.join([str(x or '') for x in letters]).upper()
+    except Exception:
+        return ''
+
+
 class Application(db.Model):
     __tablename__ = 'applications'
     
@@ -19,30 +50,39 @@ class Application(db.Model):
     school_region = db.Column(db.String(100))  # 省/自治区/直辖市
     school_city = db.Column(db.String(100))  # 市
     school_district = db.Column(db.String(100))  # 区县
+    # 学校名拼音首字母（写 school_name 时自动计算，供 school_initial 前缀筛选）
+    school_initials = db.Column(db.String(100))
 
     # 指导老师信息
     teacher_name = db.Column(db.String(50))
     teacher_phone_encrypted = db.Column(db.Text)
     teacher_phone_hash = db.Column(db.String(64), index=True)
+    teacher_phone_masked = db.Column(db.String(255))
 
     # 领队信息
     leader_name = db.Column(db.String(50))
     leader_phone_encrypted = db.Column(db.Text)
+    leader_phone_masked = db.Column(db.String(255))
 
     # 参赛人信息（手机号/邮箱）
     participant_phone_encrypted = db.Column(db.Text)
     participant_email_encrypted = db.Column(db.Text)
+    participant_phone_masked = db.Column(db.String(255))
+    participant_email_masked = db.Column(db.String(255))
     
     # 联系人信息（加密存储）
     contact_name = db.Column(db.String(50), nullable=False)
     contact_phone_encrypted = db.Column(db.Text, nullable=False)
     contact_email_encrypted = db.Column(db.Text, nullable=False)
+    # 脱敏后的展示值（写入时计算，非敏感序列化直接读取，不再解密）
+    contact_phone_masked = db.Column(db.String(255))
+    contact_email_masked = db.Column(db.String(255))
     
     # 添加哈希字段用于查询
-    contact_phone_hash = db.Column(db.String(64), nullable=False, index=True)
+    contact_phone_hash = db.Column(db.String(64), nullable=False)
 
     # 报名人 openid（用于学生端权限控制）
-    openid = db.Column(db.String(64), index=True)
+    openid = db.Column(db.String(64))
     
     # 参赛号（管理员导入）
     match_no = db.Column(db.String(50))
@@ -62,6 +102,46 @@ class Application(db.Model):
     
     # 关联的选手
     participants = db.relationship('ApplicationParticipant', backref='application', lazy=True, cascade='all, delete-orphan')
+
+    # 按查询形态建的索引（与 migrations/versions 中的迁移保持一致）
+    __table_args__ = (
+        db.Index('uq_applications_match_no', 'match_no', unique=True),
+        db.Index('ix_applications_created_at', 'created_at'),
+        db.Index('ix_applications_status_created_at', 'status', 'created_at'),
+        db.Index('ix_applications_category_level_created_at', 'category', 'education_level', 'created_at'),
+        db.Index('ix_applications_education_level', 'education_level'),
+        db.Index('ix_applications_teacher_name_phone_hash', 'teacher_name', 'teacher_phone_hash', 'created_at'),
+        db.Index('ix_applications_contact_phone_hash_status', 'contact_phone_hash', 'status'),
+        db.Index('ix_applications_openid_created_at', 'openid', 'created_at'),
+        db.Index('ix_applications_school_initials', 'school_initials'),
+    )
+
+    @validates('school_name')
+    def _sync_school_initials(self, key, value):
+        self.school_initials = school_initials_of(value) or None
+        return value
+
+    @classmethod
+    def filter_school_initial(cls, query, prefix):
+        """按拼音首字母前缀筛选，等价于 LIKE 'ABC%'；写成区间比较，sqlite 默认不区分大小写的 LIKE 也能走索引"""
+        prefix = str(prefix or '').strip().upper()
+        if not prefix:
+            return query
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return query.filter(cls.school_initials >= prefix, cls.school_initials < upper)
+
+    @classmethod
+    def participants_loader(cls):
+        if PARTICIPANTS_LOADING == 'joined':
+            return joinedload(cls.participants)
+        if PARTICIPANTS_LOADING == 'lazy':
+            return lazyload(cls.participants)
+        return selectinload(cls.participants)
+
+    @classmethod
+    def query_with_participants(cls):
+        """列表接口统一入口：to_dict() 会遍历 participants，必须预加载，避免每行一次查询"""
+        return cls.query.options(cls.participants_loader())
     
     @property
     def contact_phone(self):
@@ -74,6 +154,7 @@ class Application(db.Model):
         import hashlib
         self.contact_phone_encrypted = encrypt_data(value)
         self.contact_phone_hash = hashlib.sha256(value.encode()).hexdigest()
+        self.contact_phone_masked = masked_value('contact_phone', value)
     
     @property
     def contact_email(self):
@@ -84,17 +165,8 @@ class Application(db.Model):
     def contact_email(self, value):
         from app import encrypt_data
         self.contact_email_encrypted = encrypt_data(value)
+        self.contact_email_masked = masked_value('contact_email', value)
     
-    @property
-    def contact_phone_masked(self):
-        from app import mask_phone
-        return mask_phone(self.contact_phone)
-    
-    @property
-    def contact_email_masked(self):
-        from app import mask_email
-        return mask_email(self.contact_email)
-
     @property
     def teacher_phone(self):
         from app import decrypt_data
@@ -105,6 +177,7 @@ class Application(db.Model):
         from app import encrypt_data
         import hashlib
         self.teacher_phone_encrypted = encrypt_data(value)
+        self.teacher_phone_masked = masked_value('teacher_phone', value)
         try:
             v = str(value or '').strip()
             self.teacher_phone_hash = hashlib.sha256(v.encode()).hexdigest() if v else None
@@ -120,6 +193,7 @@ class Application(db.Model):
     def leader_phone(self, value):
         from app import encrypt_data
         self.leader_phone_encrypted = encrypt_data(value)
+        self.leader_phone_masked = masked_value('leader_phone', value)
 
     @property
     def participant_phone(self):
@@ -130,6 +204,7 @@ class Application(db.Model):
     def participant_phone(self, value):
         from app import encrypt_data
         self.participant_phone_encrypted = encrypt_data(value)
+        self.participant_phone_masked = masked_value('participant_phone', value)
 
     @property
     def participant_email(self):
@@ -140,28 +215,11 @@ class Application(db.Model):
     def participant_email(self, value):
         from app import encrypt_data
         self.participant_email_encrypted = encrypt_data(value)
+        self.participant_email_masked = masked_value('participant_email', value)
 
-    @property
-    def teacher_phone_masked(self):
-        from app import mask_phone
-        return mask_phone(self.teacher_phone)
-
-    @property
-    def leader_phone_masked(self):
-        from app import mask_phone
-        return mask_phone(self.leader_phone)
-
-    @property
-    def participant_phone_masked(self):
-        from app import mask_phone
-        return mask_phone(self.participant_phone)
-
-    @property
-    def participant_email_masked(self):
-        from app import mask_email
-        return mask_email(self.participant_email)
     
-    def to_dict(self, include_sensitive=False):
+    def to_dict(self, include_sensitive=False, include_participants=True, decrypted=None):
+        """decrypted：批量解密的结果（bulk_decrypt.decrypt_rows 的一项），不传则逐个字段解密"""
         result = {
             'id': self.id,
             'openid': self.openid,
@@ -182,42 +240,45 @@ class Application(db.Model):
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'participants': [p.to_dict() for p in self.participants]
         }
-        
+        if include_participants:
+            result['participants'] = [p.to_dict() for p in self.participants]
+
+        from bulk_decrypt import FAILED, SENSITIVE_FIELDS
+        if not include_sensitive and decrypted is None:
+            # 脱敏值已落库，直接读取；只有未回填的旧记录才回退到解密
+            if not any(getattr(self, f"{f}_masked") is None and getattr(self, col) for f, col in SENSITIVE_FIELDS):
+                for field, _col in SENSITIVE_FIELDS:
+                    result[field] = getattr(self, f"{field}_masked")
+                return result
+
+        if decrypted is None:
+            from bulk_decrypt import decrypt_rows
+            decrypted = decrypt_rows([self])[0]
+
+        failed = any(v is FAILED for v in decrypted.values())
         if include_sensitive:
-            try:
-                result['contact_phone'] = self.contact_phone
-                result['contact_email'] = self.contact_email
-                result['teacher_phone'] = self.teacher_phone
-                result['leader_phone'] = self.leader_phone
-                result['participant_phone'] = self.participant_phone
-                result['participant_email'] = self.participant_email
-            except:
-                result['contact_phone'] = '解密失败'
-                result['contact_email'] = '解密失败'
-                result['teacher_phone'] = '解密失败'
-                result['leader_phone'] = '解密失败'
-                result['participant_phone'] = '解密失败'
-                result['participant_email'] = '解密失败'
+            for field, value in decrypted.items():
+                result[field] = '解密失败' if failed else value
         else:
-            try:
-                result['contact_phone'] = self.contact_phone_masked
-                result['contact_email'] = self.contact_email_masked
-                result['teacher_phone'] = self.teacher_phone_masked
-                result['leader_phone'] = self.leader_phone_masked
-                result['participant_phone'] = self.participant_phone_masked
-                result['participant_email'] = self.participant_email_masked
-            except:
-                result['contact_phone'] = '***'
-                result['contact_email'] = '***'
-                result['teacher_phone'] = '***'
-                result['leader_phone'] = '***'
-                result['participant_phone'] = '***'
-                result['participant_email'] = '***'
-            
+            for field, value in decrypted.items():
+                result[field] = '***' if failed else masked_value(field, value)
+
         return result
 
+    @classmethod
+    def to_dicts(cls, rows, include_sensitive=False, include_participants=True):
+        """列表序列化：整批按列解密（相同密文只解一次），避免每行六次 decrypt_data；脱敏输出不解密"""
+        from bulk_decrypt import decrypt_rows
+        rows = list(rows)
+        if not include_sensitive:
+            return [row.to_dict(include_participants=include_participants) for row in rows]
+        plain = decrypt_rows(rows)
+        return [
+            row.to_dict(include_sensitive=include_sensitive, include_participants=include_participants, decrypted=d)
+            for row, d in zip(rows, plain)
+        ]
+
 class ApplicationParticipant(db.Model):
     __tablename__ = 'application_participants'
     
@@ -260,6 +321,10 @@ class CertificateTemplate(db.Model):
 
 class ImportLog(db.Model):
     __tablename__ = 'import_logs'
+    __table_args__ = (
+        db.Index('ix_import_logs_type_content_hash', 'import_type', 'content_hash'),
+        db.Index('ix_import_logs_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     import_type = db.Column(db.String(20), nullable=False)  # match_no, award
@@ -267,11 +332,26 @@ class ImportLog(db.Model):
     success_count = db.Column(db.Integer, nullable=False)
     failed_count = db.Column(db.Integer, nullable=False)
     
-    # 错误日志（Base64编码的Excel内容）
-    error_log_content = db.Column(db.Text)
+    # 旧版错误日志（Base64编码的Excel内容），新数据写入 import_log_blobs；延迟加载，列表查询不读取
+    error_log_content = deferred(db.Column(db.Text))
+    # 错误日志 Excel 的字节数，为空表示没有错误日志
+    error_log_size = db.Column(db.Integer)
+
+    # 导入状态：running（分块提交中）、failed（中断，可用同一文件续跑）、completed
+    status = db.Column(db.String(20), nullable=False, default='completed', server_default='completed')
+    # 上传文件内容的 SHA-256，用于识别重复上传 / 续跑
+    content_hash = db.Column(db.String(64))
+    # 检查点：已提交到的 Excel 行号与累计成功数（JSON）；各分块的错误行、更新的报名 ID 在 import_checkpoint_chunks
+    checkpoint_row = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    checkpoint_data = db.Column(db.Text)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @property
+    def error_log_available(self):
+        return bool(self.error_log_size)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -279,11 +359,42 @@ class ImportLog(db.Model):
             'total_count': self.total_count,
             'success_count': self.success_count,
             'failed_count': self.failed_count,
-            'error_log_content': self.error_log_content,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'error_log_available': self.error_log_available,
+            'error_log_size': self.error_log_size,
+            'status': self.status,
+            'checkpoint_row': self.checkpoint_row,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 
+class ImportLogBlob(db.Model):
+    """导入错误日志 Excel，按块存放（下载时逐块读取）"""
+    __tablename__ = 'import_log_blobs'
+    __table_args__ = (
+        db.UniqueConstraint('import_log_id', 'seq', name='uq_import_log_blobs_log_seq'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    import_log_id = db.Column(db.Integer, db.ForeignKey('import_logs.id', ondelete='CASCADE'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary().with_variant(mysql.MEDIUMBLOB(), 'mysql'), nullable=False)
+
+
+class ImportCheckpointChunk(db.Model):
+    """分块导入的检查点明细：每个已提交分块一行，记该块更新的报名 ID 与对账错误行（JSON）"""
+    __tablename__ = 'import_checkpoint_chunks'
+    __table_args__ = (
+        db.UniqueConstraint('import_log_id', 'checkpoint_row', name='uq_import_checkpoint_chunks_log_row'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    import_log_id = db.Column(db.Integer, db.ForeignKey('import_logs.id', ondelete='CASCADE'), nullable=False)
+    # 该分块最后一行的 Excel 行号（与提交时的 ImportLog.checkpoint_row 相同）
+    checkpoint_row = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.Text().with_variant(mysql.MEDIUMTEXT(), 'mysql'), nullable=False)
+
+
 class ExcellentCoach(db.Model):
     __tablename__ = 'excellent_coaches'
 
@@ -321,3 +432,84 @@ class ExcellentCoach(db.Model):
         if include_sensitive:
             d['teacher_phone'] = self.teacher_phone
         return d
+
+
+class GeneratedCertificate(db.Model):
+    """已生成证书登记表（替代 manifests/*.json 与目录扫描）"""
+    __tablename__ = 'generated_certificates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # player / coach / excellent_coach
+    kind = db.Column(db.String(20), nullable=False)
+    # 缓存键：选手/辅导员证书为 application_id，优秀辅导员证书为 excellent_coaches.id
+    cert_key = db.Column(db.String(64), nullable=False)
+    application_id = db.Column(db.Integer, index=True)
+    # 请求指定的资源档位（?profile= print / mobile / original）；空串表示按模板配置渲染
+    profile = db.Column(db.String(20), nullable=False, default='')
+
+    # PDF 内容 SHA-256
+    fingerprint = db.Column(db.String(64), nullable=False, index=True)
+    # 相对 CERT_STORAGE_DIR 的存储路径
+    storage_key = db.Column(db.String(255), nullable=False)
+    byte_size = db.Column(db.Integer, nullable=False, default=0)
+    render_ms = db.Column(db.Float)
+    filename = db.Column(db.String(255))
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'cert_key', 'profile', name='uq_generated_cert_kind_key_profile'),
+        db.Index('ix_generated_cert_kind_profile_app', 'kind', 'profile', 'application_id'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'cert_key': self.cert_key,
+            'application_id': self.application_id,
+            'profile': self.profile,
+            'fingerprint': self.fingerprint,
+            'storage_key': self.storage_key,
+            'byte_size': self.byte_size,
+            'render_ms': self.render_ms,
+            'filename': self.filename,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class ApplicationStat(db.Model):
+    """报名统计汇总：每种维度组合一行（空值记为空串），由 stats_rollup 随报名变更增量维护"""
+    __tablename__ = 'application_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 各维度值拼接后的 SHA-1，维度列太长，不直接建联合唯一索引
+    key_hash = db.Column(db.String(40), nullable=False, unique=True)
+    category = db.Column(db.String(50), nullable=False, default='')
+    task = db.Column(db.String(100), nullable=False, default='')
+    education_level = db.Column(db.String(20), nullable=False, default='')
+    school_region = db.Column(db.String(100), nullable=False, default='')
+    school_city = db.Column(db.String(100), nullable=False, default='')
+    school_district = db.Column(db.String(100), nullable=False, default='')
+    school_name = db.Column(db.String(100), nullable=False, default='')
+    status = db.Column(db.String(20), nullable=False, default='')
+    award_level = db.Column(db.String(20), nullable=False, default='')
+    app_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ApplicationTimeBucket(db.Model):
+    """报名时间序列：按小时/天分桶的报名、通过、退回数（分项目大类），由 stats_rollup 增量维护"""
+    __tablename__ = 'application_time_buckets'
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'metric', 'category',
+                            name='uq_application_time_buckets_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour / day
+    bucket_start = db.Column(db.DateTime, nullable=False)  # 桶起点（STATS_TZ_OFFSET_HOURS 时区）
+    metric = db.Column(db.String(20), nullable=False)  # registrations / approvals / rejections
+    category = db.Column(db.String(50), nullable=False, default='')
+    event_count = db.Column(db.Integer, nullable=False, default=0)
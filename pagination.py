@@ -0,0 +1,131 @@
+"""报名列表分页：游标（keyset）分页 + 总数估算缓存。
+
+游标按 (created_at, id) 倒序定位，翻到多深都只是一次索引区间扫描，
+不做 OFFSET，也不在每页执行 COUNT(*)。created_at 为空的历史记录排在最后，按 id 倒序翻页。
+
+总数缓存按进程保存，写入时不主动失效（多 worker 下也无法统一失效），
+以 COUNT_CACHE_TTL 为准，接口返回 total_estimated 标明是估算值。
+"""
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def _env_int(name, default):
+    try:
+        return int(str(os.environ.get(name, '') or '').strip() or default)
+    except Exception:
+        return default
+
+
+# per_page 上限（游标与页码两种模式都生效）
+MAX_PER_PAGE = max(1, _env_int('APPLICATION_LIST_MAX_PER_PAGE', 100))
+# 总数缓存有效期（秒）
+COUNT_CACHE_TTL = max(0, _env_int('APPLICATION_COUNT_CACHE_TTL', 30))
+
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+def clamp_per_page(value, default=20):
+    try:
+        n = int(value)
+    except Exception:
+        n = default
+    if n < 1:
+        n = default
+    return min(n, MAX_PER_PAGE)
+
+
+def encode_cursor(created_at, row_id) -> str:
+    ts = created_at.isoformat() if created_at is not None else None
+    raw = json.dumps([ts, int(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """返回 (created_at, id)，created_at 为空的记录返回 (None, id)；空串表示第一页，返回 None；格式不对抛 ValueError"""
+    s = str(cursor or '').strip()
+    if not s:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(s + '=' * (-len(s) % 4)).decode('utf-8')
+        ts, row_id = json.loads(raw)
+        return (datetime.fromisoformat(ts) if ts is not None else None), int(row_id)
+    except Exception:
+        raise ValueError('invalid cursor')
+
+
+def keyset_page(query, model, cursor=None, per_page=20):
+    """按 (created_at DESC, id DESC) 取一页，返回 (items, next_cursor)；没有下一页时 next_cursor 为 None。
+
+    先翻 created_at 非空的记录，翻完后接着按 id 倒序翻 created_at 为空的记录；
+    两段分开查，比较条件不会把空值行漏掉，也都能走索引。
+    """
+    per_page = clamp_per_page(per_page)
+    position = decode_cursor(cursor)
+    rows = []
+    if position is None or position[0] is not None:
+        dated = query.filter(model.created_at.isnot(None))
+        if position is not None:
+            # MySQL 不会把行值比较用作索引范围条件，写成 a < x OR (a = x AND id < y)；
+            # 冗余的 a <= x 给优化器一个 created_at 上的范围起点，避免从头扫描
+            ts, row_id = position
+            dated = dated.filter(
+                model.created_at <= ts,
+                or_(model.created_at < ts, and_(model.created_at == ts, model.id < row_id)),
+            )
+        rows = dated.order_by(model.created_at.desc(), model.id.desc()).limit(per_page + 1).all()
+    if len(rows) <= per_page:
+        undated = query.filter(model.created_at.is_(None))
+        if position is not None and position[0] is None:
+            undated = undated.filter(model.id < position[1])
+        rows += undated.order_by(model.id.desc()).limit(per_page + 1 - len(rows)).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
+
+
+def cached_count(query, key):
+    """带 TTL 缓存的总数（近似值：缓存期内的新增/删除不会立刻反映）"""
+    now = time.monotonic()
+    if COUNT_CACHE_TTL:
+        with _count_lock:
+            hit = _count_cache.get(key)
+            if hit and hit[1] > now:
+                return hit[0]
+    total = query.order_by(None).count()
+    if COUNT_CACHE_TTL:
+        with _count_lock:
+            if len(_count_cache) > 1024:
+                _count_cache.clear()
+            _count_cache[key] = (int(total), now + COUNT_CACHE_TTL)
+    return int(total)
+
+
+def wants_cursor(args) -> bool:
+    """请求里带了 cursor 参数（第一页传空串即可）就走游标分页"""
+    return 'cursor' in args
+
+
+def cursor_listing(query, model, args, count_key):
+    """游标分页的通用处理：返回 (items, meta)；with_total=1 时附带缓存的总数估算"""
+    per_page = clamp_per_page(args.get('per_page', 20))
+    items, next_cursor = keyset_page(query, model, args.get('cursor', ''), per_page)
+    meta = {
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'per_page': per_page,
+    }
+    if str(args.get('with_total', '') or '').strip().lower() in ('1', 'true', 'yes'):
+        meta['total'] = cached_count(query, count_key)
+        meta['total_estimated'] = True
+    return items, meta
@@ -0,0 +1,97 @@
+import contextlib
+import logging
+import os
+import threading
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_installed = False
+_install_lock = threading.Lock()
+
+
+class QueryCounter:
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.statements = [] if keep_statements else None
+
+    def record(self, statement):
+        self.count += 1
+        if self.statements is not None:
+            self.statements.append(str(statement))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, 'counters', ()):
+        counter.record(statement)
+    if has_request_context():
+        try:
+            g._query_count = int(getattr(g, '_query_count', 0) or 0) + 1
+        except Exception:
+            pass
+
+
+def _install():
+    global _installed
+    with _install_lock:
+        if not _installed:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            _installed = True
+
+
+@contextlib.contextmanager
+def count_queries(keep_statements=False):
+    """统计代码块内（当前线程）执行的 SQL 条数"""
+    _install()
+    counter = QueryCounter(keep_statements=keep_statements)
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+@contextlib.contextmanager
+def assert_max_queries(limit, label=''):
+    """查询条数超过 limit 时抛 AssertionError（附带执行过的 SQL），用于回归 N+1"""
+    with count_queries(keep_statements=True) as counter:
+        yield counter
+    if counter.count > int(limit):
+        sqls = '\n'.join(counter.statements[:20])
+        raise AssertionError(f"{label or 'block'} executed {counter.count} queries (limit {limit}):\n{sqls}")
+
+
+def init_request_query_guard(app):
+    """QUERY_COUNT_GUARD=<上限> 时：每个请求回写 X-Query-Count，超出上限记 warning"""
+    raw = str(os.environ.get('QUERY_COUNT_GUARD', '') or '').strip()
+    if not raw:
+        return
+    try:
+        budget = int(raw)
+    except Exception:
+        budget = 0
+    _install()
+
+    @app.before_request
+    def _reset_query_count():
+        g._query_count = 0
+
+    @app.after_request
+    def _report_query_count(resp):
+        try:
+            n = int(getattr(g, '_query_count', 0) or 0)
+            resp.headers['X-Query-Count'] = str(n)
+            if budget and n > budget:
+                from flask import request
+                _logger.warning('query budget exceeded: %s %s ran %s queries (budget %s)', request.method, request.path, n, budget)
+        except Exception:
+            pass
+        return resp
@@ -0,0 +1,263 @@
+"""把旧密钥 / 旧格式的敏感字段重新加密为当前密钥的 v1 格式。
+
+按 id 分块处理，每块提交一次并把检查点写进任务 JSON；中断（暂停、进程重启）后
+再次启动会从检查点继续。只处理不是 “v1:<当前 key id>:” 前缀的值。
+
+    python reencrypt.py                 # 前台执行（续跑未完成的任务）
+    python reencrypt.py --chunk 200     # 调整每块行数
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+_STATE_DIR = os.environ.get('REENCRYPT_STATE_DIR', '/tmp/competition-web-reencrypt')
+DEFAULT_CHUNK = 500
+
+# (表名, 模型名, 密文列)
+TARGETS = (
+    ('applications', 'Application', (
+        'contact_phone_encrypted', 'contact_email_encrypted', 'teacher_phone_encrypted',
+        'leader_phone_encrypted', 'participant_phone_encrypted', 'participant_email_encrypted',
+    )),
+    ('excellent_coaches', 'ExcellentCoach', ('teacher_phone_encrypted',)),
+)
+
+_logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+_running = {'job_id': None, 'stop': None}
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(_STATE_DIR, f"{job_id}.json")
+
+
+def _write_state(state: dict):
+    os.makedirs(_STATE_DIR, exist_ok=True)
+    state['updated_at'] = datetime.now().isoformat()
+    path = _job_path(state['job_id'])
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def read_job(job_id: str):
+    try:
+        with open(_job_path(os.path.basename(str(job_id))), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def latest_job():
+    paths = sorted(glob.glob(os.path.join(_STATE_DIR, '*.json')), key=os.path.getmtime, reverse=True)
+    for p in paths:
+        job = read_job(os.path.splitext(os.path.basename(p))[0])
+        if job:
+            return job
+    return None
+
+
+def _model(name):
+    import models
+    return getattr(models, name)
+
+
+def _stale_filter(model, columns, kid):
+    prefix = f"v1:{kid}:%"
+    conds = []
+    for name in columns:
+        col = getattr(model, name)
+        conds.append(and_(col.isnot(None), col != '', ~col.like(prefix)))
+    return or_(*conds)
+
+
+def pending_counts():
+    """各表还需要重新加密的行数"""
+    from app import CURRENT_KEY_ID, db
+    out = {}
+    for table, model_name, columns in TARGETS:
+        model = _model(model_name)
+        out[table] = int(db.session.query(model.id).filter(_stale_filter(model, columns, CURRENT_KEY_ID)).count())
+    return out
+
+
+def _new_state(chunk_size):
+    from app import CURRENT_KEY_ID
+    totals = pending_counts()
+    return {
+        'job_id': uuid.uuid4().hex,
+        'status': 'queued',
+        'key_id': CURRENT_KEY_ID,
+        'chunk_size': int(chunk_size),
+        'created_at': datetime.now().isoformat(),
+        'started_at': None,
+        'finished_at': None,
+        'tables': {
+            table: {'total': totals.get(table, 0), 'last_id': 0, 'scanned': 0, 'reencrypted': 0, 'failed': 0, 'done': False}
+            for table, _m, _c in TARGETS
+        },
+        'failed_samples': [],
+        'error': None,
+    }
+
+
+def _resumable_state():
+    from app import CURRENT_KEY_ID
+    job = latest_job()
+    if job and job.get('status') not in ('completed',) and job.get('key_id') == CURRENT_KEY_ID:
+        return job
+    return None
+
+
+def _reencrypt_chunk(db, model, columns, state_table, chunk_size, kid, failed_samples):
+    from app import decrypt_data, encrypt_data
+    from ciphertext import is_current
+
+    table = model.__table__
+    cols = [getattr(model, c) for c in columns]
+    rows = (
+        db.session.query(model.id, *cols)
+        .filter(model.id > int(state_table['last_id']))
+        .filter(_stale_filter(model, columns, kid))
+        .order_by(model.id.asc())
+        .limit(chunk_size)
+        .all()
+    )
+    if not rows:
+        return False
+
+    for row in rows:
+        old = dict(zip(columns, row[1:]))
+        new = {}
+        try:
+            for name, value in old.items():
+                if value and not is_current(value, kid):
+                    new[name] = encrypt_data(decrypt_data(value))
+        except Exception as e:
+            state_table['failed'] += 1
+            if len(failed_samples) < 50:
+                failed_samples.append({'table': table.name, 'id': row.id, 'error': type(e).__name__})
+            continue
+        if not new:
+            continue
+        stmt = table.update().where(table.c.id == row.id)
+        # 只在密文没被并发修改时覆盖
+        for name in new:
+            stmt = stmt.where(table.c[name] == old[name])
+        values = dict(new)
+        if 'updated_at' in table.c:
+            # 重新加密不算业务修改，不触发 onupdate
+            values['updated_at'] = table.c.updated_at
+        if db.session.execute(stmt.values(**values)).rowcount:
+            state_table['reencrypted'] += 1
+
+    db.session.commit()
+    state_table['scanned'] += len(rows)
+    state_table['last_id'] = int(rows[-1].id)
+    return True
+
+
+def run_job(state: dict, stop_event=None, progress=None):
+    """在当前线程执行（需要 app context），返回最终状态"""
+    from app import CURRENT_KEY_ID, db
+
+    state['status'] = 'running'
+    state['started_at'] = state.get('started_at') or datetime.now().isoformat()
+    _write_state(state)
+    chunk_size = max(1, int(state.get('chunk_size') or DEFAULT_CHUNK))
+    try:
+        for table, model_name, columns in TARGETS:
+            st = state['tables'].setdefault(table, {'total': 0, 'last_id': 0, 'scanned': 0, 'reencrypted': 0, 'failed': 0, 'done': False})
+            model = _model(model_name)
+            while not st.get('done'):
+                if stop_event is not None and stop_event.is_set():
+                    state['status'] = 'paused'
+                    _write_state(state)
+                    return state
+                if not _reencrypt_chunk(db, model, columns, st, chunk_size, CURRENT_KEY_ID, state['failed_samples']):
+                    st['done'] = True
+                _write_state(state)
+                if progress:
+                    progress(table, st)
+        state['status'] = 'completed'
+        state['finished_at'] = datetime.now().isoformat()
+    except Exception as e:
+        db.session.rollback()
+        state['status'] = 'failed'
+        state['error'] = str(e)
+        _logger.exception('re-encryption job %s failed', state.get('job_id'))
+    _write_state(state)
+    return state
+
+
+def start_background_job(chunk_size=DEFAULT_CHUNK, resume=True):
+    """启动（或续跑）后台任务，返回 (job_id, started)；已有任务在跑时 started=False"""
+    with _lock:
+        if _running['job_id']:
+            return _running['job_id'], False
+        state = _resumable_state() if resume else None
+        if state is None:
+            state = _new_state(chunk_size)
+        elif chunk_size:
+            state['chunk_size'] = int(chunk_size)
+        state['status'] = 'queued'
+        _write_state(state)
+        stop = threading.Event()
+        _running['job_id'] = state['job_id']
+        _running['stop'] = stop
+
+    def _run():
+        try:
+            from app import app as flask_app
+            with flask_app.app_context():
+                run_job(state, stop_event=stop)
+        finally:
+            with _lock:
+                _running['job_id'] = None
+                _running['stop'] = None
+
+    threading.Thread(target=_run, daemon=True).start()
+    return state['job_id'], True
+
+
+def pause_job(job_id: str) -> bool:
+    with _lock:
+        if _running['job_id'] == job_id and _running['stop'] is not None:
+            _running['stop'].set()
+            return True
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='敏感字段重新加密为当前密钥')
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK)
+    parser.add_argument('--restart', action='store_true', help='不续跑，新建任务')
+    args = parser.parse_args(argv)
+
+    from app import app
+
+    with app.app_context():
+        state = None if args.restart else _resumable_state()
+        if state is None:
+            state = _new_state(max(1, args.chunk))
+        print(f"job {state['job_id']} key_id={state['key_id']}")
+
+        def _progress(table, st):
+            print(f"{table}: scanned={st['scanned']} reencrypted={st['reencrypted']} failed={st['failed']} last_id={st['last_id']} total={st['total']}")
+
+        state = run_job(state, progress=_progress)
+    print(f"status={state['status']}")
+    return 0 if state['status'] == 'completed' else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -560,29 +560,38 @@ def register():
 @api_bp.route('/api/applications', methods=['GET'])
 @require_admin()
 def get_applications():
-    """获取报名列表（管理员用）"""
+    """获取报名列表（管理员用）；带 cursor 参数时走游标分页"""
     try:
         from app import app, db
         from models import Application
+        from pagination import clamp_per_page, cursor_listing, wants_cursor
         
         with app.app_context():
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 20, type=int)
             status = request.args.get('status')
             
-            query = Application.query
+            query = Application.query_with_participants()
             
             if status:
                 query = query.filter(Application.status == status)
+
+            if wants_cursor(request.args):
+                try:
+                    items, meta = cursor_listing(query, Application, request.args, ('list', status or ''))
+                except ValueError:
+                    return jsonify({'success': False, 'message': '分页游标无效，请从第一页重新加载'}), 400
+                meta['applications'] = Application.to_dicts(items, include_sensitive=True)
+                return jsonify({'success': True, 'data': meta})
             
-            applications = query.order_by(Application.created_at.desc()).paginate(
-                page=page, per_page=per_page, error_out=False
+            applications = query.order_by(Application.created_at.desc(), Application.id.desc()).paginate(
+                page=page, per_page=clamp_per_page(per_page), error_out=False
             )
             
             return jsonify({
                 'success': True,
                 'data': {
-                    'applications': [app.to_dict(include_sensitive=True) for app in applications.items],
+                    'applications': Application.to_dicts(applications.items, include_sensitive=True),
                     'total': applications.total,
                     'pages': applications.pages,
                     'current_page': page
@@ -640,12 +649,12 @@ def get_applications_by_phone():
             openid = str(payload.get('openid', '') or '').strip()
 
             phone_hash = hashlib.sha256(phone.encode()).hexdigest()
-            applications = Application.query.filter(
+            applications = Application.query_with_participants().filter(
                 Application.contact_phone_hash == phone_hash,
                 Application.openid == openid
             ).order_by(Application.created_at.desc()).all()
 
-            return jsonify({'success': True, 'data': [a.to_dict() for a in applications]})
+            return jsonify({'success': True, 'data': Application.to_dicts(applications)})
     except Exception as e:
         return jsonify({'success': False, 'message': '获取数据失败', 'error': str(e)}), 500
 
@@ -705,14 +714,14 @@ def get_my_applications():
 
             match_no = str(match_no).strip()
 
-            applications = Application.query.filter(
+            applications = Application.query_with_participants().filter(
                 Application.match_no == match_no,
                 Application.award_level.isnot(None)
             ).order_by(Application.created_at.desc()).all()
             
             return jsonify({
                 'success': True,
-                'data': [app.to_dict() for app in applications]
+                'data': Application.to_dicts(applications)
             })
         
     except Exception as e:
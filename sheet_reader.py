@@ -0,0 +1,193 @@
+"""导入表格的流式读取。
+
+- 上传文件按块落盘（spool_upload），同时计算内容哈希，不把整个文件读进请求内存；
+- .xlsx 用 openpyxl 只读模式逐行读取，.csv 用 csv 模块逐行读取（快路径），
+  每 IMPORT_READ_BATCH_ROWS 行组成一个 DataFrame 交给导入引擎；
+- 行号、表头与 pd.read_excel 一致：DataFrame 的 index 从 0 开始连续编号（Excel 行号 = index + 2），
+  空表头为 "Unnamed: i"，重名表头追加 ".1"、".2"，中间的空行保留、末尾的空行丢弃。
+  单元格按原值读取（列类型为 object），不做 pandas 的整列数值推断，
+  因此 "0123" 不会变成 123，带空单元格的手机号列也不会变成 "13800000000.0"。
+.xls 不支持流式读取，仍整表读入。
+"""
+import codecs
+import csv
+import hashlib
+import itertools
+import os
+import tempfile
+
+import pandas as pd
+
+
+def _env_int(name, default):
+    try:
+        return int(str(os.environ.get(name, '') or '').strip() or default)
+    except Exception:
+        return default
+
+
+BATCH_ROWS = max(1, _env_int('IMPORT_READ_BATCH_ROWS', 5000))
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+_COPY_BUFSIZE = 1024 * 1024
+
+
+def extension_of(filename) -> str:
+    return os.path.splitext(str(filename or ''))[1].lower()
+
+
+def spool_upload(file, path=None):
+    """把上传文件按块写到磁盘，返回 (路径, 内容 SHA-256)"""
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix='import-', suffix=extension_of(file.filename) or '.xlsx')
+        os.close(fd)
+    digest = hashlib.sha256()
+    stream = getattr(file, 'stream', file)
+    with open(path, 'wb') as out:
+        while True:
+            block = stream.read(_COPY_BUFSIZE)
+            if not block:
+                break
+            digest.update(block)
+            out.write(block)
+    return path, digest.hexdigest()
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_COPY_BUFSIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _header_names(values):
+    names = []
+    used = {}
+    for i, v in enumerate(values):
+        name = f'Unnamed: {i}' if v is None or v == '' else v
+        if name in used:
+            used[name] += 1
+            name = f'{name}.{used[name]}'
+        else:
+            used[name] = 0
+        names.append(name)
+    return names
+
+
+def _xlsx_value(cell):
+    value = cell.value
+    if value is None or cell.data_type == 'e':
+        return None
+    if cell.data_type == 'n' and isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _csv_encoding(path):
+    """UTF-8（含 BOM）能完整解码就用 UTF-8，否则按 GB18030（Excel 另存的中文 CSV）"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_COPY_BUFSIZE), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'gb18030'
+
+
+class SheetReader:
+    """按批读取导入表格：columns 为表头，迭代得到 DataFrame（object 列）"""
+
+    def __init__(self, path, filename=None, batch_rows=None):
+        self.path = path
+        self.ext = extension_of(filename or path)
+        self.batch_rows = max(1, int(batch_rows or BATCH_ROWS))
+        self.total_rows = None
+        self._close = None
+        self._frame = None
+
+        if self.ext == '.csv':
+            f = open(path, 'r', encoding=_csv_encoding(path), newline='')
+            self._close = f.close
+            self._rows = iter(csv.reader(f))
+        elif self.ext == '.xls':
+            self._frame = pd.read_excel(path)
+            self.columns = list(self._frame.columns)
+            self.total_rows = len(self._frame)
+            return
+        else:
+            from openpyxl import load_workbook
+            wb = load_workbook(path, read_only=True, data_only=True)
+            self._close = wb.close
+            ws = wb.worksheets[0]
+            # 只读模式的 max_row 来自 <dimension> 或带样式的行，不代表数据行数；读完整表后再定 total_rows
+            self._rows = ([_xlsx_value(c) for c in row] for row in ws.iter_rows())
+
+        header = next(self._rows, None)
+        if header is None:
+            self.close()
+            raise ValueError('表格为空')
+        while header and (header[-1] is None or header[-1] == ''):
+            header = header[:-1]
+        self.columns = _header_names(header)
+
+    def __iter__(self):
+        if self._frame is not None:
+            yield self._frame
+            return
+        width = len(self.columns)
+        start = 0
+        buf = []
+        blank = [None] * width
+        blank_run = 0
+        try:
+            for values in self._rows:
+                values = [None if v == '' else v for v in values[:width]]
+                values.extend([None] * (width - len(values)))
+                if all(v is None for v in values):
+                    # 只记数：后面还有数据才算中间空行，否则是末尾空行
+                    blank_run += 1
+                    continue
+                for row in itertools.chain(itertools.repeat(blank, blank_run), (values,)):
+                    buf.append(row)
+                    if len(buf) >= self.batch_rows:
+                        yield self._to_frame(buf, start)
+                        start += len(buf)
+                        buf = []
+                blank_run = 0
+            if buf:
+                yield self._to_frame(buf, start)
+                start += len(buf)
+            self.total_rows = start
+        finally:
+            self.close()
+
+    def _to_frame(self, rows, start):
+        return pd.DataFrame(rows, columns=self.columns, index=range(start, start + len(rows)), dtype=object)
+
+    def close(self):
+        if self._close is not None:
+            try:
+                self._close()
+            except Exception:
+                pass
+            self._close = None
+
+
+def open_sheet(path, filename=None, batch_rows=None):
+    """打开导入表格；读取失败抛 ValueError（消息可直接返回给前端）"""
+    try:
+        return SheetReader(path, filename, batch_rows)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f'文件读取失败: {str(e)}')
+
+
+def remove_quietly(path):
+    try:
+        if path:
+            os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,386 @@
+"""报名统计汇总表的增量维护与查询。
+
+- application_stats：按全部统计维度的组合各存一行计数；
+- application_time_buckets：按小时/天分桶的时间序列（报名数按 created_at，通过/退回数按 reviewed_at，
+  分项目大类），通过/退回统计的是当前状态为通过/退回的报名按审核时间的分布，重新提交后会移出。
+  天的分界按 STATS_TZ_OFFSET_HOURS（默认 8，即北京时间）计算，桶的起点按该时区存储。
+维护方式：
+- ORM 写入（报名、修改、审核通过/退回）：会话 before_flush 记下受影响报名的旧维度值，
+  after_flush 按新旧差值加减计数，与业务改动在同一事务内提交；
+- 批量 Core 更新（获奖导入等走 import_engine.bulk_update 的路径）：调用 track_bulk_update。
+统计接口只查汇总表；出现偏差时用 rebuild_stats_rollup.py 按报名表重算。
+
+规模与限制：
+- 组合里含学校名称、具体任务和三级地区，实际数据中同校同任务同状态的报名才会合并成一行，
+  汇总行数接近报名数。aggregate 对汇总表做 GROUP BY，耗时随组合数线性增长：
+  省掉的是宽行读取、参与人加载和解密，不是常数时间。常用维度集合需要更快时，应另建只含这些维度的窄表；
+- 计数行在报名/审核的同一事务内 upsert。同一小时（及同一天）、同一项目大类的时间桶是所有报名共用的行，
+  并发报名会在这一行上排队到各自事务提交。报名事务很短，目前可以接受；高峰期锁等待明显时，
+  需要把时间桶改为分片计数或异步汇总。
+"""
+import hashlib
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, inspect, select
+
+
+def _env_int(name, default):
+    try:
+        return int(str(os.environ.get(name, '') or '').strip() or default)
+    except Exception:
+        return default
+
+
+# (接口里的维度名, applications / application_stats 的列名)
+DIMENSIONS = (
+    ('category', 'category'),
+    ('task', 'task'),
+    ('education_level', 'education_level'),
+    ('region', 'school_region'),
+    ('city', 'school_city'),
+    ('district', 'school_district'),
+    ('school', 'school_name'),
+    ('status', 'status'),
+    ('award_level', 'award_level'),
+)
+COLUMNS = tuple(c for _n, c in DIMENSIONS)
+DIMENSION_COLUMNS = dict(DIMENSIONS)
+
+# 时间序列：指标 -> (时间列, 需要的当前状态)
+METRICS = {
+    'registrations': ('created_at', None),
+    'approvals': ('reviewed_at', 'approved'),
+    'rejections': ('reviewed_at', 'rejected'),
+}
+GRANULARITIES = ('hour', 'day')
+GRANULARITY_STEPS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+# 一次查询最多返回的桶数（31 天的小时 / 一年的天）与默认范围
+MAX_BUCKETS = {'hour': 744, 'day': 366}
+DEFAULT_BUCKETS = {'hour': 48, 'day': 30}
+TZ_OFFSET = timedelta(hours=_env_int('STATS_TZ_OFFSET_HOURS', 8))
+# 变化时需要更新汇总的列
+WATCHED = COLUMNS + ('created_at', 'reviewed_at')
+
+_IN_CHUNK = 500
+_installed = False
+
+
+def _norm(value) -> str:
+    return '' if value is None else str(value)
+
+
+def _values_of(obj) -> dict:
+    return {c: getattr(obj, c, None) for c in WATCHED}
+
+
+def _dims(values) -> tuple:
+    return tuple(_norm(values.get(c)) for c in COLUMNS)
+
+
+def floor_bucket(local, granularity):
+    """本地时间 -> 所在桶的起点"""
+    if granularity == 'day':
+        return local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return local.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_start(ts, granularity):
+    """UTC 时间 -> 所在桶的起点（STATS_TZ_OFFSET_HOURS 时区）"""
+    return floor_bucket(ts + TZ_OFFSET, granularity)
+
+
+def local_now():
+    return datetime.utcnow() + TZ_OFFSET
+
+
+def time_keys(values):
+    """一条报名对时间序列的贡献：[(粒度, 桶起点, 指标, 项目大类), ...]"""
+    keys = []
+    category = _norm(values.get('category'))
+    for metric, (column, status) in METRICS.items():
+        ts = values.get(column)
+        if ts is None or (status is not None and values.get('status') != status):
+            continue
+        for granularity in GRANULARITIES:
+            keys.append((granularity, bucket_start(ts, granularity), metric, category))
+    return keys
+
+
+def _add(deltas, time_deltas, values, sign):
+    deltas[_dims(values)] += sign
+    for key in time_keys(values):
+        time_deltas[key] += sign
+
+
+def key_hash(dims) -> str:
+    return hashlib.sha1('\x1f'.join(dims).encode('utf-8')).hexdigest()
+
+
+def _fetch_values(conn, ids):
+    """按 id 读取报名当前（数据库中的）统计相关列，返回 {id: {列: 值}}"""
+    from models import Application
+
+    table = Application.__table__
+    out = {}
+    ids = list(dict.fromkeys(i for i in ids if i is not None))
+    for start in range(0, len(ids), _IN_CHUNK):
+        part = ids[start:start + _IN_CHUNK]
+        rows = conn.execute(select(table.c.id, *[table.c[c] for c in WATCHED]).where(table.c.id.in_(part)))
+        for row in rows:
+            out[row[0]] = dict(zip(WATCHED, row[1:]))
+    return out
+
+
+def _upsert_increment(conn, table, rows, key_columns, count_column):
+    """按唯一键累加计数：有则加，无则插入。
+
+    按唯一键排序后再写：并发事务按同一顺序给汇总行加锁，不会互相等待对方已锁住的行而死锁。
+    """
+    rows = sorted(rows, key=lambda row: tuple((row[k] is not None, row[k]) for k in key_columns))
+    dialect = conn.dialect.name
+    count_col = table.c[count_column]
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update({count_column: count_col + stmt.inserted[count_column]})
+        conn.execute(stmt, rows)
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[k] for k in key_columns],
+            set_={count_column: count_col + stmt.excluded[count_column]}
+        )
+        conn.execute(stmt, rows)
+    else:
+        for row in rows:
+            cond = [table.c[k] == row[k] for k in key_columns]
+            res = conn.execute(table.update().where(*cond).values({count_column: count_col + row[count_column]}))
+            if not res.rowcount:
+                conn.execute(table.insert().values(**row))
+
+
+def apply_deltas(conn, deltas):
+    """把 {dims: 增量} 累加到汇总表（upsert）"""
+    from models import ApplicationStat
+
+    rows = [
+        dict(zip(COLUMNS, dims), key_hash=key_hash(dims), app_count=n)
+        for dims, n in deltas.items() if n
+    ]
+    if not rows:
+        return 0
+    _upsert_increment(conn, ApplicationStat.__table__, rows, ('key_hash',), 'app_count')
+    return len(rows)
+
+
+def apply_time_deltas(conn, deltas):
+    """把 {(粒度, 桶起点, 指标, 项目大类): 增量} 累加到时间序列表"""
+    from models import ApplicationTimeBucket
+
+    rows = [
+        {'granularity': g, 'bucket_start': b, 'metric': m, 'category': c, 'event_count': n}
+        for (g, b, m, c), n in deltas.items() if n
+    ]
+    if rows:
+        _upsert_increment(
+            conn, ApplicationTimeBucket.__table__, rows,
+            ('granularity', 'bucket_start', 'metric', 'category'), 'event_count'
+        )
+    return len(rows)
+
+
+def track_bulk_update(session, changes):
+    """Core 批量更新 applications 之前调用：changes 同 import_engine.bulk_update"""
+    if not changes:
+        return
+    cols = [c for c in changes[0] if c in WATCHED]
+    if not cols:
+        return
+    conn = session.connection()
+    current = _fetch_values(conn, [ch['id'] for ch in changes])
+    deltas = Counter()
+    time_deltas = Counter()
+    for ch in changes:
+        before = current.get(ch['id'])
+        if before is None:
+            continue
+        after = dict(before, **{c: ch[c] for c in cols})
+        _add(deltas, time_deltas, before, -1)
+        _add(deltas, time_deltas, after, 1)
+        # 同一批里同一报名出现多次时，后一次以前一次的结果为旧值
+        current[ch['id']] = after
+    apply_deltas(conn, deltas)
+    apply_time_deltas(conn, time_deltas)
+
+
+def _watched_changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[c].history.has_changes() for c in WATCHED)
+
+
+def _before_flush(session, flush_context, instances):
+    from models import Application
+
+    touched = {}
+    for obj in session.dirty:
+        if isinstance(obj, Application) and obj.id is not None and _watched_changed(obj):
+            touched[obj.id] = obj
+    for obj in session.deleted:
+        if isinstance(obj, Application) and obj.id is not None:
+            touched[obj.id] = None
+    old = _fetch_values(session.connection(), list(touched)) if touched else {}
+    session.info['_stats_rollup_pending'] = [(old[i], obj) for i, obj in touched.items() if i in old]
+
+
+def _after_flush(session, flush_context):
+    from models import Application
+
+    pending = session.info.pop('_stats_rollup_pending', None) or []
+    deltas = Counter()
+    time_deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Application):
+            _add(deltas, time_deltas, _values_of(obj), 1)
+    for before, obj in pending:
+        _add(deltas, time_deltas, before, -1)
+        if obj is not None:
+            _add(deltas, time_deltas, _values_of(obj), 1)
+    conn = session.connection()
+    apply_deltas(conn, deltas)
+    apply_time_deltas(conn, time_deltas)
+
+
+def init_stats_rollup(db):
+    """注册会话事件（重复调用无副作用）"""
+    global _installed
+    if _installed:
+        return
+    event.listen(db.session, 'before_flush', _before_flush)
+    event.listen(db.session, 'after_flush', _after_flush)
+    _installed = True
+
+
+def aggregate(session, dimensions, filters=None, top_n=None):
+    """按维度组合汇总：返回 ([(dims, count), ...] 按 count 倒序, 总数)"""
+    from models import ApplicationStat
+
+    conditions = [ApplicationStat.app_count > 0]
+    for name, value in (filters or {}).items():
+        conditions.append(getattr(ApplicationStat, DIMENSION_COLUMNS[name]) == _norm(value))
+
+    total = session.query(func.coalesce(func.sum(ApplicationStat.app_count), 0)).filter(*conditions).scalar()
+
+    cols = [getattr(ApplicationStat, DIMENSION_COLUMNS[d]) for d in dimensions]
+    count_expr = func.sum(ApplicationStat.app_count)
+    query = session.query(*cols, count_expr.label('count')).filter(*conditions)
+    query = query.group_by(*cols).order_by(count_expr.desc(), *cols)
+    if top_n:
+        query = query.limit(top_n)
+    return [(tuple(r[:-1]), int(r[-1] or 0)) for r in query.all()], int(total or 0)
+
+
+def timeseries(session, granularity, start, end, metrics, category=None, by_category=False):
+    """按桶读取时间序列（start、end 为桶起点，含两端），缺的桶补 0。
+
+    返回 (桶起点列表, {指标: [计数]}, {项目大类: {指标: [计数]}} 或 None)
+    """
+    from models import ApplicationTimeBucket as B
+
+    step = GRANULARITY_STEPS[granularity]
+    buckets = []
+    cur = start
+    while cur <= end:
+        buckets.append(cur)
+        cur += step
+    index = {b: i for i, b in enumerate(buckets)}
+
+    conditions = [
+        B.granularity == granularity,
+        B.bucket_start >= start,
+        B.bucket_start <= end,
+        B.metric.in_(metrics),
+    ]
+    if category is not None:
+        conditions.append(B.category == _norm(category))
+    cols = [B.bucket_start, B.metric] + ([B.category] if by_category else [])
+    query = session.query(*cols, func.sum(B.event_count)).filter(*conditions).group_by(*cols)
+
+    series = {m: [0] * len(buckets) for m in metrics}
+    per_category = {} if by_category else None
+    for row in query:
+        i = index.get(row[0])
+        if i is None:
+            continue
+        n = int(row[-1] or 0)
+        series[row[1]][i] += n
+        if by_category:
+            cat = per_category.setdefault(row[2], {m: [0] * len(buckets) for m in metrics})
+            cat[row[1]][i] += n
+    return buckets, series, per_category
+
+
+def compute_from_applications(session):
+    """按报名表重新计算各维度组合的计数，返回 {dims: count}"""
+    from models import Application
+
+    cols = [getattr(Application, c) for c in COLUMNS]
+    counts = Counter()
+    for row in session.query(*cols, func.count(Application.id)).group_by(*cols):
+        counts[tuple(_norm(v) for v in row[:-1])] += int(row[-1])
+    return counts
+
+
+def compute_time_buckets(session, batch_rows=5000):
+    """按报名表重新计算时间序列，返回 {(粒度, 桶起点, 指标, 项目大类): count}"""
+    from models import Application
+
+    cols = [getattr(Application, c) for c in ('category', 'status', 'created_at', 'reviewed_at')]
+    counts = Counter()
+    for row in session.query(*cols).yield_per(batch_rows):
+        for key in time_keys(row._asdict()):
+            counts[key] += 1
+    return counts
+
+
+def _diff(expected, current):
+    deltas = Counter()
+    for key in set(expected) | set(current):
+        diff = expected.get(key, 0) - current.get(key, 0)
+        if diff:
+            deltas[key] = diff
+    return deltas
+
+
+def rebuild(session, dry_run=False):
+    """按报名表重算汇总表和时间序列，返回 (有偏差的行数, 汇总行数)；dry_run 只统计偏差不写入"""
+    from models import ApplicationStat, ApplicationTimeBucket
+
+    expected = compute_from_applications(session)
+    current = Counter()
+    for row in session.query(*[getattr(ApplicationStat, c) for c in COLUMNS], ApplicationStat.app_count):
+        current[tuple(row[:-1])] += int(row[-1] or 0)
+    deltas = _diff(expected, current)
+
+    expected_buckets = compute_time_buckets(session)
+    current_buckets = Counter()
+    bucket_cols = (ApplicationTimeBucket.granularity, ApplicationTimeBucket.bucket_start,
+                   ApplicationTimeBucket.metric, ApplicationTimeBucket.category)
+    for row in session.query(*bucket_cols, ApplicationTimeBucket.event_count):
+        current_buckets[tuple(row[:-1])] += int(row[-1] or 0)
+    time_deltas = _diff(expected_buckets, current_buckets)
+
+    if not dry_run:
+        conn = session.connection()
+        apply_deltas(conn, deltas)
+        apply_time_deltas(conn, time_deltas)
+        session.query(ApplicationStat).filter(ApplicationStat.app_count <= 0).delete(synchronize_session=False)
+        session.query(ApplicationTimeBucket).filter(
+            ApplicationTimeBucket.event_count <= 0
+        ).delete(synchronize_session=False)
+    return len(deltas) + len(time_deltas), len(expected) + len(expected_buckets)
@@ -0,0 +1,100 @@
+"""测试环境：临时 sqlite 库与证书目录，必须在导入 app 之前设置环境变量。"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix='competition-web-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ['CERT_STORAGE_DIR'] = os.path.join(_TMP_DIR, 'certs')
+os.environ['REENCRYPT_STATE_DIR'] = os.path.join(_TMP_DIR, 'reencrypt')
+os.environ['IMPORT_JOB_DIR'] = os.path.join(_TMP_DIR, 'imports')
+os.environ.setdefault('ADMIN_PASSWORD', 'test-password')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def db(app):
+    """每个用例一个空库和空的证书缓存目录（自增 id 会从 1 重新开始）"""
+    from app import db as _db
+    shutil.rmtree(os.environ['CERT_STORAGE_DIR'], ignore_errors=True)
+    with app.app_context():
+        _db.drop_all()
+        _db.create_all()
+        yield _db
+        _db.session.remove()
+
+
+@pytest.fixture
+def make_application(db):
+    """报名工厂：make_application(**字段) 建一条报名并提交，未给出的必填字段用固定默认值。
+
+    联系方式走模型的加密属性；commit=False 时只加入会话，便于调用方继续修改后一次提交。
+    """
+    from models import Application
+
+    def _make(contact_phone='13800000001', contact_email='u@example.com', teacher_phone=None, commit=True, **fields):
+        values = dict(
+            category='空中对抗赛', task='3v3', education_level='初中', participant_count=1,
+            school_name='测试学校', contact_name='张三'
+        )
+        values.update(fields)
+        row = Application(**values)
+        row.contact_phone = contact_phone
+        row.contact_email = contact_email
+        if teacher_phone is not None:
+            row.teacher_phone = teacher_phone
+        db.session.add(row)
+        if commit:
+            db.session.commit()
+        return row
+
+    return _make
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app):
+    from admin_auth import create_admin_token
+    with app.app_context():
+        token = create_admin_token({'role': 'admin', 'username': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def user_headers(app):
+    from user_auth import create_user_token
+    with app.app_context():
+        token = create_user_token({'role': 'user', 'openid': 'test-openid'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def wait_for_job(client, admin_headers):
+    """轮询后台任务：wait_for_job('import' | 'export', job_id) 返回 finished / failed 时的任务状态"""
+
+    def _wait(kind, job_id, timeout=20):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = client.get(f'/api/admin/{kind}-jobs/{job_id}', headers=admin_headers).get_json()['data']
+            if job['status'] in ('finished', 'failed'):
+                return job
+            time.sleep(0.05)
+        raise AssertionError(f'{kind} job did not finish')
+
+    return _wait
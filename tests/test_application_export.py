@@ -0,0 +1,43 @@
+"""报名导出：xlsx / csv 逐批写出，内容为解密后的明文，顺序为创建时间倒序。"""
+import csv
+import io
+
+from openpyxl import load_workbook
+
+import application_export
+
+
+def _seed(make_application):
+    make_application(school_name='一中', contact_phone='13800000001', match_no='A001')
+    make_application(school_name='二中', contact_phone='13800000002')
+    make_application(school_name='三中', contact_phone='13800000003', match_no='A003')
+
+
+def test_csv_export_streams_plaintext(client, make_application, admin_headers, monkeypatch):
+    monkeypatch.setattr(application_export, 'EXPORT_BATCH_ROWS', 2)
+    _seed(make_application)
+
+    resp = client.get('/api/admin/applications/export?format=csv', headers=admin_headers)
+    assert resp.status_code == 200 and resp.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(resp.data.decode('utf-8-sig'))))
+    assert rows[0] == application_export.HEADERS
+    col = {h: i for i, h in enumerate(rows[0])}
+    assert [r[col['学校名称']] for r in rows[1:]] == ['三中', '二中', '一中']
+    assert [r[col['联系人手机号']] for r in rows[1:]] == ['13800000003', '13800000002', '13800000001']
+    assert [r[col['参赛号']] for r in rows[1:]] == ['A003', '', 'A001']
+
+
+def test_xlsx_export_matches_csv_rows(client, make_application, admin_headers):
+    _seed(make_application)
+
+    resp = client.get('/api/admin/applications/export?school_name=中', headers=admin_headers)
+    assert resp.status_code == 200
+    assert int(resp.headers['Content-Length']) == len(resp.data)
+    ws = load_workbook(io.BytesIO(resp.data)).worksheets[0]
+    rows = [list(r) for r in ws.iter_rows(values_only=True)]
+    assert ws.title == application_export.SHEET_NAME and rows[0] == application_export.HEADERS
+    assert [r[application_export.HEADERS.index('联系人手机号')] for r in rows[1:]] == [
+        '13800000003', '13800000002', '13800000001'
+    ]
+
+    assert client.get('/api/admin/applications/export?format=pdf', headers=admin_headers).status_code == 400
@@ -0,0 +1,32 @@
+"""证书基准测试：合成数据可复现，结果对比输出增减百分比。"""
+import benchmark_certificates as bench
+
+
+def test_synthetic_applications_are_seeded_and_follow_rules():
+    from config import COMPETITION_RULES
+
+    first = bench.build_applications(30, seed=7)
+    assert first == bench.build_applications(30, seed=7)
+    for application in first:
+        rule = COMPETITION_RULES[application.category][application.task]
+        assert len(application.participants) == int(rule.get('participant_count', 1) or 1)
+
+
+def test_build_jobs_renders_every_kind(db):
+    from app import _ensure_default_certificate_templates
+    from certificate_generator import CertificateGenerator
+
+    _ensure_default_certificate_templates()
+    jobs = bench.build_jobs(bench.build_applications(1), bench.KINDS)
+    assert [kind for kind, _a, _c in jobs] == list(bench.KINDS)
+    generator = CertificateGenerator()
+    for _kind, application, cfg in jobs:
+        assert generator.generate_certificate(application, cfg).startswith(b'%PDF')
+
+
+def test_compare_results_reports_deltas():
+    def _doc(cps, p95):
+        return {'results': [{'mode': 'batch', 'kind': 'all', 'certs_per_sec': cps, 'latency_ms': {'p95': p95}}]}
+
+    lines = bench.compare_results(_doc(12.0, 80.0), _doc(10.0, 100.0))
+    assert '+20.0%' in lines[1] and '-20.0%' in lines[1]
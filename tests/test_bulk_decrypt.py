@@ -0,0 +1,54 @@
+"""敏感字段批量解密：与逐字段解密结果一致，相同密文只解一次。"""
+import bulk_decrypt
+
+
+def test_to_dicts_matches_per_row_to_dict(make_application):
+    from models import Application
+
+    rows = [
+        make_application(contact_phone='13800000001', contact_email='alice@example.com'),
+        make_application(contact_phone='13800000002', contact_email='bob@example.com'),
+    ]
+    for include_sensitive in (True, False):
+        assert Application.to_dicts(rows, include_sensitive=include_sensitive) == [
+            r.to_dict(include_sensitive=include_sensitive) for r in rows
+        ]
+    masked = Application.to_dicts(rows)[0]
+    assert masked['contact_phone'] == '138****0001' and masked['contact_email'] == 'a***e@example.com'
+
+
+def test_undecryptable_row_marks_every_field_failed(make_application):
+    from models import Application
+
+    row = make_application(contact_email='alice@example.com')
+    row.teacher_phone_encrypted = 'not-a-fernet-token'
+    d = Application.to_dicts([row], include_sensitive=True)[0]
+    assert d['contact_phone'] == '解密失败' and d['teacher_phone'] == '解密失败'
+    assert Application.to_dicts([row])[0]['contact_email'] == '***'
+
+
+def test_identical_ciphertexts_are_decrypted_once(app, monkeypatch):
+    import ciphertext
+    from app import encrypt_data
+
+    token = encrypt_data('13800000001')
+    calls = []
+    real = ciphertext.decrypt_with
+    monkeypatch.setattr(ciphertext, 'decrypt_with', lambda ring, kid, t: calls.append(t) or real(ring, kid, t))
+
+    with app.test_request_context():
+        assert bulk_decrypt.decrypt_many([token, token, None]) == {token: '13800000001'}
+        assert bulk_decrypt.decrypt_many([token]) == {token: '13800000001'}
+    assert calls == [token]
+
+
+def test_thread_pool_gives_same_result(app, monkeypatch):
+    from app import encrypt_data
+
+    monkeypatch.setattr(bulk_decrypt, 'DECRYPT_POOL_MIN', 1)
+    monkeypatch.setattr(bulk_decrypt, '_CHUNK', 2)
+    tokens = [encrypt_data(f'1380000000{i}') for i in range(5)]
+    with app.app_context():
+        out = bulk_decrypt.decrypt_many(tokens + ['bad'], pool='thread', workers=2)
+    assert [out[t] for t in tokens] == [f'1380000000{i}' for i in range(5)]
+    assert out['bad'] is bulk_decrypt.FAILED
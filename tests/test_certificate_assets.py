@@ -0,0 +1,89 @@
+"""证书资源档位：档位解析、图片预处理缓存，以及 PDF 缓存按 ?profile= 分目录。"""
+import os
+
+from PIL import Image
+
+import certificate_assets
+from certificate_assets import normalize_asset_profile, prepare_image
+
+
+def _image(path, size=(2000, 1400), mode='RGBA'):
+    Image.new(mode, size, (200, 30, 30, 255) if mode == 'RGBA' else (200, 30, 30)).save(path)
+    return str(path)
+
+
+def test_normalize_asset_profile():
+    assert normalize_asset_profile('Mobile') == 'mobile'
+    assert normalize_asset_profile(' original ') == 'original'
+    assert normalize_asset_profile('') == certificate_assets.DEFAULT_ASSET_PROFILE
+    assert normalize_asset_profile('4k') == certificate_assets.DEFAULT_ASSET_PROFILE
+
+
+def test_prepare_image_downsamples_and_caches(tmp_path):
+    src = _image(tmp_path / 'bg.png')
+
+    # A4 宽 595pt、110dpi -> 约 909px；全不透明的 alpha 被丢掉
+    out = prepare_image(src, profile='mobile', draw_w_pt=595, draw_h_pt=416)
+    assert out != src and out.startswith(os.path.join(certificate_assets._ASSET_CACHE_DIR, 'mobile'))
+    with Image.open(out) as img:
+        assert img.mode == 'RGB'
+        assert img.size == (909, 636)
+
+    assert prepare_image(src, profile='mobile', draw_w_pt=595, draw_h_pt=416) == out
+    assert prepare_image(src, profile='original', draw_w_pt=595, draw_h_pt=416) == src
+
+    # 源文件变化（mtime/size）后重新生成
+    _image(tmp_path / 'bg.png', size=(1800, 1200))
+    os.utime(src, ns=(1, 1))
+    assert prepare_image(src, profile='mobile', draw_w_pt=595, draw_h_pt=416) != out
+
+
+def test_purge_asset_cache_removes_prepared_files(tmp_path):
+    src = _image(tmp_path / 'stamp.png')
+    out = prepare_image(src, profile='print', draw_w_pt=100, draw_h_pt=70)
+    assert os.path.exists(out)
+    certificate_assets.purge_asset_cache(src)
+    assert not os.path.exists(out)
+
+
+def test_pdf_cache_key_follows_requested_profile(app):
+    import certificate_routes as cr
+
+    with app.test_request_context('/api/certificate/generate/1?profile=MOBILE'):
+        assert cr._requested_asset_profile() == 'mobile'
+        assert cr._resolve_asset_profile({'asset_profile': 'original'}) == 'mobile'
+    with app.test_request_context('/api/certificate/generate/1'):
+        assert cr._requested_asset_profile() == ''
+        assert cr._resolve_asset_profile({'asset_profile': 'original'}) == 'original'
+
+    base = os.path.join(cr._CERT_CACHE_DIR, 'player')
+    assert cr._cache_pdf_path('player', '12') == os.path.join(base, '12.pdf')
+    assert cr._cache_pdf_path('player', '12', 'mobile') == os.path.join(base, 'mobile', '12.pdf')
+
+
+def test_cached_pdf_is_served_before_building_generator(client, make_application, admin_headers, monkeypatch):
+    import certificate_generator
+    import certificate_routes as cr
+
+    row = make_application(award_level='一等奖', match_no='A001')
+
+    built = []
+
+    def _stub_generator(*args, **kwargs):
+        built.append(1)
+        raise RuntimeError('stub generator')
+
+    monkeypatch.setattr(certificate_generator, 'CertificateGenerator', _stub_generator)
+    cr._register_certificate_pdf(
+        kind='coach', cert_key=str(row.id), profile='', application_id=row.id,
+        path=cr._cache_pdf_path('coach', str(row.id)), content=b'%PDF-cached', filename='coach.pdf'
+    )
+
+    resp = client.get(f'/api/certificate/generate-coach/{row.id}', headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.data == b'%PDF-cached'
+    assert built == []
+
+    # 指定了其它档位：缓存未命中，才会构造生成器
+    client.get(f'/api/certificate/generate-coach/{row.id}?profile=mobile', headers=admin_headers)
+    assert built == [1]
@@ -0,0 +1,46 @@
+"""确定性 PDF：相同输入逐字节相同，内容哈希用作 ETag 与去重存储。"""
+import os
+
+from certificate_generator import CertificateGenerator, pdf_content_hash
+
+
+def _application(make_application):
+    from app import _ensure_default_certificate_templates
+
+    _ensure_default_certificate_templates()
+    return make_application(award_level='一等奖', match_no='A001')
+
+
+def test_same_input_gives_same_bytes(make_application):
+    row = _application(make_application)
+    config = CertificateGenerator().create_default_template(row.category, row.award_level)
+    first = CertificateGenerator().generate_certificate(row, config)
+    second = CertificateGenerator().generate_certificate(row, config)
+    assert first == second
+    assert pdf_content_hash(first) == pdf_content_hash(second)
+
+    row.school_name = '另一所学校'
+    assert CertificateGenerator().generate_certificate(row, config) != first
+
+
+def test_download_etag_and_shared_blob(client, make_application, admin_headers):
+    import certificate_routes as cr
+
+    row = _application(make_application)
+    resp = client.get(f'/api/certificate/generate-coach/{row.id}', headers=admin_headers)
+    assert resp.status_code == 200
+    digest = pdf_content_hash(resp.data)
+    assert resp.headers['ETag'] == f'"{digest}"'
+
+    # 缓存文件是内容 blob 的硬链接
+    cached = cr._cache_pdf_path('coach', str(row.id))
+    assert os.path.samefile(cached, cr._blob_path(digest))
+
+    hit = client.get(f'/api/certificate/generate-coach/{row.id}', headers=admin_headers)
+    assert hit.data == resp.data and hit.headers['ETag'] == f'"{digest}"'
+
+    not_modified = client.get(
+        f'/api/certificate/generate-coach/{row.id}',
+        headers={**admin_headers, 'If-None-Match': f'"{digest}"'}
+    )
+    assert not_modified.status_code == 304
@@ -0,0 +1,44 @@
+"""证书预览：位图输出与预览缓存。"""
+import io
+
+from PIL import Image
+
+
+def _application(make_application):
+    from app import _ensure_default_certificate_templates
+
+    _ensure_default_certificate_templates()
+    return make_application(award_level='一等奖', match_no='A001')
+
+
+def test_coach_preview_renders_and_is_cached(client, make_application, admin_headers, monkeypatch):
+    import certificate_generator
+
+    row = _application(make_application)
+    # 预览只在 PDF 已登记后才缓存
+    assert client.get(f'/api/certificate/generate-coach/{row.id}', headers=admin_headers).status_code == 200
+    resp = client.get(f'/api/certificate/preview-coach/{row.id}?dpi=30', headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.mimetype == 'image/png'
+    img = Image.open(io.BytesIO(resp.data))
+    assert img.format == 'PNG'
+    # 像素尺寸按 dpi 缩放
+    double = client.get(f'/api/certificate/preview-coach/{row.id}?dpi=60', headers=admin_headers)
+    w, h = Image.open(io.BytesIO(double.data)).size
+    assert abs(w - 2 * img.size[0]) <= 2 and abs(h - 2 * img.size[1]) <= 2
+
+    built = []
+
+    def _stub_generator(*args, **kwargs):
+        built.append(1)
+        raise RuntimeError('stub generator')
+
+    monkeypatch.setattr(certificate_generator, 'CertificateGenerator', _stub_generator)
+    cached = client.get(f'/api/certificate/preview-coach/{row.id}?dpi=30', headers=admin_headers)
+    assert cached.status_code == 200
+    assert cached.data == resp.data
+    assert built == []
+
+    # 不同格式是另一份缓存
+    client.get(f'/api/certificate/preview-coach/{row.id}?dpi=30&fmt=webp', headers=admin_headers)
+    assert built == [1]
@@ -0,0 +1,40 @@
+"""generated_certificates 登记表：下载、ZIP 打包与覆盖率查询都以登记表为准。"""
+import io
+import json
+import zipfile
+
+
+def _application(make_application, match_no, award_level='一等奖'):
+    from app import _ensure_default_certificate_templates
+
+    _ensure_default_certificate_templates()
+    return make_application(award_level=award_level, match_no=match_no)
+
+
+def test_download_registers_and_zip_reads_registry(client, make_application, admin_headers):
+    from models import GeneratedCertificate
+
+    first = _application(make_application, 'A001')
+    second = _application(make_application, 'A002')
+    resp = client.get(f'/api/certificate/generate-coach/{first.id}', headers=admin_headers)
+    assert resp.status_code == 200
+
+    row = GeneratedCertificate.query.filter_by(kind='coach', cert_key=str(first.id), profile='').one()
+    assert row.application_id == first.id
+    assert row.byte_size == len(resp.data)
+    assert row.render_ms is not None and row.filename.endswith('.pdf')
+
+    coverage = client.get('/api/admin/certificates/coverage', headers=admin_headers).get_json()['data']
+    assert coverage['total_awarded'] == 2
+    assert coverage['kinds']['coach'] == {'generated': 1, 'missing': 1, 'missing_application_ids': [second.id]}
+    assert coverage['kinds']['player']['missing'] == 2
+
+    resp = client.get('/api/admin/certificates/download-zip?kind=coach', headers=admin_headers)
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as zf:
+        manifest = json.loads(zf.read('manifest.json'))
+        assert manifest['found'] == 1
+        assert manifest['files'][0]['sha256'] == row.fingerprint
+        assert zf.read(manifest['files'][0]['path']) == client.get(
+            f'/api/certificate/generate-coach/{first.id}', headers=admin_headers
+        ).data
@@ -0,0 +1,103 @@
+"""glyph_dx 文字：单个文本对象里按段输出，字形位置与逐字 drawString 相同；char_space 需模板 apply_char_space 开启后用 Tc 输出。"""
+import io
+import re
+
+import pytest
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+from certificate_generator import CertificateGenerator
+
+FONT = 'Helvetica'
+SIZE = 20.0
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return CertificateGenerator()
+
+
+def _glyph_origins(code, chars, font, size, char_space):
+    """按 Td / Tj 还原每个字的 x（相对文本原点）"""
+    origins = []
+    line_x = 0.0
+    cursor = 0.0
+    for op in re.findall(r'(-?[\d.]+) -?[\d.]+ Td|\((.*?)\) Tj', code):
+        if op[0]:
+            line_x += float(op[0])
+            cursor = line_x
+            continue
+        for ch in op[1]:
+            origins.append(cursor)
+            cursor += pdfmetrics.stringWidth(ch, font, size) + char_space
+    assert len(origins) == len(chars)
+    return origins
+
+
+def _expected(chars, dxs, font, size, char_space):
+    out, adv = [], 0.0
+    for ch, dx in zip(chars, dxs):
+        out.append(adv + dx)
+        adv += pdfmetrics.stringWidth(ch, font, size) + char_space
+    return out
+
+
+@pytest.mark.parametrize('char_space', [0.0, -0.9])
+def test_glyph_run_positions_match_per_glyph_layout(generator, char_space):
+    chars = list('ABCDEF')
+    dxs = [0.0, 2.0, 2.0, 0.0, -1.5, -1.5]
+    c = canvas.Canvas(io.BytesIO())
+    c.setFont(FONT, SIZE)
+    text_obj = c.beginText(0, 0)
+    generator._emit_glyph_run(text_obj, chars, dxs, [FONT] * len(chars), FONT, SIZE, char_space=char_space)
+    code = text_obj.getCode()
+
+    # 偏移相同的相邻字合成一段：A / BC / D / EF 四段
+    assert code.count(' Tj') == 4
+    got = _glyph_origins(code, chars, FONT, SIZE, char_space)
+    assert got == pytest.approx(_expected(chars, dxs, FONT, SIZE, char_space), abs=1e-3)
+
+
+def test_char_space_is_applied_with_text_object(generator):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pageCompression=0)
+    c.setFont(FONT, SIZE)
+    generator._current_char_space = 1.5
+    try:
+        generator.draw_text(c, 'AB', 0, 100, 200, font_name=FONT, font_size=SIZE, align='left')
+    finally:
+        generator._current_char_space = 0.0
+    generator.draw_text(c, 'CD', 0, 50, 200, font_name=FONT, font_size=SIZE, align='left')
+    c.showPage()
+    c.save()
+    data = buf.getvalue()
+    assert b'1.5 Tc' in data and b'0 Tc' in data
+    # 没有字间距的文字仍是普通 drawString，不带 Tc
+    assert data.count(b' Tc') == 2
+
+
+def _render_uncompressed(generator, monkeypatch, template_config):
+    monkeypatch.setattr(
+        generator, '_new_pdf_canvas',
+        lambda buffer, page_size: canvas.Canvas(buffer, pagesize=page_size, pageCompression=0),
+    )
+    return generator.generate_certificate(None, template_config)
+
+
+def test_template_char_space_is_ignored_by_default(generator, monkeypatch):
+    template = {
+        'coord_unit': 'px', 'y_origin': 'top',
+        'texts': [{'text': 'AB', 'font': FONT, 'font_size': 40, 'x': 0, 'y': 200, 'width': 600, 'char_space': -1.2}],
+    }
+    pdf = _render_uncompressed(generator, monkeypatch, template)
+    # 与引入 Tc 之前的输出一致：char_space 不生效
+    assert b' Tc' not in pdf
+
+
+def test_template_char_space_applies_when_opted_in(generator, monkeypatch):
+    template = {
+        'coord_unit': 'px', 'y_origin': 'top', 'apply_char_space': True,
+        'texts': [{'text': 'AB', 'font': FONT, 'font_size': 40, 'x': 0, 'y': 200, 'width': 600, 'char_space': -1.2}],
+    }
+    pdf = _render_uncompressed(generator, monkeypatch, template)
+    assert b'-0.9 Tc' in pdf and b'0 Tc' in pdf
@@ -0,0 +1,32 @@
+"""后台导出：202 返回 job_id，完成后通过短期签名链接下载；相同筛选条件在复用窗口内复用同一任务。"""
+import csv
+import io
+
+
+def test_async_csv_export_download_and_reuse(client, make_application, admin_headers, wait_for_job):
+    make_application()
+
+    url = '/api/admin/applications/export?async=1&format=csv&category=空中对抗赛'
+    resp = client.get(url, headers=admin_headers)
+    assert resp.status_code == 202
+    job_id = resp.get_json()['data']['job_id']
+
+    job = wait_for_job('export', job_id)
+    assert job['status'] == 'finished' and 'artifact' not in job
+    assert job['result']['row_count'] == 1
+
+    # 下载链接本身即凭证，不带 Authorization 头
+    download = client.get(job['download_url'])
+    assert download.status_code == 200
+    rows = list(csv.reader(io.StringIO(download.data.decode('utf-8-sig'))))
+    assert len(rows) == 2 and '13800000001' in rows[1]
+
+    again = client.get(url, headers=admin_headers).get_json()['data']
+    assert again == {'job_id': job_id, 'reused': True}
+    other = client.get(url.replace('format=csv', 'format=xlsx'), headers=admin_headers).get_json()['data']
+    assert other['job_id'] != job_id and not other['reused']
+    wait_for_job('export', other['job_id'])
+
+
+def test_bad_download_token_is_rejected(client, db):
+    assert client.get('/api/admin/export-downloads/not-a-token').status_code == 403
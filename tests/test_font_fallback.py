@@ -0,0 +1,97 @@
+"""逐字字体回退：字形覆盖索引与按字体拆段。"""
+import os
+import re
+
+import pytest
+import reportlab
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+import certificate_generator
+from certificate_generator import CertificateGenerator
+
+
+@pytest.fixture(scope='module')
+def generator():
+    g = CertificateGenerator()
+    # 测试环境没有中文 TTF，用 reportlab 自带的 Vera 充当一个只覆盖拉丁字符的 TrueType 字体
+    pdfmetrics.registerFont(TTFont('Vera', os.path.join(os.path.dirname(reportlab.__file__), 'fonts', 'Vera.ttf')))
+    g.registered_fonts.add('Vera')
+    g.glyph_coverage['Vera'] = certificate_generator._font_coverage('Vera')
+    return g
+
+
+def test_font_coverage_index(generator):
+    vera = generator.glyph_coverage['Vera']
+    assert ord('A') in vera and ord('中') not in vera
+    helvetica = generator.glyph_coverage['Helvetica']
+    assert ord('é') in helvetica and ord('中') not in helvetica
+    # CID 字体无法枚举码位，视为全覆盖
+    assert generator.glyph_coverage['STSong-Light'] is None
+    # 按 (字体名, 文件, mtime) 缓存
+    assert certificate_generator._font_coverage('Vera') is vera
+
+
+def test_split_font_runs_uses_first_covering_font(generator):
+    assert generator.split_font_runs('Hello', 'Helvetica') == [('Helvetica', 'Hello')]
+    assert generator.split_font_runs('张三 Li', 'Helvetica') == [
+        ('STSong-Light', '张三'), ('Helvetica', ' Li'),
+    ]
+    # 模板的 font_fallback 覆盖默认回退链
+    generator._current_font_fallback = ['Vera', 'STSong-Light']
+    try:
+        assert generator.split_font_runs('A€中', 'Vera') == [('Vera', 'A€'), ('STSong-Light', '中')]
+    finally:
+        generator._current_font_fallback = None
+
+
+def test_text_width_sums_run_widths(generator):
+    text = '李Lee'
+    expected = pdfmetrics.stringWidth('李', 'STSong-Light', 20) + pdfmetrics.stringWidth('Lee', 'Helvetica', 20)
+    assert generator.text_width(text, 'Helvetica', 20) == pytest.approx(expected)
+    assert generator.text_width(text, 'Helvetica', 20, char_space=1.0) == pytest.approx(expected + 3.0)
+
+
+def test_draw_string_runs_switches_to_fallback_for_single_run(generator):
+    from io import BytesIO
+
+    from PIL import Image
+    from reportlab.pdfgen import canvas as pdf_canvas
+
+    from certificate_raster import RasterCanvas
+
+    # 整行都不在主字体里：只拆出一段，但那一段是回退字体
+    assert generator.split_font_runs('张三', 'Helvetica') == [('STSong-Light', '张三')]
+
+    buf = BytesIO()
+    c = pdf_canvas.Canvas(buf, pagesize=(200, 100), pageCompression=0)
+    c.setFont('Helvetica', 20)
+    generator.draw_string_runs(c, 10, 40, '张三', 'Helvetica', 20)
+    assert c._fontname == 'Helvetica'
+    c.showPage()
+    c.save()
+    pdf = buf.getvalue()
+    # 回退字体进了字体资源，正文用它的资源名输出
+    assert b'/BaseFont /STSong-Light' in pdf
+    text_font = re.search(rb'/(F\d+) 20 Tf[^\n]*Tj', pdf).group(1)
+    assert b'/Name /' + text_font + b' /Subtype /Type0' in pdf
+
+    class RecordingCanvas(RasterCanvas):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.drawn = []
+
+        def drawString(self, x, y, text, *args, **kwargs):
+            self.drawn.append((self._fontname, text))
+            super().drawString(x, y, text, *args, **kwargs)
+
+    buf = BytesIO()
+    rc = RecordingCanvas(buf, (200, 100), dpi=72)
+    rc.setFont('Helvetica', 20)
+    generator.draw_string_runs(rc, 10, 40, '张三', 'Helvetica', 20)
+    assert rc.drawn == [('STSong-Light', '张三')]
+    assert rc._fontname == 'Helvetica'
+    rc.save()
+    buf.seek(0)
+    img = Image.open(buf).convert('L')
+    assert img.getextrema()[0] < 128
@@ -0,0 +1,86 @@
+"""分块导入中断后续跑：检查点只存增量，续跑结果与一次导完相同。"""
+import json
+
+import pandas as pd
+
+from import_engine import run_import
+
+AWARD_LEVELS = ['一等奖', '二等奖', '三等奖']
+
+
+class _Sheet:
+    """按批产出 DataFrame 的 SheetReader 替身；stop_after 批之后抛异常模拟中断"""
+
+    def __init__(self, df, batch_rows, stop_after=None):
+        self.columns = df.columns
+        self.total_rows = len(df)
+        self._df = df
+        self._batch_rows = batch_rows
+        self._stop_after = stop_after
+
+    def __iter__(self):
+        for n, start in enumerate(range(0, len(self._df), self._batch_rows)):
+            if self._stop_after is not None and n >= self._stop_after:
+                raise RuntimeError('lost connection')
+            yield self._df.iloc[start:start + self._batch_rows]
+
+
+def _seed(make_application):
+    for i in range(20):
+        make_application(
+            school_name=f'测试学校{i}', match_no=f'A{i:03d}', contact_phone=f'138{i:08d}', contact_email=f'u{i}@example.com'
+        )
+
+
+def _sheet_frame():
+    # 每 3 行一个对账阶段的错误（参赛号不存在），另有校验阶段的错误（空等级）
+    rows = []
+    for i in range(40):
+        match_no = f'A{i % 20:03d}' if i % 3 else f'Z{i:03d}'
+        rows.append({'参赛号': match_no, '获奖等级': '' if i % 7 == 6 else AWARD_LEVELS[i % 3]})
+    return pd.DataFrame(rows)
+
+
+def _new_log(db):
+    from models import ImportLog
+
+    log = ImportLog(import_type='award', total_count=0, success_count=0, failed_count=0, status='running')
+    db.session.add(log)
+    db.session.commit()
+    return log
+
+
+def _result(report):
+    errors = [tuple(r) for r in report.error_frame().itertuples(index=False, name=None)]
+    return errors, sorted(report.updated_ids), report.success_count, report.failed_count
+
+
+def test_resume_from_incremental_checkpoint(db, make_application):
+    from models import ImportCheckpointChunk
+
+    _seed(make_application)
+    df = _sheet_frame()
+    expected = _result(run_import(db.session, 'award', _Sheet(df, 10), award_levels=AWARD_LEVELS, chunk_rows=5))
+    db.session.rollback()
+
+    log = _new_log(db)
+    try:
+        run_import(db.session, 'award', _Sheet(df, 10, stop_after=2), award_levels=AWARD_LEVELS,
+                   import_log=log, chunk_rows=5)
+    except RuntimeError:
+        db.session.rollback()
+    else:
+        raise AssertionError('导入应在第 3 批时中断')
+
+    chunks = ImportCheckpointChunk.query.filter_by(import_log_id=log.id).all()
+    assert len(chunks) >= 2
+    assert max(c.checkpoint_row for c in chunks) == log.checkpoint_row
+    # checkpoint_data 只存计数，错误行和报名 ID 在分块明细里
+    assert set(json.loads(log.checkpoint_data)) == {'success_count'}
+    # 每块只存本块的增量：同一错误行不会出现在两块里
+    rows = [e['行号'] for c in chunks for e in json.loads(c.data)['errors']]
+    assert len(rows) == len(set(rows))
+
+    report = run_import(db.session, 'award', _Sheet(df, 10), award_levels=AWARD_LEVELS,
+                        import_log=log, chunk_rows=5)
+    assert _result(report) == expected
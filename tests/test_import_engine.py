@@ -0,0 +1,126 @@
+"""Excel 导入对账引擎：逐行错误原因、参赛号改派、优秀辅导员按电话更新或新增。"""
+import pandas as pd
+
+import import_engine
+
+
+def test_match_numbers_row_errors_and_swap(db, make_application):
+    from models import Application
+
+    a = make_application(contact_phone='13800000001', match_no='A001')
+    b = make_application(contact_phone='13800000002', match_no='A002')
+    make_application(contact_phone='13800000003', status='rejected')
+
+    df = pd.DataFrame({
+        # 第 1 行时 A002 仍被 b 占用；第 2 行 b 改为 A003；第 3 行文件内重复
+        '参赛号': ['A002', 'A003', 'A002', 'A004', 'A005', float('nan')],
+        '手机号': ['13800000001', '13800000002', '13800000001', '13800000003', '13900000000', '13800000001'],
+    })
+    report = import_engine.run_import(db.session, 'match_no', df)
+    db.session.commit()
+
+    assert (report.total_count, report.success_count, report.failed_count) == (6, 1, 5)
+    assert [e['错误原因'] for e in report.error_data] == [
+        f'参赛号已被其他报名占用(报名ID={b.id})',
+        '参赛号在本次导入文件中重复',
+        '该报名已退回(rejected)，不分配参赛号',
+        '未找到匹配的报名记录',
+        '参赛号为空',
+    ]
+    db.session.expire_all()
+    assert db.session.get(Application, a.id).match_no == 'A001'
+    assert db.session.get(Application, b.id).match_no == 'A003'
+
+
+def test_match_numbers_release_then_take(db, make_application):
+    from models import Application
+
+    a = make_application(contact_phone='13800000001', match_no='A001')
+    b = make_application(contact_phone='13800000002', match_no='A002')
+
+    df = pd.DataFrame({'参赛号': ['A003', 'A002'], '手机号': ['13800000002', '13800000001']})
+    report = import_engine.run_import(db.session, 'match_no', df)
+    db.session.commit()
+
+    assert report.failed_count == 0 and report.updated_ids == [b.id, a.id]
+    db.session.expire_all()
+    assert db.session.get(Application, a.id).match_no == 'A002'
+    assert db.session.get(Application, b.id).match_no == 'A003'
+
+
+def test_match_numbers_compare_case_insensitively(db, make_application):
+    from models import Application
+
+    a = make_application(contact_phone='13800000001', match_no='A001')
+    b = make_application(contact_phone='13800000002', match_no='A002')
+    c = make_application(contact_phone='13800000003')
+
+    df = pd.DataFrame({
+        # a002 与 b 的 A002 是同一个参赛号；b01 / B01 在文件内重复；a 改成小写写法不算占用
+        '参赛号': ['a002', 'b01', 'B01', 'a001'],
+        '手机号': ['13800000003', '13800000003', '13800000002', '13800000001'],
+    })
+    report = import_engine.run_import(db.session, 'match_no', df)
+    db.session.commit()
+
+    assert [e['错误原因'] for e in report.error_data] == [
+        f'参赛号已被其他报名占用(报名ID={b.id})',
+        '参赛号在本次导入文件中重复',
+    ]
+    assert report.updated_ids == [c.id, a.id]
+    db.session.expire_all()
+    assert db.session.get(Application, a.id).match_no == 'a001'
+    assert db.session.get(Application, b.id).match_no == 'A002'
+    assert db.session.get(Application, c.id).match_no == 'b01'
+
+
+def test_awards_match_numbers_case_insensitively(db, make_application):
+    from models import Application
+
+    a = make_application(contact_phone='13800000001', match_no='A001')
+    df = pd.DataFrame({'参赛号': ['a001'], '获奖等级': ['一等奖']})
+    report = import_engine.run_import(db.session, 'award', df)
+    db.session.commit()
+
+    assert report.failed_count == 0 and report.updated_ids == [a.id]
+    db.session.expire_all()
+    assert db.session.get(Application, a.id).award_level == '一等奖'
+
+
+def test_awards(db, make_application):
+    from models import Application
+
+    a = make_application(contact_phone='13800000001', match_no='A001')
+    df = pd.DataFrame({'参赛号': ['A001', 'A001', 'A404', 'A001'], '获奖等级': ['一等奖', '特等奖', '二等奖', '']})
+    report = import_engine.run_import(db.session, 'award', df, award_levels=['一等奖', '二等奖'])
+    db.session.commit()
+
+    assert report.success_count == 1
+    assert [e['错误原因'] for e in report.error_data] == [
+        '获奖等级不合法（允许：一等奖,二等奖）',
+        '未找到匹配的参赛号',
+        '参赛号或获奖等级为空',
+    ]
+    db.session.expire_all()
+    assert db.session.get(Application, a.id).award_level == '一等奖'
+
+
+def test_excellent_coaches_upsert(db):
+    from models import ExcellentCoach
+
+    coach = ExcellentCoach(teacher_name='旧名字')
+    coach.teacher_phone = '13800000001'
+    db.session.add(coach)
+    db.session.commit()
+
+    df = pd.DataFrame({
+        '指导老师姓名': ['李老师', '王老师', '赵老师', ''],
+        '指导老师电话': ['13800000001', '13800000002', '13800000002', '13800000003'],
+    })
+    report = import_engine.run_import(db.session, 'excellent_coach', df)
+    db.session.commit()
+
+    assert (report.success_count, report.failed_count) == (2, 2)
+    db.session.expire_all()
+    coaches = {c.teacher_phone: c.teacher_name for c in ExcellentCoach.query.all()}
+    assert coaches == {'13800000001': '李老师', '13800000002': '王老师'}
@@ -0,0 +1,57 @@
+"""后台导入：202 返回 job_id，任务结束后数据与 ImportLog 一起落库；进程中断的任务查询时标记为失败。"""
+import io
+import json
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import import_jobs
+
+
+def _xlsx(rows):
+    buf = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buf, index=False)
+    buf.seek(0)
+    return buf
+
+
+def test_async_award_import(client, db, make_application, admin_headers, wait_for_job):
+    from models import Application, ImportLog
+
+    row = make_application(match_no='A001')
+
+    file = _xlsx({'参赛号': ['A001', 'A404'], '获奖等级': ['一等奖', '二等奖']})
+    resp = client.post('/api/admin/import-awards?async=1', headers=admin_headers,
+                       data={'file': (file, 'awards.xlsx')}, content_type='multipart/form-data')
+    assert resp.status_code == 202
+
+    job = wait_for_job('import', resp.get_json()['data']['job_id'])
+    assert job['status'] == 'finished' and 'upload_path' not in job
+    assert job['progress']['processed_rows'] == 2
+    assert {k: job['result'][k] for k in ('total_count', 'success_count', 'failed_count')} == {
+        'total_count': 2, 'success_count': 1, 'failed_count': 1
+    }
+
+    db.session.expire_all()
+    assert db.session.get(Application, row.id).award_level == '一等奖'
+    log = db.session.get(ImportLog, job['result']['import_log_id'])
+    assert log.import_type == 'award' and log.error_log_available
+
+
+def test_stale_running_job_reads_as_failed(app):
+    from admin_routes import IMPORT_STALE_SECONDS
+
+    state = {
+        'job_id': 'stale-job', 'status': 'running', 'error': None,
+        'progress': {'stage': 'applying'}, 'upload_path': '/nonexistent.xlsx',
+    }
+    import_jobs._write_state(state)
+    assert import_jobs.read_job('stale-job')['status'] == 'running'
+
+    state['updated_at'] = (datetime.now() - timedelta(seconds=IMPORT_STALE_SECONDS + 1)).isoformat()
+    with open(import_jobs._job_path('stale-job'), 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    job = import_jobs.read_job('stale-job')
+    assert job['status'] == 'failed' and job['progress']['stage'] == 'failed'
+    assert import_jobs.read_job('stale-job')['status'] == 'failed'
@@ -0,0 +1,54 @@
+"""导入错误日志：分块存放、列表只返回元数据并按游标分页、下载逐块输出。"""
+import base64
+
+import import_artifacts
+
+
+def _log(db, import_type='award', content=b''):
+    from models import ImportLog
+
+    log = ImportLog(import_type=import_type, total_count=1, success_count=0, failed_count=1)
+    db.session.add(log)
+    db.session.flush()
+    import_artifacts.save_error_log(log, content)
+    db.session.commit()
+    return log
+
+
+def test_error_log_is_chunked_and_streamed(client, db, admin_headers, monkeypatch):
+    from models import ImportLogBlob
+
+    monkeypatch.setattr(import_artifacts, 'BLOB_CHUNK_SIZE', 4)
+    log = _log(db, content=b'0123456789')
+    assert log.error_log_size == 10 and log.error_log_content is None
+    assert ImportLogBlob.query.filter_by(import_log_id=log.id).count() == 3
+
+    resp = client.get(f'/api/admin/download-error-log/{log.id}', headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.headers['Content-Length'] == '10' and resp.data == b'0123456789'
+    assert "filename*=UTF-8''" in resp.headers['Content-Disposition']
+
+
+def test_legacy_base64_error_log_still_downloads(client, db, admin_headers):
+    log = _log(db)
+    log.error_log_content = base64.b64encode(b'legacy').decode()
+    db.session.commit()
+
+    resp = client.get(f'/api/admin/download-error-log/{log.id}', headers=admin_headers)
+    assert resp.data == b'legacy'
+    assert client.get(f'/api/admin/download-error-log/{log.id + 1}', headers=admin_headers).status_code == 404
+
+
+def test_import_log_listing_pages_metadata(client, db, admin_headers):
+    ids = [_log(db, content=b'x' * 10).id for _ in range(3)]
+    _log(db, import_type='match_no')
+
+    data = client.get('/api/admin/import-logs?import_type=award&per_page=2', headers=admin_headers).get_json()['data']
+    assert data['has_more'] and len(data['logs']) == 2
+    assert 'error_log_content' not in data['logs'][0]
+    assert data['logs'][0]['error_log_available'] and data['logs'][0]['error_log_size'] == 10
+
+    rest = client.get(f"/api/admin/import-logs?import_type=award&per_page=2&cursor={data['next_cursor']}",
+                      headers=admin_headers).get_json()['data']
+    assert not rest['has_more']
+    assert sorted(log['id'] for log in data['logs'] + rest['logs']) == ids
@@ -0,0 +1,76 @@
+"""导入校验（整列向量化）与原逐行 iterrows 实现的错误明细一致：行号、错误原因及错误行里的取值。"""
+import numpy as np
+import pandas as pd
+
+from import_engine import run_import
+
+NaN = np.nan
+AWARD_LEVELS = ['一等奖', '二等奖', '三等奖']
+
+
+def _seed(make_application):
+    for i, (phone, match_no) in enumerate([('13800000001', 'A001'), ('13800000002', None)]):
+        make_application(
+            school_name=f'测试学校{i}', match_no=match_no, contact_phone=phone, contact_email=f'u{i}@example.com'
+        )
+
+
+def _errors(report):
+    return [tuple(r) for r in report.error_frame().itertuples(index=False, name=None)]
+
+
+def test_award_validation_errors(db, make_application):
+    _seed(make_application)
+    df = pd.DataFrame({
+        '参赛号': ['A001', NaN, 'A002', 'A003', 'A404', 'None', 'A001', '  '],
+        '获奖等级': ['一等奖', '二等奖', NaN, '特等奖', '三等奖', '一等奖', '二等奖', '一等奖'],
+    })
+    report = run_import(db.session, 'award', df, award_levels=AWARD_LEVELS)
+
+    assert _errors(report) == [
+        (3, '', '二等奖', '参赛号或获奖等级为空'),
+        (4, 'A002', '', '参赛号或获奖等级为空'),
+        (5, 'A003', '特等奖', '获奖等级不合法（允许：一等奖,二等奖,三等奖）'),
+        (6, 'A404', '三等奖', '未找到匹配的参赛号'),
+        (7, 'None', '一等奖', '参赛号或获奖等级为空'),
+        (9, '', '一等奖', '参赛号或获奖等级为空'),
+    ]
+    # 同一参赛号出现多行都计成功，以最后一行为准
+    assert (report.total_count, report.success_count, report.failed_count) == (8, 2, 6)
+
+
+def test_match_no_validation_errors(db, make_application):
+    _seed(make_application)
+    df = pd.DataFrame({
+        '参赛号': ['M001', NaN, 'M001', 'M002', 'M003', 'M002', 'nan'],
+        '手机号': ['13800000002', '13800000002', '13800000001', NaN, '13999999999', '13800000001', '13800000002'],
+    })
+    report = run_import(db.session, 'match_no', df)
+
+    assert _errors(report) == [
+        (3, '13800000002', '', '参赛号为空'),
+        (4, '13800000001', 'M001', '参赛号在本次导入文件中重复'),
+        (5, '', 'M002', '手机号为空'),
+        (6, '13999999999', 'M003', '未找到匹配的报名记录'),
+        # 手机号为空的行（第 5 行）已占用了 M002：逐行实现先记参赛号再检查手机号
+        (7, '13800000001', 'M002', '参赛号在本次导入文件中重复'),
+        (8, '13800000002', 'nan', '参赛号为空'),
+    ]
+    assert report.success_count == 1
+
+
+def test_excellent_coach_validation_keeps_nan_text(db):
+    df = pd.DataFrame({
+        '指导老师姓名': ['王老师', NaN, '李老师', '赵老师', '', '钱老师'],
+        '指导老师电话': ['13900000001', '13900000002', NaN, '13900000001', '13900000003', ' 13900000004 '],
+    })
+    report = run_import(db.session, 'excellent_coach', df)
+
+    # 原实现 str(v or '').strip()：NaN 为真值，错误明细里是 'nan' 而不是空串
+    assert _errors(report) == [
+        (3, 'nan', '13900000002', '姓名或电话为空'),
+        (4, '李老师', 'nan', '姓名或电话为空'),
+        (5, '赵老师', '13900000001', '该电话在本次导入文件中重复'),
+        (6, '', '13900000003', '姓名或电话为空'),
+    ]
+    assert report.success_count == 2
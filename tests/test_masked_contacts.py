@@ -0,0 +1,52 @@
+"""脱敏展示列：写入时落库，非敏感序列化不解密；backfill 补齐旧记录。"""
+
+
+def _add(make_application):
+    return make_application(contact_email='alice@example.com', teacher_phone='13900000002')
+
+
+def test_masked_serialization_never_decrypts(make_application, monkeypatch):
+    import ciphertext
+    from models import Application
+
+    row = _add(make_application)
+    assert row.contact_phone_masked == '138****0001'
+
+    def _no_decrypt(*_args):
+        raise AssertionError('脱敏输出不应解密')
+
+    monkeypatch.setattr(ciphertext, 'decrypt_with', _no_decrypt)
+    d = Application.to_dicts([row])[0]
+    assert d['contact_phone'] == '138****0001'
+    assert d['contact_email'] == 'a***e@example.com'
+    assert d['teacher_phone'] == '139****0002'
+    assert d['leader_phone'] is None
+
+
+def test_mask_helpers_never_return_plaintext(app):
+    from app import mask_email, mask_phone
+
+    assert mask_phone('12345') == '***'
+    assert mask_email('ab@example.com') == 'a**@example.com'
+    assert mask_email('not-an-email') == '***'
+
+
+def test_backfill_fills_legacy_rows(db, make_application):
+    from backfill_masked_contacts import backfill
+    from models import Application
+
+    row_id = _add(make_application).id
+    expected = Application.query.get(row_id).to_dict()
+    table = Application.__table__
+    db.session.execute(table.update().values(
+        contact_phone_masked=None, contact_email_masked='alice@example.com', updated_at=table.c.updated_at
+    ))
+    db.session.commit()
+    db.session.expire_all()
+    # 未回填时回退到解密，输出不变
+    assert Application.query.get(row_id).to_dict() == expected
+
+    assert backfill(db, log=lambda _msg: None) == (1, 1, 0)
+    assert backfill(db, log=lambda _msg: None) == (0, 0, 0)
+    row = Application.query.get(row_id)
+    assert (row.contact_phone_masked, row.contact_email_masked) == ('138****0001', 'a***e@example.com')
@@ -0,0 +1,44 @@
+"""游标分页：created_at 为空的记录也要翻到，且不重复。"""
+from datetime import datetime, timedelta
+
+from pagination import decode_cursor, encode_cursor
+
+
+def _seed(make_application, n):
+    base = datetime(2024, 5, 1, 8, 0, 0)
+    # 两两同一时间，覆盖 created_at 相同时按 id 排序
+    return [
+        make_application(
+            school_name=f'测试学校{i}', contact_phone='13800000000', contact_email=f'u{i}@example.com',
+            created_at=base + timedelta(minutes=i // 2)
+        ).id
+        for i in range(n)
+    ]
+
+
+def test_cursor_round_trip_with_null_created_at():
+    ts = datetime(2024, 5, 1, 8, 30, 15)
+    assert decode_cursor(encode_cursor(ts, 12)) == (ts, 12)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+
+def test_cursor_pages_cover_null_created_at(client, db, make_application, admin_headers):
+    from models import Application
+
+    ids = _seed(make_application, 9)
+    undated = ids[1:4]
+    table = Application.__table__
+    db.session.execute(table.update().where(table.c.id.in_(undated)).values(created_at=None))
+    db.session.commit()
+
+    dated = [i for i in ids if i not in undated]
+    expected = sorted(dated, key=lambda i: ((i - ids[0]) // 2, i), reverse=True) + sorted(undated, reverse=True)
+
+    seen, cursor = [], ''
+    for _ in range(10):
+        data = client.get(f'/api/admin/applications?per_page=2&cursor={cursor}', headers=admin_headers).get_json()['data']
+        seen += [a['id'] for a in data['applications']]
+        if not data['has_more']:
+            break
+        cursor = data['next_cursor']
+    assert seen == expected
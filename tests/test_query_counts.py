@@ -0,0 +1,54 @@
+"""列表类接口的 SQL 条数回归：条数不随报名数/选手数增长（防止 N+1）。"""
+import pytest
+
+from query_guard import assert_max_queries, count_queries
+
+PHONE = '13800000000'
+
+# (角色, 地址, 条数上限)
+ENDPOINTS = [
+    ('admin', '/api/admin/applications?per_page=100', 3),
+    ('admin', '/api/admin/applications?cursor=&per_page=100', 3),
+    ('admin', '/api/applications?per_page=100', 3),
+    ('admin', f'/api/admin/applications/by-phone?phone={PHONE}', 2),
+    ('user', f'/api/applications/by-phone?phone={PHONE}', 2),
+    ('user', '/api/my-applications?match_no=A0000', 2),
+    ('admin', '/api/admin/applications/export', 2),
+]
+
+
+def _seed(db, make_application, n, participants=3):
+    from models import Application, ApplicationParticipant
+
+    start = Application.query.count()
+    for i in range(start, start + n):
+        app_row = make_application(
+            participant_count=participants, school_name=f'测试学校{i}', openid='test-openid',
+            match_no=f'A{i:04d}', award_level='一等奖',
+            contact_phone=PHONE, contact_email=f'u{i}@example.com', teacher_phone='13900000001', commit=False
+        )
+        for seq in range(1, participants + 1):
+            app_row.participants.append(ApplicationParticipant(seq_no=seq, participant_name=f'选手{i}-{seq}'))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def _get(client, url, headers):
+    with count_queries() as counter:
+        resp = client.get(url, headers=headers)
+        body = resp.get_data()
+    assert resp.status_code == 200, body[:200]
+    return counter.count
+
+
+@pytest.mark.parametrize('role, url, limit', ENDPOINTS)
+def test_list_query_count_is_constant(client, db, make_application, admin_headers, user_headers, role, url, limit):
+    headers = admin_headers if role == 'admin' else user_headers
+
+    _seed(db, make_application, 2)
+    small = _get(client, url, headers)
+
+    _seed(db, make_application, 40)
+    with assert_max_queries(limit, label=url):
+        client.get(url, headers=headers).get_data()
+    assert _get(client, url, headers) == small
@@ -0,0 +1,48 @@
+"""密文格式与重新加密任务：旧格式可读，任务把旧密文改写成当前 key id 且可续跑。"""
+from cryptography.fernet import Fernet
+
+import ciphertext
+
+
+def test_tagged_ciphertext_selects_key_directly():
+    old_key, new_key = Fernet.generate_key(), Fernet.generate_key()
+    keyring = {ciphertext.key_id(new_key): Fernet(new_key), ciphertext.key_id(old_key): Fernet(old_key)}
+    current = ciphertext.key_id(new_key)
+
+    token = Fernet(old_key).encrypt(b'13800000001')
+    tagged = ciphertext.pack(ciphertext.key_id(old_key), token)
+    assert ciphertext.decrypt_with(keyring, current, tagged) == '13800000001'
+    # 旧格式（裸 token）逐个密钥尝试
+    assert ciphertext.decrypt_with(keyring, current, token.decode()) == '13800000001'
+    # 二进制形式比文本短
+    binary = ciphertext.pack_binary(ciphertext.key_id(old_key), token)
+    assert len(binary) < len(tagged)
+    assert ciphertext.decrypt_with(keyring, current, binary) == '13800000001'
+    assert not ciphertext.is_current(tagged, current)
+
+
+def test_reencrypt_job_rewrites_legacy_rows(db, make_application):
+    import reencrypt
+    from app import CURRENT_KEY_ID, cipher_suite, decrypt_data
+    from models import Application
+
+    ids = []
+    for i in range(5):
+        row = make_application(contact_phone=f'1380000000{i}', contact_email=f'u{i}@example.com', commit=False)
+        # 旧格式：没有 key id 前缀
+        row.contact_phone_encrypted = cipher_suite.encrypt(f'1380000000{i}'.encode()).decode()
+        db.session.commit()
+        ids.append(row.id)
+    stamp = Application.query.get(ids[0]).updated_at
+
+    assert reencrypt.pending_counts()['applications'] == 5
+    state = reencrypt._new_state(chunk_size=2)
+    assert reencrypt.run_job(state)['status'] == 'completed'
+    assert state['tables']['applications']['reencrypted'] == 5
+    assert reencrypt.pending_counts()['applications'] == 0
+
+    db.session.expire_all()
+    row = Application.query.get(ids[0])
+    assert row.contact_phone_encrypted.startswith(f'v1:{CURRENT_KEY_ID}:')
+    assert decrypt_data(row.contact_phone_encrypted) == '13800000000'
+    assert row.updated_at == stamp
@@ -0,0 +1,54 @@
+"""证书渲染分段计时：hook 接口、汇总器与管理员调试响应头。"""
+from certificate_generator import CertificateGenerator, RenderTimingStats, RENDER_STAGES
+
+
+def _application(make_application):
+    from app import _ensure_default_certificate_templates
+
+    _ensure_default_certificate_templates()
+    return make_application(award_level='一等奖', match_no='A001')
+
+
+def test_timing_hook_reports_stages_and_bytes(make_application):
+    row = _application(make_application)
+    generator = CertificateGenerator()
+    config = generator.create_default_template(row.category, row.award_level)
+
+    agg = RenderTimingStats()
+    generator.add_timing_hook(agg)
+    seen = []
+    content = generator.generate_certificate(row, config, timing_hook=seen.append)
+    generator.generate_certificate(row, config)
+
+    assert len(seen) == 1
+    stats = seen[0]
+    assert stats['bytes'] == len(content)
+    assert set(stats['stages']) == set(RENDER_STAGES)
+    assert stats['total_ms'] >= sum(stats['stages'].values()) - 1.0
+
+    snap = agg.snapshot()
+    assert snap['count'] == 2
+    # 字体注册只计入第一次渲染
+    assert snap['stages']['fonts']['count'] == 1
+    assert snap['stages']['save']['count'] == 2
+
+
+def test_admin_debug_header_adds_server_timing(client, make_application, admin_headers):
+    row = _application(make_application)
+    url = f'/api/certificate/generate-coach/{row.id}'
+    plain = client.get(url, headers=admin_headers)
+    assert plain.status_code == 200
+    assert 'Server-Timing' not in plain.headers
+
+    debug = {**admin_headers, 'X-Admin-Debug': admin_headers['Authorization'].split(' ', 1)[1]}
+    hit = client.get(url, headers=debug)
+    assert hit.headers['X-Cert-Cache'] == 'hit'
+
+    miss = client.get(f'{url}?profile=mobile', headers=debug)
+    assert miss.headers['X-Cert-Cache'] == 'miss'
+    assert 'save;dur=' in miss.headers['Server-Timing']
+    assert int(miss.headers['X-Cert-Render-Bytes']) == len(miss.data)
+
+    metrics = client.get('/api/admin/certificates/metrics', headers=admin_headers).get_json()['data']
+    coach = [r for r in metrics['registry'] if r['kind'] == 'coach']
+    assert sum(r['count'] for r in coach) == 2
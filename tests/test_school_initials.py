@@ -0,0 +1,29 @@
+"""学校拼音首字母：写 school_name 时落库，筛选走前缀区间，backfill 补齐历史数据。"""
+
+
+def test_filter_uses_stored_initials(client, db, make_application, admin_headers):
+    row = make_application(school_name='北京四中', match_no='A001')
+    make_application(school_name='上海中学', match_no='A002')
+    assert row.school_initials == 'BJSZ'
+
+    data = client.get('/api/admin/applications?school_initial=bj', headers=admin_headers).get_json()['data']
+    assert [a['match_no'] for a in data['applications']] == ['A001']
+
+    row.school_name = '北师大附中'
+    db.session.commit()
+    data = client.get('/api/admin/applications?school_initial=BJ', headers=admin_headers).get_json()['data']
+    assert data['total'] == 0
+
+
+def test_backfill_fills_missing_initials(db, make_application):
+    from backfill_school_initials import backfill
+    from models import Application
+
+    row = make_application(school_name='北京四中', match_no='A001')
+    db.session.execute(Application.__table__.update().values(school_initials=None))
+    db.session.commit()
+
+    assert backfill(db, log=lambda _msg: None) == (1, 1)
+    assert backfill(db, log=lambda _msg: None) == (0, 0)
+    db.session.expire_all()
+    assert db.session.get(Application, row.id).school_initials == 'BJSZ'
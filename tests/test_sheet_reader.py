@@ -0,0 +1,60 @@
+"""流式读取导入表格：行号、表头与 pd.read_excel 一致，单元格保留原值，CSV 兼容 GBK。"""
+import pandas as pd
+from openpyxl import Workbook
+
+import sheet_reader
+
+
+def _frames(path, batch_rows=2):
+    reader = sheet_reader.open_sheet(path, batch_rows=batch_rows)
+    return reader.columns, pd.concat(list(reader))
+
+
+def test_xlsx_batches_match_read_excel(tmp_path):
+    path = str(tmp_path / 'sheet.xlsx')
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['参赛号', '手机号', '参赛号', None])
+    for row in (['A001', '13800000001'], [None, None], ['0123', None], ['A003', '13800000003'], [None, None]):
+        ws.append(row)
+    wb.save(path)
+
+    columns, df = _frames(path)
+    expected = pd.read_excel(path)
+    assert list(columns) == list(expected.columns) == ['参赛号', '手机号', '参赛号.1']
+    # 中间空行保留、末尾空行丢弃，行号与 read_excel 相同
+    assert list(df.index) == list(expected.index) == [0, 1, 2, 3]
+    assert list(df['参赛号']) == ['A001', None, '0123', 'A003']
+    assert list(df['手机号']) == ['13800000001', None, None, '13800000003']
+
+
+def test_csv_gbk(tmp_path):
+    path = str(tmp_path / 'sheet.csv')
+    with open(path, 'w', encoding='gb18030', newline='') as f:
+        f.write('参赛号,获奖等级\r\nA001,一等奖\r\n0042,二等奖\r\n')
+
+    columns, df = _frames(path, batch_rows=1)
+    assert list(columns) == ['参赛号', '获奖等级']
+    assert df.values.tolist() == [['A001', '一等奖'], ['0042', '二等奖']]
+
+
+def test_xlsx_styled_blank_rows(tmp_path):
+    from openpyxl.styles import Font
+
+    path = str(tmp_path / 'styled.xlsx')
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['参赛号', '手机号'])
+    ws.append(['A001', '13800000001'])
+    # 只有格式、没有值的行：中间 3 行跨过批次边界，末尾 2000 行应整体丢弃
+    for r in range(3, 2006):
+        ws.cell(row=r, column=1).font = Font(bold=True)
+    ws.cell(row=6, column=1, value='A002')
+    wb.save(path)
+
+    reader = sheet_reader.open_sheet(path, batch_rows=2)
+    assert reader.total_rows is None
+    frames = list(reader)
+    assert [list(f.index) for f in frames] == [[0, 1], [2, 3], [4]]
+    assert list(pd.concat(frames)['参赛号']) == ['A001', None, None, None, 'A002']
+    assert reader.total_rows == 5
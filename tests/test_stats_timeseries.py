@@ -0,0 +1,45 @@
+"""报名时间序列：按本地时区分桶，通过/退回按审核时间、只计当前状态，缺的桶补 0。"""
+from datetime import datetime
+
+import stats_rollup
+
+
+def _series(client, headers, query):
+    return client.get(f'/api/admin/stats/timeseries?{query}', headers=headers).get_json()['data']
+
+
+def test_hourly_series_follows_review_state(client, db, make_application, admin_headers):
+    # UTC 01:xx / 02:xx = 北京时间 09:00 / 10:00 桶
+    a = make_application(created_at=datetime(2024, 5, 1, 1, 10))
+    make_application(created_at=datetime(2024, 5, 1, 1, 50))
+    make_application(
+        category='地面赛', created_at=datetime(2024, 5, 1, 2, 5), status='rejected', reviewed_at=datetime(2024, 5, 1, 2, 30)
+    )
+    a.status = 'approved'
+    a.reviewed_at = datetime(2024, 5, 1, 2, 45)
+    db.session.commit()
+
+    query = 'granularity=hour&start=2024-05-01T09:00&end=2024-05-01T11:00&metrics=registrations,approvals,rejections'
+    data = _series(client, admin_headers, query)
+    assert data['buckets'] == ['2024-05-01T09:00:00', '2024-05-01T10:00:00', '2024-05-01T11:00:00']
+    assert data['series'] == {'registrations': [2, 1, 0], 'approvals': [0, 1, 0], 'rejections': [0, 1, 0]}
+
+    data = _series(client, admin_headers, query + '&category=空中对抗赛&by_category=1')
+    assert data['series']['registrations'] == [2, 0, 0]
+    assert list(data['series_by_category']) == ['空中对抗赛']
+
+    # 重新提交后退出通过统计
+    a.status = 'pending'
+    a.reviewed_at = None
+    db.session.commit()
+    day = _series(client, admin_headers, 'granularity=day&start=2024-05-01&end=2024-05-01')
+    assert day['series'] == {'registrations': [3], 'approvals': [0], 'rejections': [1]}
+    assert stats_rollup.rebuild(db.session, dry_run=True)[0] == 0
+
+
+def test_range_validation(client, db, admin_headers):
+    assert client.get('/api/admin/stats/timeseries?granularity=week', headers=admin_headers).status_code == 400
+    assert client.get('/api/admin/stats/timeseries?granularity=hour&start=2024-01-01&end=2024-03-01',
+                      headers=admin_headers).status_code == 400
+    data = _series(client, admin_headers, 'granularity=day')
+    assert len(data['buckets']) == stats_rollup.DEFAULT_BUCKETS['day']